@@ -1,15 +1,101 @@
-from fastapi import Body, Depends, FastAPI, HTTPException
+import json
+import time
+import uuid
+from typing import Literal
+import numpy as np
+from fastapi import Body, Depends, FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from services import Dependencies
-from schemas.schemas import ProjetoSolarRequest, ProjetoSolarResponse, ProjetoArranjoRequest, ArranjoSolarResponse
+from schemas.schemas import (
+    ProjetoSolarRequest, ProjetoSolarResponse, ProjetoArranjoRequest, ArranjoSolarResponse,
+    ArranjoColunarRequest, ArranjoColunarResponse, ArranjoCenaRequest, MatrizSombreamentoRequest,
+    MatrizSombreamentoResponse
+)
 from core.app import SolarEngine
+from utils.columnar import FORMATOS_BINARIOS, ler_colunas, escrever_colunas
+from utils.logger import ID_REQUISICAO
+from utils.metrics import REGISTRO, HTTP_LATENCIA, ESTAGIO_LATENCIA
+from utils.profiler import (
+    HSP_PROFILING, HEADER_PERFIL, HEADER_PERFIL_ID, PERFIL_REQUISICAO, SessaoPerfil, perfilado, requisicao_autorizada
+)
+
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele, usamos o json da stdlib
+    orjson = None
+
+
+def _converter_numpy(obj):
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Objeto do tipo {type(obj).__name__} não é serializável em JSON")
+
+
+class JSONResponseInstrumentada(JSONResponse):
+    """
+    JSONResponse que registra o tempo de serialização no estágio 'serializacao'.
+    Usa orjson quando disponível, serializando arrays NumPy diretamente (sem passar por listas Python).
+    """
+
+    def render(self, content) -> bytes:
+        with ESTAGIO_LATENCIA.time(estagio="serializacao"):
+            if orjson is not None:
+                return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+            return json.dumps(
+                content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_converter_numpy
+            ).encode("utf-8")
+
 
 app = FastAPI(
     title="HSP Simulator - Solar Engine API", 
     description="API para cálculo de irradiância solar, ganho bifacial e sombreamento por obstáculos.",
     openapi_url="/openapi.json",
-    root_path="/api"
+    root_path="/api",
+    default_response_class=JSONResponseInstrumentada
 )
 
+@app.middleware("http")
+async def medir_latencia(request: Request, call_next):
+    """
+    Registra a latência de cada requisição usando o template da rota (evita cardinalidade alta)
+    e propaga o id de correlação (header X-Request-ID) para os logs.
+    """
+    id_requisicao = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    token = ID_REQUISICAO.set(id_requisicao)
+
+    # Perfil opt-in: HSP_PROFILING=1 ou header de administrador; o endpoint @perfilado grava o arquivo
+    sessao_perfil = None
+    if HSP_PROFILING or (HEADER_PERFIL in request.headers and requisicao_autorizada(request.headers[HEADER_PERFIL])):
+        sessao_perfil = SessaoPerfil()
+    token_perfil = PERFIL_REQUISICAO.set(sessao_perfil)
+
+    inicio = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Request-ID"] = id_requisicao
+        if sessao_perfil is not None and sessao_perfil.caminho:
+            response.headers[HEADER_PERFIL_ID] = sessao_perfil.id
+        return response
+    finally:
+        PERFIL_REQUISICAO.reset(token_perfil)
+        ID_REQUISICAO.reset(token)
+        rota = request.scope.get("route")
+        HTTP_LATENCIA.observe(
+            time.perf_counter() - inicio,
+            metodo=request.method,
+            rota=rota.path if rota else "desconhecida",
+            status=status
+        )
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Exposição das métricas do worker no formato texto do Prometheus."""
+    return PlainTextResponse(REGISTRO.exportar(), media_type="text/plain; version=0.0.4")
+
 def get_engine():
     repo = Dependencies.get_solar_repository()
     return SolarEngine(repository=repo)
@@ -17,6 +103,7 @@ def get_engine():
 @app.post("/calcular", response_model=ProjetoSolarResponse, summary="Calcula HSP Corrigido",
     description="Calcula a média de HSP considerando inclinação, azimute, ganho bifacial e sombras."
 )
+@perfilado()
 def post_hsp(
     dados: ProjetoSolarRequest = Body(
         ...,
@@ -63,14 +150,33 @@ def post_hsp(
             }
         }
     ),
+    compacto: bool = Query(False, description="Omite a referência quando não há perda por sombra e usa o motor vetorizado"),
+    resolucao: Literal["mensal", "diaria", "horaria", "horaria_sintetica"] = Query(
+        "mensal", description="'diaria' calcula geometria e sombra nos 365 dias do ano; 'horaria' usa as 8760 h do TMY do PVGIS; "
+                              "'horaria_sintetica' gera o perfil horário a partir das médias mensais do provedor"
+    ),
+    modelo_difusa: Literal["simplificado", "perez1990"] = Query(
+        "simplificado", description="Difusa frontal: coeficientes fixos (rápido) ou a tabela completa de Perez (1990)"
+    ),
     engine: SolarEngine = Depends(get_engine)
 ):
+    if compacto and resolucao != "mensal":
+        raise HTTPException(status_code=422, detail="O modo compacto só suporta resolucao='mensal'.")
+
     try:
         # Lógica de extração do obstáculo
         config_sombra = None
         if dados.config_obstaculo and dados.config_obstaculo.altura_obstaculo > 0:
             config_sombra = dados.config_obstaculo.model_dump()
 
+        if compacto:
+            item = dados.model_dump(exclude={"latitude", "longitude"})
+            item.update(id_placa="-", config_obstaculo=config_sombra)
+            res = engine.calcular_arranjo_compacto(lat=dados.latitude, lon=dados.longitude, itens=[item],
+                                                   modelo_difusa=modelo_difusa)[0]
+            res.pop("id_placa")
+            return JSONResponseInstrumentada(res)
+
         # Chamada do core
         res = engine.calcular_projeto_solar(
             lat=dados.latitude, 
@@ -85,10 +191,14 @@ def post_hsp(
             largura_modulo=dados.largura_modulo,
             orientacao=dados.orientacao,
             config_obstaculo=config_sombra,
-            formato="dict"
+            formato="dict",
+            resolucao=resolucao,
+            modelo_difusa=modelo_difusa
         )
 
-        return {
+        # A resposta já é montada no formato do ProjetoSolarResponse: devolvê-la como Response
+        # evita a revalidação do response_model e vai direto ao encoder JSON
+        return JSONResponseInstrumentada({
             "kWh/m²/dia": {
                 "real": {
                     "media": res["media"],
@@ -100,11 +210,12 @@ def post_hsp(
                 }
             },
             "perda_sombreamento_estimada": res["perda_sombreamento_estimada"]
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
 @app.post("/calcular-arranjo", response_model=ArranjoSolarResponse, summary="Cálculo em Lote (Com Cache)")
+@perfilado()
 def post_arranjo(
     dados: ProjetoArranjoRequest = Body(
         ...,
@@ -274,6 +385,7 @@ def post_arranjo(
             }
         }
     ),
+    compacto: bool = Query(False, description="Omite a referência quando não há perda por sombra e usa o motor vetorizado"),
     engine: SolarEngine = Depends(get_engine)    
 ):
     """
@@ -281,15 +393,207 @@ def post_arranjo(
     Mantém a otimização de UMA chamada à API da NASA para todo o lote.
     """
     try:
-        resultados = engine.calcular_arranjo_completo(
+        calcular = engine.calcular_arranjo_compacto if compacto else engine.calcular_arranjo_completo
+        resultados = calcular(
             lat=dados.latitude, 
             lon=dados.longitude, 
             itens=dados.itens
         )
         
-        return {
+        return JSONResponseInstrumentada({
             "total_placas": len(resultados),
             "resultados": resultados
+        })
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+@app.post("/calcular-arranjo-colunar", response_model=ArranjoColunarResponse, summary="Cálculo em Lote Colunar (Vetorizado)")
+@perfilado()
+def post_arranjo_colunar(
+    dados: ArranjoColunarRequest = Body(
+        ...,
+        openapi_examples={
+            "Três Placas": {
+                "summary": "Um array por campo (escalares valem para todas as placas)",
+                "value": {
+                    "latitude": -5.8125,
+                    "longitude": -35.1875,
+                    "id_placa": ["P1", "P2", "P3"],
+                    "inclinacao_graus": [10, 15, 20],
+                    "azimute_graus": [0, 0, 90],
+                    "albedo_solo": 0.2,
+                    "distancia_centro_modulo_chao": [0.5, 0.5, 0.2],
+                    "tecnologia_celula": "TOPCON",
+                    "altura_obstaculo": [4.0, None, None],
+                    "distancia_obstaculo": [2.0, None, None],
+                    "referencia_azimutal_obstaculo": [0.0, None, None],
+                    "largura_obstaculo": 4.0
+                }
+            }
+        }
+    ),
+    engine: SolarEngine = Depends(get_engine)
+):
+    """
+    Versão colunar do /calcular-arranjo para dezenas de milhares de placas.
+    A validação é feita por coluna e o cálculo roda no motor vetorizado.
+    """
+    colunas = dados.model_dump(exclude={"latitude", "longitude"})
+    try:
+        res = engine.calcular_arranjo_colunar(lat=dados.latitude, lon=dados.longitude, colunas=colunas)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    return JSONResponseInstrumentada({
+        "total_placas": len(res["id_placa"]),
+        "id_placa": res["id_placa"].tolist(),
+        "media": np.round(res["media"], 3),
+        "mensal": np.round(res["mensal"], 3),
+        "media_sem_sombra": np.round(res["media_sem_sombra"], 3),
+        "mensal_sem_sombra": np.round(res["mensal_sem_sombra"], 3),
+        "perda_sombreamento_estimada": np.round(res["perda_sombreamento"], 1)
+    })
+
+@app.post("/calcular-arranjo-cena", response_model=ArranjoColunarResponse, summary="Arranjo com Cena de Obstáculos")
+@perfilado()
+def post_arranjo_cena(
+    dados: ArranjoCenaRequest = Body(
+        ...,
+        openapi_examples={
+            "Fileiras e Casa de Máquinas": {
+                "summary": "Três fileiras ao sul de uma parede, com um poste e uma caixa d'água",
+                "value": {
+                    "latitude": -5.8125,
+                    "longitude": -35.1875,
+                    "posicao_x": [0.0, 1.2, 0.0, 1.2, 0.0, 1.2],
+                    "posicao_y": [0.0, 0.0, -2.5, -2.5, -5.0, -5.0],
+                    "inclinacao_graus": 10,
+                    "azimute_graus": 0,
+                    "distancia_centro_modulo_chao": 0.3,
+                    "obstaculos": [
+                        {"tipo": "parede", "inicio": [-2.0, 2.0], "fim": [4.0, 2.0], "altura": 3.0},
+                        {"tipo": "poste", "centro": [3.0, -1.0], "diametro": 0.2, "altura": 6.0},
+                        {"tipo": "caixa", "centro": [-4.0, -3.0], "largura": 2.0, "profundidade": 2.0,
+                         "rotacao": 0.0, "altura": 2.5}
+                    ]
+                }
+            }
+        }
+    ),
+    engine: SolarEngine = Depends(get_engine)
+):
+    """
+    Arranjo descrito como cena: posições dos módulos (m) e obstáculos, cada um enviado uma vez.
+    As relações módulo × obstáculo são derivadas no servidor, com índice espacial para descartar
+    os obstáculos distantes; a sombra de cada amostra do sol é a união entre os obstáculos.
+    """
+    colunas = dados.model_dump(exclude={"latitude", "longitude", "obstaculos"})
+    colunas["inclinacao_graus"] = np.broadcast_to(np.asarray(dados.inclinacao_graus, dtype=float), len(dados.posicao_x))
+    obstaculos = [o.model_dump(exclude_none=True) for o in dados.obstaculos]
+    try:
+        res = engine.calcular_arranjo_colunar(lat=dados.latitude, lon=dados.longitude, colunas=colunas,
+                                              obstaculos=obstaculos)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    return JSONResponseInstrumentada({
+        "total_placas": len(res["id_placa"]),
+        "id_placa": res["id_placa"].tolist(),
+        "media": np.round(res["media"], 3),
+        "mensal": np.round(res["mensal"], 3),
+        "media_sem_sombra": np.round(res["media_sem_sombra"], 3),
+        "mensal_sem_sombra": np.round(res["mensal_sem_sombra"], 3),
+        "perda_sombreamento_estimada": np.round(res["perda_sombreamento"], 1)
+    })
+
+@app.post("/sombreamento/matriz", response_model=MatrizSombreamentoResponse, summary="Matriz de Sombreamento Mês × Hora",
+    description="Fração da radiação direta bloqueada pelo obstáculo em cada mês e horário (hora solar verdadeira)."
+)
+@perfilado()
+def post_matriz_sombreamento(
+    dados: MatrizSombreamentoRequest = Body(
+        ...,
+        openapi_examples={
+            "Muro ao Norte": {
+                "summary": "Muro de 4m a 2m do painel",
+                "value": {
+                    "latitude": -5.8125,
+                    "distancia_centro_modulo_chao": 0.15,
+                    "orientacao": "Retrato",
+                    "config_obstaculo": {
+                        "altura_obstaculo": 4.0,
+                        "distancia_obstaculo": 2.0,
+                        "referencia_azimutal_obstaculo": 0.0,
+                        "largura_obstaculo": 4.0
+                    },
+                    "intervalo_minutos": 30
+                }
+            }
         }
+    ),
+    engine: SolarEngine = Depends(get_engine)
+):
+    """
+    Não consulta provedores climatológicos: depende apenas da latitude e da geometria,
+    e a matriz fica em cache por obstáculo no ShadowEngine.
+    """
+    horas = tuple(np.arange(5.0, 19.0 + 1e-9, dados.intervalo_minutos / 60))
+    try:
+        res = engine.calcular_matriz_sombreamento(
+            lat=dados.latitude,
+            config_obstaculo=dados.config_obstaculo.model_dump(),
+            altura_instalacao=dados.distancia_centro_modulo_chao,
+            comprimento_modulo=dados.comprimento_modulo,
+            largura_modulo=dados.largura_modulo,
+            orientacao=dados.orientacao,
+            horas=horas
+        )
     except Exception as e:
-        raise HTTPException(status_code=502, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=502, detail=str(e))
+
+    fracao = np.round(res["fracao_sombreada"], 3)
+    return JSONResponseInstrumentada({
+        "meses": ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"],
+        "horas": np.round(res["horas"], 4),
+        # Sol abaixo do horizonte (NaN) vira null no JSON
+        "fracao_sombreada": np.where(np.isnan(fracao), None, fracao).tolist(),
+        "perda_media_mensal": np.round(res["perda_media_mensal"], 3)
+    })
+
+@perfilado("post_arranjo_colunar_binario")
+def _calcular_colunar_binario(engine, corpo, formato, latitude, longitude):
+    """Decodificação, cálculo e codificação juntos no threadpool: NPZ/Arrow não bloqueiam o event loop."""
+    colunas = ler_colunas(corpo, formato)
+    res = engine.calcular_arranjo_colunar(latitude, longitude, colunas)
+    return escrever_colunas(res, formato)
+
+@app.post("/calcular-arranjo-colunar/binario", summary="Cálculo em Lote Colunar (NPZ / Arrow IPC)",
+    description=(
+        "Recebe as mesmas colunas do /calcular-arranjo-colunar em formato binário "
+        f"(Content-Type `{FORMATOS_BINARIOS[0]}` ou `{FORMATOS_BINARIOS[1]}`) "
+        "e responde no mesmo formato."
+    )
+)
+async def post_arranjo_colunar_binario(
+    request: Request,
+    latitude: float = Query(..., examples=[-5.8125]),
+    longitude: float = Query(..., examples=[-35.1875]),
+    engine: SolarEngine = Depends(get_engine)
+):
+    formato = request.headers.get("content-type", "").split(";")[0].strip()
+    if formato not in FORMATOS_BINARIOS:
+        raise HTTPException(status_code=415, detail=f"Content-Type deve ser um de: {', '.join(FORMATOS_BINARIOS)}")
+
+    corpo = await request.body()
+    try:
+        conteudo = await run_in_threadpool(_calcular_colunar_binario, engine, corpo, formato, latitude, longitude)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    return Response(content=conteudo, media_type=formato)
@@ -1,14 +1,38 @@
 import os
 import json
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from core.app import SolarEngine
 from services.providers import InpeLabrenProvider, NasaPowerProvider, PvgisProvider
 from tests.test_scenarios import SCENARIOS
+from utils.profiler import perfilado
+
+def _normalizar_nome(nome):
+    return nome.strip().lower()
+
+
+def indexar_localidades(localidades):
+    """
+    Índice nome da cidade (normalizado) -> dados da cidade, montado uma única vez.
+    Em nomes repetidos entre estados prevalece a primeira ocorrência (mesma ordem da varredura linear).
+    """
+    indice = {}
+    for estado in localidades.values():
+        for cidade in estado['cidades']:
+            indice.setdefault(_normalizar_nome(cidade['nome']), cidade)
+    return indice
+
 
 class SolarAuditor:
-    def __init__(self, engine: SolarEngine):
+    def __init__(self, engine: SolarEngine, max_workers_clima=8):
+        """
+        :param max_workers_clima: Limite de consultas climatológicas simultâneas na validação CRESESB.
+        """
         self.engine = engine
+        self.max_workers_clima = max_workers_clima
 
+    @perfilado("auditor.rodar_benchmark_sombra")
     def rodar_benchmark_sombra(self, lat=-5.8125, lon=-35.1875):
         cenario = SCENARIOS["validacao_sombra"]
         print(f"🚀 Iniciando Auditoria: {cenario['descricao']}")
@@ -47,10 +71,15 @@ class SolarAuditor:
             
         return resultados_csv
     
+    @perfilado("auditor.validar_transposicao_cresesb")
     def validar_transposicao_cresesb(self):
         """
         Valida o fator de ganho geométrico comparando com a amostragem do SunData (CRESESB).
         Isso atesta se a lógica de inclinação está calibrada com o mundo real.
+
+        Pipeline: índice de localidades por nome -> busca concorrente da climatologia de todas as cidades
+        (no máximo `max_workers_clima` simultâneas) -> uma avaliação em lote por cidade cobrindo 0° e
+        todas as inclinações do gabarito.
         """
         # Caminhos baseados na raiz do projeto
         project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -62,54 +91,47 @@ class SolarAuditor:
             return []
 
         with open(loc_path, 'r', encoding='utf-8') as f:
-            locs = json.load(f)
+            indice = indexar_localidades(json.load(f))
         with open(gabarito_path, 'r', encoding='utf-8') as f:
             gabarito = json.load(f)
 
+        # Busca coordenadas nas localidades (consulta O(1) no índice)
+        cidades = [(nome, indice[_normalizar_nome(nome)], inclinacoes) for nome, inclinacoes in gabarito.items()
+                   if _normalizar_nome(nome) in indice]
+
+        # Otimização: Busca o clima de todas as cidades em paralelo (I/O), uma vez por cidade
+        with ThreadPoolExecutor(max_workers=self.max_workers_clima) as executor:
+            climas = list(executor.map(
+                lambda cidade: self.engine.repository.get_standardized_data(cidade[1]['latitude'], cidade[1]['longitude']),
+                cidades
+            ))
+
         print(f"\n{'CIDADE':<15} | {'ANG':>3} | {'ESTIMADO':>10} | {'REAL':>10} | {'DIFERENÇA'}")
         print("-" * 65)
 
         results = []
 
-        for cidade_nome, inclinações in gabarito.items():
-            # Busca coordenadas nas localidades
-            coords = None
-            for estado in locs.values():
-                for c in estado['cidades']:
-                    if c['nome'].strip().lower() == cidade_nome.strip().lower():
-                        coords = c
-                        break
-                if coords: break
-            
-            if not coords: continue
-
-            # Otimização: Busca clima uma vez por cidade
-            dados_clima = self.engine.repository.get_standardized_data(coords['latitude'], coords['longitude'])
-
+        for (cidade_nome, coords, inclinações), dados_clima in zip(cidades, climas):
             # Base real 0° (Referência)
             real_sundata_0 = inclinações.get("0", {}).get("Anual")
-            
-            # Cálculo simulado 0° para achar o fator de escala
-            sim_0 = self.engine.calcular_projeto_solar(
-                coords['latitude'], coords['longitude'], 
-                inclinacao=0, azimute=0, is_bifacial=False,
+            angulos = [int(inc_str) for inc_str in inclinações if int(inc_str) != 0]
+
+            # Cálculo simulado em lote: 0° (fator de escala) + todos os ângulos alvo
+            res = self.engine.calcular_arranjo_colunar(
+                coords['latitude'], coords['longitude'],
+                {"inclinacao_graus": [0] + angulos, "azimute_graus": 0, "is_bifacial": False},
                 dados_pre_carregados=dados_clima
-            )["media"]
-
-            for inc_str, ref_data in inclinações.items():
-                inc = int(inc_str)
-                if inc == 0: continue 
-
-                # Cálculo simulado no ângulo alvo
-                sim_alvo = self.engine.calcular_projeto_solar(
-                    coords['latitude'], coords['longitude'], 
-                    inclinacao=inc, azimute=0, is_bifacial=False,
-                    dados_pre_carregados=dados_clima
-                )["media"]
-                
+            )
+            # Mesmo arredondamento da média do PerezEngine
+            medias = np.round(res["media"], 3)
+            sim_0 = medias[0]
+
+            for inc, sim_alvo in zip(angulos, medias[1:]):
+                ref_data = inclinações[str(inc)]
+
                 # A mágica da Transposição:
                 fator_transposicao = sim_alvo / sim_0
-                hsp_estimado = real_sundata_0 * fator_transposicao
+                hsp_estimado = float(real_sundata_0 * fator_transposicao)
                 hsp_real_angulo = ref_data.get("Anual")
                 
                 erro_pct = ((hsp_estimado / hsp_real_angulo) - 1) * 100
@@ -126,6 +148,7 @@ class SolarAuditor:
 
         return results
     
+    @perfilado("auditor.comparar_provedores_por_capital")
     def comparar_provedores_por_capital(self, lat, lon, cidade_nome):
         relatorio = []
         # Lista de provedores que você quer testar
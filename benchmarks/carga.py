@@ -0,0 +1,399 @@
+"""
+Gerador de carga para a API (/calcular e /calcular-arranjo).
+
+Sobe um uvicorn local com provedores substituídos (benchmarks/servidor_stub.py), dispara uma
+mistura realista de payloads — exemplos do OpenAPI do api.py, cenários de tests/test_scenarios.py
+e arranjos aleatórios — e reporta latência p50/p95/p99, vazão, taxa de erro e CPU/RSS por worker.
+
+Uso:
+    python -m benchmarks.carga --workers 2 --concorrencia 16 --duracao 20
+    python -m benchmarks.carga --taxa 50 --mix calcular=0.8,arranjo=0.2 --itens-arranjo 200
+    python -m benchmarks.carga --url http://127.0.0.1:8000 --saida carga.json   # servidor já em execução
+
+Sem `--taxa` a carga é em malha fechada (cada cliente dispara a próxima requisição assim que recebe
+a resposta). Com `--taxa` as requisições são agendadas em intervalos fixos e a latência é contada a
+partir do horário agendado, para que filas no servidor apareçam nos percentis.
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import subprocess
+import threading
+import numpy as np
+import httpx
+
+try:
+    import psutil
+except ImportError:  # psutil é opcional: sem ele, lemos /proc diretamente (Linux)
+    psutil = None
+
+ROTAS = {"calcular": "/calcular", "arranjo": "/calcular-arranjo"}
+MIX_PADRAO = {"calcular": 0.7, "arranjo": 0.3}
+LAT, LON = -5.8125, -35.1875
+
+
+# --- PAYLOADS ---
+def _exemplos_openapi():
+    """Exemplos declarados em `openapi_examples` no api.py, por rota."""
+    from api import app
+    caminhos = app.openapi()["paths"]
+    exemplos = {}
+    for chave, rota in ROTAS.items():
+        corpo = caminhos[rota]["post"]["requestBody"]["content"]["application/json"]
+        exemplos[chave] = [ex["value"] for ex in corpo.get("examples", {}).values()]
+    return exemplos
+
+
+def _payloads_cenarios():
+    """Expande os cenários de tests/test_scenarios.py em requisições do /calcular."""
+    from tests.test_scenarios import SCENARIOS
+    payloads = []
+    for cenario in SCENARIOS.values():
+        alturas = cenario.get("alturas_teste", [cenario.get("altura", 0.15)])
+        albedos = cenario.get("albedos_teste", [cenario.get("albedo", 0.2)])
+        for inc in cenario.get("inclinacoes", []):
+            for azi in cenario.get("azimutes", []):
+                for altura in alturas:
+                    for albedo in albedos:
+                        payload = {
+                            "latitude": cenario.get("lat", LAT), "longitude": cenario.get("lon", LON),
+                            "inclinacao_graus": inc, "azimute_graus": azi,
+                            "albedo_solo": albedo, "distancia_centro_modulo_chao": altura,
+                        }
+                        if cenario.get("config_obstaculo"):
+                            payload["config_obstaculo"] = cenario["config_obstaculo"]
+                        payloads.append(payload)
+
+        for caso in cenario.get("casos", []):
+            payload = {"latitude": cenario.get("lat", LAT), "longitude": cenario.get("lon", LON),
+                       "inclinacao_graus": 15, "azimute_graus": 0, "orientacao": caso.get("orientacao", "Retrato")}
+            if caso["h_obs"] > 0:
+                payload["config_obstaculo"] = {
+                    "altura_obstaculo": caso["h_obs"], "distancia_obstaculo": caso["d_obs"],
+                    "referencia_azimutal_obstaculo": caso["azi_obs"], "largura_obstaculo": caso.get("w_obs", 10.0),
+                }
+            payloads.append(payload)
+    return payloads
+
+
+def _item_aleatorio(rng, indice, prob_obstaculo=0.3):
+    item = {
+        "id_placa": f"Placa_{indice + 1:02d}",
+        "inclinacao_graus": rng.randint(0, 60),
+        "azimute_graus": rng.randrange(0, 360, 5),
+        "albedo_solo": round(rng.uniform(0.1, 0.6), 2),
+        "distancia_centro_modulo_chao": round(rng.uniform(0.1, 2.0), 2),
+        "tecnologia_celula": rng.choice(["TOPCON", "PERC", "AL BSF"]),
+        "is_bifacial": rng.random() < 0.5,
+        "orientacao": rng.choice(["Retrato", "Paisagem"]),
+    }
+    if rng.random() < prob_obstaculo:
+        item["config_obstaculo"] = {
+            "altura_obstaculo": round(rng.uniform(0.5, 10.0), 1),
+            "distancia_obstaculo": round(rng.uniform(0.5, 10.0), 1),
+            "referencia_azimutal_obstaculo": rng.randrange(0, 360, 15),
+            "largura_obstaculo": round(rng.uniform(0.2, 30.0), 1),
+        }
+    return item
+
+
+def montar_gerador_payloads(rng, mix=None, itens_arranjo=50):
+    """
+    Devolve uma função sem argumentos que sorteia (chave_rota, payload) segundo o `mix`.
+    /calcular alterna entre exemplos do OpenAPI, cenários de teste e placas aleatórias;
+    /calcular-arranjo alterna entre os exemplos do OpenAPI e arranjos aleatórios de `itens_arranjo` placas.
+    """
+    mix = mix or MIX_PADRAO
+    exemplos = _exemplos_openapi()
+    fixos_calcular = exemplos["calcular"] + _payloads_cenarios()
+    chaves, pesos = zip(*mix.items())
+
+    def sortear():
+        chave = rng.choices(chaves, weights=pesos)[0]
+        if chave == "calcular":
+            if rng.random() < 0.5:
+                return chave, rng.choice(fixos_calcular)
+            return chave, {"latitude": LAT, "longitude": LON, **_item_aleatorio(rng, 0)}
+        if exemplos["arranjo"] and rng.random() < 0.2:
+            return chave, rng.choice(exemplos["arranjo"])
+        itens = [_item_aleatorio(rng, i) for i in range(itens_arranjo)]
+        return chave, {"latitude": LAT, "longitude": LON, "itens": itens}
+
+    return sortear
+
+
+# --- SERVIDOR LOCAL ---
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def iniciar_servidor(workers, porta, env_extra=None, timeout=60):
+    """Sobe `uvicorn benchmarks.servidor_stub:app` e espera o /openapi.json responder."""
+    env = {**os.environ, **(env_extra or {})}
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.servidor_stub:app", "--host", "127.0.0.1",
+         "--port", str(porta), "--workers", str(workers), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError(f"uvicorn terminou com código {processo.returncode}")
+        try:
+            httpx.get(f"http://127.0.0.1:{porta}/openapi.json", timeout=1).raise_for_status()
+            return processo
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    processo.terminate()
+    raise RuntimeError("uvicorn não respondeu a tempo")
+
+
+# --- RECURSOS POR WORKER ---
+def _filhos(pid):
+    if psutil:
+        return [p.pid for p in psutil.Process(pid).children(recursive=True)]
+    filhos = []
+    for entrada in os.listdir("/proc"):
+        if entrada.isdigit():
+            try:
+                with open(f"/proc/{entrada}/stat") as f:
+                    campos = f.read().rsplit(")", 1)[1].split()
+                if int(campos[1]) == pid:
+                    filhos.append(int(entrada))
+            except (OSError, IndexError):
+                continue
+    return filhos
+
+
+def _linha_comando(pid):
+    if psutil:
+        return " ".join(psutil.Process(pid).cmdline())
+    with open(f"/proc/{pid}/cmdline", "rb") as f:
+        return f.read().replace(b"\0", b" ").decode(errors="replace")
+
+
+def _cpu_rss(pid):
+    """(tempo de CPU acumulado em s, RSS em bytes) de um processo."""
+    if psutil:
+        p = psutil.Process(pid)
+        cpu = p.cpu_times()
+        return cpu.user + cpu.system, p.memory_info().rss
+    with open(f"/proc/{pid}/stat") as f:
+        campos = f.read().rsplit(")", 1)[1].split()
+    ticks = os.sysconf("SC_CLK_TCK")
+    cpu = (int(campos[11]) + int(campos[12])) / ticks
+    rss = int(campos[21]) * os.sysconf("SC_PAGE_SIZE")
+    return cpu, rss
+
+
+class MonitorRecursos(threading.Thread):
+    """Amostra CPU e RSS dos workers do uvicorn (ou do próprio processo mestre com --workers 1)."""
+
+    def __init__(self, pid_mestre, intervalo=0.5):
+        super().__init__(daemon=True)
+        self.pid_mestre = pid_mestre
+        self.intervalo = intervalo
+        self.parar = threading.Event()
+        self.inicio = {}
+        self.fim = {}
+        self.rss_pico = {}
+        self.rss_soma = {}
+        self.amostras = {}
+
+    def _pids(self):
+        # Ignora o processo de "resource tracker" do multiprocessing, que não atende requisições
+        pids = []
+        for pid in _filhos(self.pid_mestre):
+            try:
+                if "resource_tracker" not in _linha_comando(pid):
+                    pids.append(pid)
+            except OSError:
+                continue
+        return pids or [self.pid_mestre]
+
+    def run(self):
+        t0 = time.monotonic()
+        for pid in self._pids():
+            self.inicio[pid] = (t0, _cpu_rss(pid)[0])
+        while not self.parar.wait(self.intervalo):
+            agora = time.monotonic()
+            for pid in self._pids():
+                try:
+                    cpu, rss = _cpu_rss(pid)
+                except (OSError, ValueError):
+                    continue
+                self.inicio.setdefault(pid, (agora, cpu))
+                self.fim[pid] = (agora, cpu)
+                self.rss_pico[pid] = max(self.rss_pico.get(pid, 0), rss)
+                self.rss_soma[pid] = self.rss_soma.get(pid, 0) + rss
+                self.amostras[pid] = self.amostras.get(pid, 0) + 1
+
+    def relatorio(self):
+        self.parar.set()
+        self.join()
+        workers = {}
+        for pid, (t_fim, cpu_fim) in self.fim.items():
+            t_ini, cpu_ini = self.inicio[pid]
+            duracao = max(t_fim - t_ini, 1e-9)
+            workers[str(pid)] = {
+                "cpu_percentual": round((cpu_fim - cpu_ini) / duracao * 100, 1),
+                "rss_medio_mb": round(self.rss_soma[pid] / self.amostras[pid] / 2**20, 1),
+                "rss_pico_mb": round(self.rss_pico[pid] / 2**20, 1),
+            }
+        return workers
+
+
+# --- GERAÇÃO DE CARGA ---
+async def _executar_carga(url, sortear, concorrencia, duracao, taxa=None, timeout=60):
+    """Devolve a lista de amostras (rota, latência_s, sucesso) coletadas durante `duracao` segundos."""
+    amostras = []
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limites) as cliente:
+        inicio = time.perf_counter()
+        fim = inicio + duracao
+
+        async def disparar(chave, payload, agendado):
+            try:
+                resposta = await cliente.post(ROTAS[chave], json=payload)
+                sucesso = resposta.status_code < 400
+            except httpx.HTTPError:
+                sucesso = False
+            amostras.append((chave, time.perf_counter() - agendado, sucesso))
+
+        if taxa is None:
+            # Malha fechada: `concorrencia` clientes em laço
+            async def cliente_em_laco():
+                while time.perf_counter() < fim:
+                    chave, payload = sortear()
+                    await disparar(chave, payload, time.perf_counter())
+            await asyncio.gather(*(cliente_em_laco() for _ in range(concorrencia)))
+        else:
+            # Malha aberta: agenda na taxa pedida, limitando as requisições em voo
+            semaforo = asyncio.Semaphore(concorrencia)
+            tarefas = []
+
+            async def disparar_limitado(chave, payload, agendado):
+                async with semaforo:
+                    await disparar(chave, payload, agendado)
+
+            i = 0
+            while True:
+                agendado = inicio + i / taxa
+                if agendado >= fim:
+                    break
+                espera = agendado - time.perf_counter()
+                if espera > 0:
+                    await asyncio.sleep(espera)
+                chave, payload = sortear()
+                tarefas.append(asyncio.create_task(disparar_limitado(chave, payload, agendado)))
+                i += 1
+            await asyncio.gather(*tarefas)
+
+        duracao_real = time.perf_counter() - inicio
+    return amostras, duracao_real
+
+
+def resumir(amostras, duracao):
+    """Estatísticas por rota e no total: p50/p95/p99 (ms), vazão (req/s) e taxa de erro."""
+    def estatisticas(selecao):
+        if not selecao:
+            return {"requisicoes": 0}
+        latencias = np.array([a[1] for a in selecao]) * 1000
+        erros = sum(1 for a in selecao if not a[2])
+        p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+        return {
+            "requisicoes": len(selecao),
+            "vazao_rps": round(len(selecao) / duracao, 2),
+            "taxa_erro": round(erros / len(selecao), 4),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+            "max_ms": round(float(latencias.max()), 2),
+        }
+
+    resumo = {"total": estatisticas(amostras)}
+    for chave in ROTAS:
+        resumo[chave] = estatisticas([a for a in amostras if a[0] == chave])
+    return resumo
+
+
+def _ler_mix(texto):
+    mix = {}
+    for parte in texto.split(","):
+        chave, _, peso = parte.partition("=")
+        if chave.strip() not in ROTAS:
+            raise argparse.ArgumentTypeError(f"Rota desconhecida no mix: {chave} (use {', '.join(ROTAS)})")
+        mix[chave.strip()] = float(peso or 1)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga da API HSP Simulator")
+    parser.add_argument("--url", help="Usa um servidor já em execução em vez de subir o uvicorn local")
+    parser.add_argument("--workers", type=int, default=1, help="Workers do uvicorn local")
+    parser.add_argument("--concorrencia", type=int, default=8, help="Requisições simultâneas (clientes)")
+    parser.add_argument("--taxa", type=float, help="Requisições por segundo (malha aberta); omita para malha fechada")
+    parser.add_argument("--duracao", type=float, default=15.0, help="Duração da carga (s)")
+    parser.add_argument("--mix", type=_ler_mix, default=MIX_PADRAO, help="Pesos por rota, ex: calcular=0.7,arranjo=0.3")
+    parser.add_argument("--itens-arranjo", type=int, default=50, help="Placas por arranjo aleatório")
+    parser.add_argument("--latencia-provedor-ms", type=float, default=0.0, help="Latência simulada do provedor stub")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="Grava o relatório em JSON")
+    args = parser.parse_args(argv)
+
+    sortear = montar_gerador_payloads(random.Random(args.semente), args.mix, args.itens_arranjo)
+
+    servidor, monitor = None, None
+    url = args.url
+    if not url:
+        porta = _porta_livre()
+        servidor = iniciar_servidor(args.workers, porta, {"HSP_CARGA_LATENCIA_PROVEDOR_MS": str(args.latencia_provedor_ms)})
+        url = f"http://127.0.0.1:{porta}"
+        monitor = MonitorRecursos(servidor.pid)
+        monitor.start()
+
+    try:
+        amostras, duracao = asyncio.run(
+            _executar_carga(url, sortear, args.concorrencia, args.duracao, args.taxa)
+        )
+    finally:
+        workers = monitor.relatorio() if monitor else {}
+        if servidor:
+            servidor.terminate()
+            servidor.wait(timeout=30)
+
+    relatorio = {
+        "configuracao": {
+            "url": url, "workers": args.workers if servidor else None, "concorrencia": args.concorrencia,
+            "taxa": args.taxa, "duracao_s": round(duracao, 2), "mix": args.mix,
+            "itens_arranjo": args.itens_arranjo, "latencia_provedor_ms": args.latencia_provedor_ms,
+        },
+        "latencia": resumir(amostras, duracao),
+        "workers": workers,
+    }
+
+    print(f"\n{'ROTA':<10} | {'REQ':>6} | {'RPS':>8} | {'ERRO':>6} | {'P50 ms':>8} | {'P95 ms':>8} | {'P99 ms':>8}")
+    print("-" * 72)
+    for rota, r in relatorio["latencia"].items():
+        if r["requisicoes"]:
+            print(f"{rota:<10} | {r['requisicoes']:>6} | {r['vazao_rps']:>8.1f} | {r['taxa_erro']:>6.1%} | "
+                  f"{r['p50_ms']:>8.1f} | {r['p95_ms']:>8.1f} | {r['p99_ms']:>8.1f}")
+    for pid, w in workers.items():
+        print(f"worker {pid}: CPU {w['cpu_percentual']:.0f}% | RSS médio {w['rss_medio_mb']:.0f} MB | pico {w['rss_pico_mb']:.0f} MB")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+        print(f"\nRelatório gravado em {args.saida}")
+    return relatorio
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Relatório de tempo de inicialização (partida a frio) da API e do dashboard.
+
+Uso:
+    python -m benchmarks.inicializacao                  # 5 partidas a frio de cada alvo
+    python -m benchmarks.inicializacao --rodadas 10 --top 20 --saida inicializacao.json
+
+Cada rodada é um interpretador novo, como um container subindo ou um worker do uvicorn sendo
+recriado. São medidos:
+- processo_s: do disparo do interpretador até o alvo pronto (inclui a partida do Python);
+- importacao_s: só os imports do alvo;
+- primeira_requisicao_s (api): import + primeiro POST /calcular com o repositório de produção.
+O relatório lista também os pacotes que mais pesam no import (`python -X importtime`), agregados
+pelo pacote de topo, para guiar novos imports tardios.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARCADOR = "@@inicializacao "
+
+# Código executado no interpretador filho; a medição sai numa linha marcada no stdout
+# (os logs JSON da aplicação também vão para o stdout).
+_CODIGO_IMPORT = """
+import time, json
+_t0 = time.perf_counter()
+import {modulo}
+print({marcador!r} + json.dumps({{"importacao_s": time.perf_counter() - _t0}}), flush=True)
+"""
+
+_CODIGO_PRIMEIRA_REQUISICAO = """
+import time, json
+_t0 = time.perf_counter()
+import api
+_t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+TestClient(api.app).post("/calcular", json={{"latitude": -5.79, "longitude": -35.21}}).raise_for_status()
+print({marcador!r} + json.dumps({{"importacao_s": _t1 - _t0, "primeira_requisicao_s": time.perf_counter() - _t0}}), flush=True)
+"""
+
+ALVOS = {
+    "api": _CODIGO_IMPORT.format(modulo="api", marcador=MARCADOR),
+    "dashboard": _CODIGO_IMPORT.format(modulo="dashboard.visualizations", marcador=MARCADOR),
+    "api.primeira_requisicao": _CODIGO_PRIMEIRA_REQUISICAO.format(marcador=MARCADOR),
+}
+
+
+def partida_a_frio(alvo, importtime=False):
+    """
+    Executa o alvo num interpretador novo.
+
+    :return: (medições, saída do -X importtime ou "")
+    """
+    comando = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", ALVOS[alvo]]
+    inicio = time.perf_counter()
+    processo = subprocess.run(comando, cwd=RAIZ_PROJETO, capture_output=True, text=True)
+    duracao = time.perf_counter() - inicio
+    if processo.returncode != 0:
+        raise RuntimeError(f"Falha na partida de {alvo!r}:\n{processo.stderr[-2000:]}")
+
+    linha = next(l for l in processo.stdout.splitlines() if l.startswith(MARCADOR))
+    medicoes = json.loads(linha[len(MARCADOR):])
+    medicoes["processo_s"] = duracao
+    return medicoes, processo.stderr if importtime else ""
+
+
+def pacotes_mais_pesados(saida_importtime, top=15):
+    """
+    Soma o tempo próprio (self) de cada módulo do `-X importtime` por pacote de topo.
+
+    :return: lista de (pacote, segundos), do mais pesado para o mais leve.
+    """
+    por_pacote = {}
+    for linha in saida_importtime.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        proprio, _, modulo = linha[len("import time:"):].split("|", 2)
+        if not proprio.strip().isdigit():
+            continue  # cabeçalho
+        pacote = modulo.strip().split(".")[0]
+        por_pacote[pacote] = por_pacote.get(pacote, 0) + int(proprio) / 1e6
+    return sorted(por_pacote.items(), key=lambda kv: kv[1], reverse=True)[:top]
+
+
+def gerar_relatorio(alvos=None, rodadas=5, top=15):
+    """Mediana de `rodadas` partidas a frio por alvo, mais o ranking de pacotes da última delas."""
+    relatorio = {}
+    for alvo in alvos or ALVOS:
+        medicoes = [partida_a_frio(alvo)[0] for _ in range(rodadas - 1)]
+        ultima, importtime = partida_a_frio(alvo, importtime=True)
+        # A rodada com -X importtime é mais lenta: entra só no ranking, não nas medianas
+        if not medicoes:
+            medicoes = [ultima]
+        relatorio[alvo] = {
+            chave: statistics.median(m[chave] for m in medicoes) for chave in medicoes[0]
+        }
+        relatorio[alvo]["rodadas"] = len(medicoes)
+        relatorio[alvo]["pacotes"] = dict(pacotes_mais_pesados(importtime, top))
+    return relatorio
+
+
+def imprimir_relatorio(relatorio):
+    for alvo, dados in relatorio.items():
+        tempos = " | ".join(f"{chave} {dados[chave] * 1000:.0f} ms"
+                            for chave in ("processo_s", "importacao_s", "primeira_requisicao_s") if chave in dados)
+        print(f"{alvo:<25} {tempos}")
+        for pacote, segundos in dados["pacotes"].items():
+            print(f"    {pacote:<30} {segundos * 1000:>8.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Relatório de tempo de inicialização do HSP Simulator")
+    parser.add_argument("--alvo", action="append", choices=list(ALVOS), help="Alvo a medir (repetível). Padrão: todos")
+    parser.add_argument("--rodadas", type=int, default=5, help="Partidas a frio por alvo")
+    parser.add_argument("--top", type=int, default=15, help="Quantos pacotes listar por alvo")
+    parser.add_argument("--saida", help="Grava o relatório em JSON")
+    args = parser.parse_args(argv)
+
+    relatorio = gerar_relatorio(args.alvo, args.rodadas, args.top)
+    imprimir_relatorio(relatorio)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+        print(f"\nRelatório gravado em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+"""
+Benchmarks de memória (tracemalloc) da inicialização, dos caches dos provedores e dos lotes.
+
+Uso:
+    python -m benchmarks.memoria                      # mede e compara com a baseline
+    python -m benchmarks.memoria --salvar-baseline    # mede e grava uma nova baseline
+    python -m benchmarks.memoria --filtro provedores --componentes 10
+
+Para cada cenário são registrados:
+- pico_bytes: maior volume alocado durante o cenário (acima do que já estava alocado antes dele);
+- retido_bytes: o que continua alocado ao final, com o GC coletado (estado estacionário: o
+  provedor carregado, o cache cheio, o lote de resultados ainda referenciado);
+- componentes: bytes retidos por módulo do projeto que originou a alocação (ou pela biblioteca,
+  quando nenhum módulo do projeto está na pilha);
+- rss_bytes: crescimento do RSS do processo. O tracemalloc só enxerga o alocador do Python:
+  buffers do Arrow (o Parquet do Atlas INPE) ficam de fora dele e aparecem aqui e nos
+  componentes "externos" que o cenário declarar (ex: `DataFrame.memory_usage(deep=True)`).
+
+Cada cenário roda num processo novo (spawn), para que imports e caches de um não contaminem o
+outro. A baseline (benchmarks/baselines/memoria.json) fica ao lado da de tempo; crescer mais que
+`limiar` (padrão 10%) no pico ou no retido é regressão e o processo termina com código 1.
+Tudo roda offline: PVGIS e NASA POWER são substituídos por respostas sintéticas do mesmo formato.
+"""
+import os
+import gc
+import sys
+import argparse
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from benchmarks.performance import (
+    LAT, LON, RepositorioFixo, itens_arranjo, comparar_com_baseline, carregar_baseline, salvar_baseline
+)
+
+CAMINHO_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "memoria.json")
+LIMIAR_PADRAO = 0.10
+# Diferenças absolutas abaixo disso (256 KiB) são ruído do alocador, não regressão
+RUIDO_MINIMO_BYTES = 256 * 1024
+# Profundidade das pilhas guardadas pelo tracemalloc (necessária para atribuir o componente)
+PROFUNDIDADE_PILHA = 10
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+
+# nome -> (preparação, externos). A preparação roda fora da medição e devolve a função medida; o
+# valor retornado pela função medida é mantido vivo até o fim da medição (conta como retido).
+# `externos(resultado)` opcional devolve {componente: bytes} de memória que o tracemalloc não vê.
+BENCHMARKS_MEMORIA = {}
+
+
+def benchmark_memoria(nome, externos=None):
+    def registrar(preparacao):
+        BENCHMARKS_MEMORIA[nome] = (preparacao, externos)
+        return preparacao
+    return registrar
+
+
+def _bytes_dataframe(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+# --- INICIALIZAÇÃO ---
+def _externos_inicializacao(resultado):
+    from services.providers import InpeLabrenProvider
+    _, engine = resultado
+    return {"InpeLabrenProvider.df": _bytes_dataframe(p.df)
+            for p in engine.repository.providers if isinstance(p, InpeLabrenProvider)}
+
+
+@benchmark_memoria("inicializacao.api", externos=_externos_inicializacao)
+def _inicializacao_api():
+    def executar():
+        # Imports da API + repositório de produção + uma consulta ao Atlas INPE, como no primeiro request
+        from api import app, get_engine
+        engine = get_engine()
+        engine.repository.get_standardized_data(LAT, LON)
+        return app, engine
+    return executar
+
+
+@benchmark_memoria("provedores.inpe", externos=lambda p: {"InpeLabrenProvider.df": _bytes_dataframe(p.df)})
+def _inpe():
+    from services.providers import InpeLabrenProvider
+
+    def executar():
+        # O Atlas só é lido na primeira consulta
+        provider = InpeLabrenProvider()
+        provider.get_solar_data(LAT, LON)
+        return provider
+    return executar
+
+
+# --- CACHES DOS PROVEDORES NA CAPACIDADE MÁXIMA ---
+def _tmy_sintetico(latitude, longitude, **kwargs):
+    """Mesmo formato de `iotools.get_pvgis_tmy(map_variables=True)`: 8760 linhas horárias, 9 colunas."""
+    import numpy as np
+    import pandas as pd
+    indice = pd.date_range("1990-01-01", periods=8760, freq="h", tz="UTC")
+    rng = np.random.default_rng(abs(hash((latitude, longitude))) % 2**32)
+    colunas = ["temp_air", "relative_humidity", "ghi", "dni", "dhi", "ghi_infrared",
+               "wind_speed", "wind_direction", "pressure"]
+    return pd.DataFrame(rng.random((8760, len(colunas))), index=indice, columns=colunas), {}
+
+
+class _RespostaNasa:
+    meses = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC", "ANN"]
+    parametros = ["ALLSKY_SFC_SW_DWN", "ALLSKY_SFC_SW_DIFF", "T2M", "T2M_MAX", "RH2M", "WS10M"]
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"properties": {"parameter": {p: {m: 1.0 for m in self.meses} for p in self.parametros}}}
+
+
+def _coordenadas_distintas(n):
+    return [(round(-30 + i * 0.1, 4), round(-50 + i * 0.1, 4)) for i in range(n)]
+
+
+@benchmark_memoria("provedores.pvgis_cache_cheio")
+def _pvgis_cache_cheio():
+    from unittest import mock
+    from pvlib import iotools
+    from services.providers import PvgisProvider
+    mock.patch.object(iotools, "get_pvgis_tmy", _tmy_sintetico).start()
+    provider = PvgisProvider()
+    coordenadas = _coordenadas_distintas(PvgisProvider._get_cached_data.cache_info().maxsize)
+
+    def executar():
+        for lat, lon in coordenadas:
+            provider.get_solar_data(lat, lon)
+        return provider
+    return executar
+
+
+@benchmark_memoria("provedores.nasa_cache_cheio")
+def _nasa_cache_cheio():
+    import requests
+    from unittest import mock
+    from services.providers import NasaPowerProvider
+    mock.patch.object(requests, "get", lambda *a, **k: _RespostaNasa()).start()
+    provider = NasaPowerProvider()
+    coordenadas = _coordenadas_distintas(NasaPowerProvider._get_cached_data.cache_info().maxsize)
+
+    def executar():
+        for lat, lon in coordenadas:
+            provider.get_solar_data(lat, lon)
+        return provider
+    return executar
+
+
+# --- LOTES GRANDES ---
+# Caminho escalar: sob o tracemalloc cada item custa ~0,1 s, daí o lote menor que o colunar
+@benchmark_memoria("lote.arranjo_500_itens")
+def _arranjo():
+    from core.app import SolarEngine
+    engine = SolarEngine(repository=RepositorioFixo(), usar_pool_processos=False)
+    itens = itens_arranjo(500)
+    return lambda: engine.calcular_arranjo_completo(LAT, LON, itens)
+
+
+@benchmark_memoria("lote.arranjo_colunar_100k_itens")
+def _arranjo_colunar():
+    from core.app import SolarEngine, _parametros_para_colunas
+    engine = SolarEngine(repository=RepositorioFixo())
+    colunas = _parametros_para_colunas(itens_arranjo(100_000))
+    return lambda: engine.calcular_arranjo_colunar(LAT, LON, colunas)
+
+
+@benchmark_memoria("lote.api_arranjo_500_itens")
+def _api_arranjo():
+    from benchmarks.performance import _cliente_api
+    cliente = _cliente_api()
+    payload = {"latitude": LAT, "longitude": LON, "itens": itens_arranjo(500)}
+
+    def executar():
+        resposta = cliente.post("/calcular-arranjo", json=payload)
+        resposta.raise_for_status()
+        return resposta
+    return executar
+
+
+def componente(traceback):
+    """
+    Componente responsável por uma alocação: o módulo do projeto mais interno da pilha (ignorando
+    os próprios benchmarks, que só simulam entradas); sem nenhum, a biblioteca/pacote do frame mais interno.
+    """
+    for frame in reversed(traceback):
+        if frame.filename.startswith("<"):
+            continue
+        caminho = os.path.abspath(frame.filename)
+        if caminho.startswith(RAIZ_PROJETO + os.sep) and not caminho.startswith(DIRETORIO_BENCHMARKS + os.sep) \
+                and os.sep + "site-packages" + os.sep not in caminho:
+            return os.path.relpath(caminho, RAIZ_PROJETO).replace(os.sep, "/")
+
+    # Frames "<frozen importlib...>" só indicam que a alocação veio de um import: vale quem importou
+    caminhos = [f.filename for f in traceback if not f.filename.startswith("<")]
+    if not caminhos:
+        # Pilha inteira dentro do importlib (imports aninhados além de PROFUNDIDADE_PILHA)
+        return "<import>" if any("importlib" in f.filename for f in traceback) else "<interno>"
+    caminho = caminhos[-1]
+    if "site-packages" + os.sep in caminho:
+        return caminho.split("site-packages" + os.sep, 1)[1].split(os.sep, 1)[0].removesuffix(".py")
+    return "stdlib"
+
+
+def _bytes_por_componente(snapshot):
+    totais = {}
+    for trace in snapshot.traces:
+        chave = componente(trace.traceback)
+        totais[chave] = totais.get(chave, 0) + trace.size
+    return totais
+
+
+def _rss_bytes():
+    """RSS do processo corrente (Linux); None onde /proc não existe."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+
+def medir_memoria(funcao, externos=None):
+    """
+    Executa `funcao` sob o tracemalloc e devolve pico, retido, crescimento do RSS e bytes retidos
+    por componente. O que já estava alocado antes (imports da preparação, fixtures) é descontado.
+    """
+    ja_ativo = tracemalloc.is_tracing()
+    if not ja_ativo:
+        tracemalloc.start(PROFUNDIDADE_PILHA)
+    try:
+        gc.collect()
+        antes = tracemalloc.take_snapshot()
+        inicial, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        rss_inicial = _rss_bytes()
+
+        resultado = funcao()
+        gc.collect()
+        retido, pico = tracemalloc.get_traced_memory()
+        rss_final = _rss_bytes()
+        depois = tracemalloc.take_snapshot()
+        componentes = externos(resultado) if externos else {}
+        del resultado
+    finally:
+        if not ja_ativo:
+            tracemalloc.stop()
+
+    por_componente_antes = _bytes_por_componente(antes)
+    for nome, total in _bytes_por_componente(depois).items():
+        diferenca = total - por_componente_antes.get(nome, 0)
+        if diferenca > 0:
+            componentes[nome] = diferenca
+
+    return {
+        "pico_bytes": pico - inicial,
+        "retido_bytes": retido - inicial,
+        "rss_bytes": rss_final - rss_inicial if rss_inicial is not None else None,
+        "componentes": dict(sorted(componentes.items(), key=lambda kv: kv[1], reverse=True)),
+    }
+
+
+def _executar_isolado(nome):
+    # Roda no processo filho: o registro é reconstruído pelo import deste módulo
+    preparacao, externos = BENCHMARKS_MEMORIA[nome]
+    return medir_memoria(preparacao(), externos)
+
+
+def executar_benchmarks_memoria(filtro=None, max_componentes=5):
+    """Roda cada cenário registrado num processo novo e imprime pico, retido e maiores componentes."""
+    resultados = {}
+    for nome in BENCHMARKS_MEMORIA:
+        if filtro and filtro not in nome:
+            continue
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            resultado = pool.submit(_executar_isolado, nome).result()
+
+        # A baseline guarda apenas os maiores componentes, para manter o JSON legível
+        resultado["componentes"] = dict(list(resultado["componentes"].items())[:max_componentes])
+        resultados[nome] = resultado
+        rss = _mib(resultado["rss_bytes"]) if resultado["rss_bytes"] is not None else "n/d"
+        print(f"{nome:<35} pico {_mib(resultado['pico_bytes']):>10} | retido {_mib(resultado['retido_bytes']):>10}"
+              f" | RSS {rss:>10}")
+        for componente_nome, tamanho in resultado["componentes"].items():
+            print(f"    {componente_nome:<45} {_mib(tamanho):>9}")
+    return resultados
+
+
+def _mib(n_bytes):
+    return f"{n_bytes / 2**20:.2f} MiB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de memória do HSP Simulator")
+    parser.add_argument("--filtro", help="Roda apenas cenários cujo nome contém este texto")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_PADRAO, help="Fração de crescimento tolerada (0.1 = 10%%)")
+    parser.add_argument("--componentes", type=int, default=5, help="Quantos componentes reportar por cenário")
+    parser.add_argument("--baseline", default=CAMINHO_BASELINE, help="Arquivo JSON da baseline")
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava as medições como nova baseline")
+    args = parser.parse_args(argv)
+
+    resultados = executar_benchmarks_memoria(args.filtro, args.componentes)
+
+    if args.salvar_baseline:
+        salvar_baseline(resultados, args.baseline)
+        print(f"\nBaseline gravada em {args.baseline}")
+        return 0
+
+    baseline = carregar_baseline(args.baseline)
+    if not baseline:
+        print("\n[AVISO] Baseline inexistente: rode com --salvar-baseline para criá-la.")
+        return 0
+
+    regressoes = []
+    for chave in ("pico_bytes", "retido_bytes"):
+        regressoes += comparar_com_baseline(resultados, baseline, args.limiar, chave=chave, ruido_minimo=RUIDO_MINIMO_BYTES)
+    for r in regressoes:
+        print(f"[REGRESSÃO] {r['nome']} ({r['chave']}): {_mib(r['baseline'])} -> {_mib(r['atual'])} ({r['variacao']:+.0%})")
+    if regressoes:
+        return 1
+
+    print(f"\nNenhuma regressão de memória acima de {args.limiar:.0%} em relação à baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,424 @@
+"""
+Suíte de benchmarks de desempenho dos caminhos críticos do simulador.
+
+Uso:
+    python -m benchmarks.performance                      # mede e compara com a baseline
+    python -m benchmarks.performance --salvar-baseline    # mede e grava uma nova baseline
+    python -m benchmarks.performance --filtro arranjo --limiar 0.5
+
+A baseline (benchmarks/baselines/performance.json) guarda a mediana de cada benchmark.
+Um benchmark é considerado regressão quando fica mais de `limiar` (padrão 25%) mais lento
+que a baseline; nesse caso o processo termina com código 1 (útil em CI).
+Todos os benchmarks rodam offline: o repositório climatológico é substituído por dados fixos.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+from datetime import datetime
+from utils.profiler import perfilar
+
+CAMINHO_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "performance.json")
+LIMIAR_PADRAO = 0.25
+# Diferenças absolutas abaixo disso são ruído de medição, não regressão
+RUIDO_MINIMO_S = 50e-6
+
+LAT, LON = -5.8125, -35.1875
+DADOS_FIXOS = {
+    "hsp_global": [5.0, 5.2, 5.5, 4.8, 4.2, 3.9, 4.1, 4.7, 5.3, 5.8, 5.6, 5.1],
+    "hsp_diffuse": [1.2, 1.3, 1.4, 1.1, 1.0, 0.9, 1.0, 1.2, 1.3, 1.5, 1.4, 1.2],
+    "temp_max": [30.0] * 12,
+    "wind_speed": [2.0] * 12,
+}
+OBSTACULO = {
+    "altura_obstaculo": 4.0,
+    "distancia_obstaculo": 2.0,
+    "referencia_azimutal_obstaculo": 0.0,
+    "largura_obstaculo": 4.0,
+}
+
+# nome -> (preparação, repetições). A preparação roda fora da medição e devolve a função medida.
+BENCHMARKS = {}
+
+
+def benchmark(nome, repeticoes=20):
+    def registrar(preparacao):
+        BENCHMARKS[nome] = (preparacao, repeticoes)
+        return preparacao
+    return registrar
+
+
+class RepositorioFixo:
+    """Repositório sem rede: devolve sempre a mesma climatologia."""
+
+    def get_standardized_data(self, lat, lon):
+        return DADOS_FIXOS
+
+
+def itens_arranjo(n):
+    """Lote de `n` placas variadas; um terço delas com obstáculo."""
+    return [{
+        "id_placa": f"Placa_{i + 1:02d}",
+        "inclinacao_graus": 5 + (i * 7) % 40,
+        "azimute_graus": (i * 37) % 360,
+        "albedo_solo": 0.2,
+        "distancia_centro_modulo_chao": 0.5,
+        "tecnologia_celula": "TOPCON",
+        "is_bifacial": i % 2 == 0,
+        "comprimento_modulo": 2.278,
+        "largura_modulo": 1.134,
+        "orientacao": "Retrato" if i % 4 else "Paisagem",
+        "config_obstaculo": OBSTACULO if i % 3 == 0 else None,
+    } for i in range(n)]
+
+
+# --- MOTORES ---
+@benchmark("perez.sem_sombra", repeticoes=200)
+def _perez_sem_sombra():
+    from core.perez_engine import PerezEngine
+    engine = PerezEngine(LAT, is_bifacial=True, fator_bifacial=0.80, altura_instalacao=0.5)
+    return lambda: engine.calcular_hsp_corrigido_inc_azi(DADOS_FIXOS, 15, 0)
+
+
+@benchmark("perez.com_sombra", repeticoes=50)
+def _perez_com_sombra():
+    from core.perez_engine import PerezEngine
+    engine = PerezEngine(LAT, is_bifacial=True, fator_bifacial=0.80, altura_instalacao=0.5)
+    return lambda: engine.calcular_hsp_corrigido_inc_azi(DADOS_FIXOS, 15, 0, config_obstaculo=OBSTACULO)
+
+
+@benchmark("perez.com_sombra_frio", repeticoes=50)
+def _perez_com_sombra_frio():
+    from core import estagios
+    from core.perez_engine import PerezEngine
+    engine = PerezEngine(LAT, is_bifacial=True, fator_bifacial=0.80, altura_instalacao=0.5)
+
+    def executar():
+        estagios.limpar_caches()  # Sem estágios memorizados: geometria, rb e sombra do zero
+        return engine.calcular_hsp_corrigido_inc_azi(DADOS_FIXOS, 15, 0, config_obstaculo=OBSTACULO)
+    return executar
+
+
+@benchmark("perez.troca_albedo", repeticoes=200)
+def _perez_troca_albedo():
+    import itertools
+    from core.perez_engine import PerezEngine
+    albedos = itertools.cycle([0.15, 0.2, 0.25, 0.3])
+
+    def executar():
+        # Como no dashboard: um slider muda, geometria/rb/sombra vêm dos estágios memorizados
+        engine = PerezEngine(LAT, is_bifacial=True, fator_bifacial=0.80, albedo=next(albedos), altura_instalacao=0.5)
+        return engine.calcular_hsp_corrigido_inc_azi(DADOS_FIXOS, 15, 0, config_obstaculo=OBSTACULO)
+    return executar
+
+
+@benchmark("perez.diario_com_sombra", repeticoes=50)
+def _perez_diario_com_sombra():
+    from core.perez_engine import PerezEngine
+    engine = PerezEngine(LAT, is_bifacial=True, fator_bifacial=0.80, altura_instalacao=0.5, resolucao="diaria")
+    return lambda: engine.calcular_hsp_corrigido_inc_azi(DADOS_FIXOS, 15, 0, config_obstaculo=OBSTACULO)
+
+
+@benchmark("perez.perez1990_com_sombra", repeticoes=50)
+def _perez_1990_com_sombra():
+    from core.perez_engine import PerezEngine
+    engine = PerezEngine(LAT, is_bifacial=True, fator_bifacial=0.80, altura_instalacao=0.5, modelo_difusa="perez1990")
+    return lambda: engine.calcular_hsp_corrigido_inc_azi(DADOS_FIXOS, 15, 0, config_obstaculo=OBSTACULO)
+
+
+@benchmark("perez.horario_8760h_com_sombra", repeticoes=50)
+def _perez_horario_com_sombra():
+    import numpy as np
+    from core.perez_engine import PerezEngine
+    from core.solar_geometry import posicao_solar_utc
+    # Série TMY sintética (céu claro) no formato de PvgisProvider.get_hourly_data, sem rede
+    dia_ano = np.repeat(np.arange(1, 366), 24).astype(np.int16)
+    hora_utc = np.tile(np.arange(24), 365).astype(np.float32)
+    altitudes, _ = posicao_solar_utc(LAT, LON, dia_ano, hora_utc)
+    ghi = (750 * np.maximum(np.sin(np.radians(altitudes)), 0)).astype(np.float32)
+    serie = {"irradiancia_global": ghi, "irradiancia_difusa": ghi * np.float32(0.25),
+             "mes": np.repeat(np.arange(12), [24 * d for d in (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)]),
+             "dia_ano": dia_ano, "hora_utc": hora_utc, "longitude": LON}
+    engine = PerezEngine(LAT, is_bifacial=True, fator_bifacial=0.80, altura_instalacao=0.5, resolucao="horaria")
+    return lambda: engine.calcular_hsp_corrigido_inc_azi(serie, 15, 0, config_obstaculo=OBSTACULO)
+
+
+@benchmark("shadow.escalar_1000_amostras", repeticoes=20)
+def _shadow_escalar():
+    from core.shadow_engine import ShadowEngine
+    engine = ShadowEngine()
+    amostras = [(5 + (i % 80), (i * 7) % 360) for i in range(1000)]
+
+    def executar():
+        for altitude, azimute in amostras:
+            engine.estimar_perda_sombreamento(altitude, azimute, altura_instalacao_modulo=0.5, config_obstaculo=OBSTACULO)
+    return executar
+
+
+@benchmark("shadow.vetorizado_100k_amostras", repeticoes=20)
+def _shadow_vetorizado():
+    import numpy as np
+    from core.shadow_engine import ShadowEngine
+    engine = ShadowEngine()
+    altitudes = np.linspace(-10, 90, 100_000)
+    azimutes = np.linspace(0, 360, 100_000)
+    return lambda: engine.estimar_perda_sombreamento_vetorizado(
+        altitudes, azimutes, 0.5, 2.278, OBSTACULO["altura_obstaculo"], OBSTACULO["distancia_obstaculo"],
+        OBSTACULO["referencia_azimutal_obstaculo"], OBSTACULO["largura_obstaculo"]
+    )
+
+
+# --- PARTIDA A FRIO (interpretador novo a cada repetição) ---
+@benchmark("inicializacao.import_api", repeticoes=5)
+def _import_api():
+    from benchmarks.inicializacao import partida_a_frio
+    return lambda: partida_a_frio("api")
+
+
+@benchmark("inicializacao.import_dashboard", repeticoes=5)
+def _import_dashboard():
+    from benchmarks.inicializacao import partida_a_frio
+    return lambda: partida_a_frio("dashboard")
+
+
+# --- PROVEDOR INPE ---
+@benchmark("inpe.inicializacao", repeticoes=5)
+def _inpe_inicializacao():
+    from services.providers import InpeLabrenProvider
+    from services.providers.inpe_labren_provider import carregar_atlas
+
+    def executar():
+        # Leitura a frio do Atlas (o cache do processo é esvaziado a cada repetição)
+        carregar_atlas.cache_clear()
+        InpeLabrenProvider().get_solar_data(LAT, LON)
+    return executar
+
+
+@benchmark("inpe.consulta", repeticoes=50)
+def _inpe_consulta():
+    from services.providers import InpeLabrenProvider
+    provider = InpeLabrenProvider()
+    return lambda: provider.get_solar_data(LAT, LON)
+
+
+# --- LOTES ---
+def _preparar_arranjo(n):
+    from core.app import SolarEngine
+    engine = SolarEngine(repository=RepositorioFixo(), usar_pool_processos=False)
+    itens = itens_arranjo(n)
+    return lambda: engine.calcular_arranjo_completo(LAT, LON, itens)
+
+
+benchmark("arranjo.10_itens", repeticoes=20)(lambda: _preparar_arranjo(10))
+benchmark("arranjo.1k_itens", repeticoes=3)(lambda: _preparar_arranjo(1_000))
+benchmark("arranjo.10k_itens", repeticoes=1)(lambda: _preparar_arranjo(10_000))
+
+
+@benchmark("arranjo_colunar.10k_itens", repeticoes=5)
+def _arranjo_colunar():
+    from core.app import SolarEngine, _parametros_para_colunas
+    engine = SolarEngine(repository=RepositorioFixo())
+    colunas = _parametros_para_colunas(itens_arranjo(10_000))
+    return lambda: engine.calcular_arranjo_colunar(LAT, LON, colunas)
+
+
+def _preparar_varredura_rb(tabelado):
+    """rb de uma grade inclinação 0-90° × azimute 0-359° (passo de 1°, 32.760 orientações)."""
+    import numpy as np
+    from core.batch_engine import PerezEngineLote
+    lote = PerezEngineLote(LAT, rb_tabelado=tabelado)
+    inclinacoes, azimutes = (g.ravel() for g in np.meshgrid(np.arange(91.0), np.arange(360.0), indexing="ij"))
+    return lambda: lote.calcular_rb(inclinacoes, azimutes)
+
+
+benchmark("varredura.rb_exato_32k", repeticoes=20)(lambda: _preparar_varredura_rb(False))
+benchmark("varredura.rb_tabelado_32k", repeticoes=20)(lambda: _preparar_varredura_rb(True))
+
+
+@benchmark("cena.1k_modulos_60_obstaculos", repeticoes=5)
+def _cena():
+    """Telhado 40 x 25 módulos com 40 paredes, 10 caixas e 10 postes espalhados."""
+    import numpy as np
+    from core.cena import perdas_cena
+    rng = np.random.default_rng(0)
+    x, y = (g.ravel() for g in np.meshgrid(np.arange(40) * 1.2, np.arange(25) * -2.5))
+    modulos = {"x": x, "y": y, "altura_instalacao": np.full(x.size, 0.3), "dimensao": np.full(x.size, 2.278),
+               "largura": np.full(x.size, 1.134)}
+    cantos = rng.uniform([-5, -70], [55, 10], (60, 2))
+    obstaculos = (
+        [{"tipo": "parede", "inicio": tuple(c), "fim": tuple(c + rng.uniform(-4, 4, 2)), "altura": 2.0} for c in cantos[:40]]
+        + [{"tipo": "caixa", "centro": tuple(c), "largura": 2.0, "profundidade": 2.0, "altura": 3.0} for c in cantos[40:50]]
+        + [{"tipo": "poste", "centro": tuple(c), "diametro": 0.3, "altura": 8.0} for c in cantos[50:]]
+    )
+    return lambda: perdas_cena(LAT, modulos, obstaculos)
+
+
+@benchmark("cena.usina_10k_modulos_400_obstaculos", repeticoes=3)
+def _cena_usina():
+    """Usina 100 x 100 módulos (120 x 250 m) com obstáculos espalhados: o índice espacial descarta os distantes."""
+    import numpy as np
+    from core.cena import perdas_cena
+    rng = np.random.default_rng(0)
+    x, y = (g.ravel() for g in np.meshgrid(np.arange(100) * 1.2, np.arange(100) * -2.5))
+    modulos = {"x": x, "y": y, "altura_instalacao": np.full(x.size, 0.3), "dimensao": np.full(x.size, 2.278),
+               "largura": np.full(x.size, 1.134)}
+    cantos = rng.uniform([-10, -260], [130, 10], (400, 2))
+    obstaculos = (
+        [{"tipo": "parede", "inicio": tuple(c), "fim": tuple(c + rng.uniform(-4, 4, 2)), "altura": 2.0} for c in cantos[:250]]
+        + [{"tipo": "caixa", "centro": tuple(c), "largura": 2.0, "profundidade": 2.0, "altura": 3.0} for c in cantos[250:300]]
+        + [{"tipo": "poste", "centro": tuple(c), "diametro": 0.3, "altura": 8.0} for c in cantos[300:]]
+    )
+    return lambda: perdas_cena(LAT, modulos, obstaculos)
+
+
+# --- API (cliente em processo) ---
+def _cliente_api():
+    from fastapi.testclient import TestClient
+    from api import app, get_engine
+    from core.app import SolarEngine
+    app.dependency_overrides[get_engine] = lambda: SolarEngine(repository=RepositorioFixo(), usar_pool_processos=False)
+    return TestClient(app)
+
+
+@benchmark("api.calcular_100_requisicoes", repeticoes=5)
+def _api_calcular():
+    cliente = _cliente_api()
+    payload = {"latitude": LAT, "longitude": LON, "inclinacao_graus": 15, "azimute_graus": 0, "config_obstaculo": OBSTACULO}
+
+    def executar():
+        for _ in range(100):
+            cliente.post("/calcular", json=payload).raise_for_status()
+    return executar
+
+
+@benchmark("api.calcular_arranjo_100_itens", repeticoes=10)
+def _api_arranjo():
+    cliente = _cliente_api()
+    payload = {"latitude": LAT, "longitude": LON, "itens": itens_arranjo(100)}
+    return lambda: cliente.post("/calcular-arranjo", json=payload).raise_for_status()
+
+
+def medir(funcao, repeticoes, aquecimento=1):
+    """Executa `funcao` e devolve estatísticas do tempo de parede (segundos), com o GC desligado durante a medição."""
+    for _ in range(aquecimento):
+        funcao()
+
+    tempos = []
+    gc_ativo = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+    finally:
+        if gc_ativo:
+            gc.enable()
+
+    return {
+        "mediana_s": statistics.median(tempos),
+        "minimo_s": min(tempos),
+        "media_s": statistics.fmean(tempos),
+        "repeticoes": repeticoes,
+    }
+
+
+def executar_benchmarks(filtro=None, fator_repeticoes=1.0):
+    """Roda os benchmarks registrados (opcionalmente só os que contêm `filtro` no nome)."""
+    resultados = {}
+    for nome, (preparacao, repeticoes) in BENCHMARKS.items():
+        if filtro and filtro not in nome:
+            continue
+        funcao = preparacao()
+        repeticoes = max(1, int(repeticoes * fator_repeticoes))
+        # Benchmarks longos (uma repetição) não fazem aquecimento
+        resultados[nome] = medir(funcao, repeticoes, aquecimento=min(1, repeticoes - 1))
+        print(f"{nome:<35} {resultados[nome]['mediana_s'] * 1000:>10.3f} ms")
+    return resultados
+
+
+def comparar_com_baseline(resultados, baseline, limiar=LIMIAR_PADRAO, chave="mediana_s", ruido_minimo=RUIDO_MINIMO_S):
+    """
+    Compara as medições com a baseline.
+
+    :return: lista de dicts (nome, chave, baseline, atual, variacao) apenas dos benchmarks que regrediram.
+    """
+    regressoes = []
+    for nome, atual in resultados.items():
+        referencia = baseline.get(nome)
+        if not referencia:
+            continue
+        antes, depois = referencia[chave], atual[chave]
+        if depois > antes * (1 + limiar) and depois - antes > ruido_minimo:
+            regressoes.append({"nome": nome, "chave": chave, "baseline": antes, "atual": depois, "variacao": depois / antes - 1})
+    return regressoes
+
+
+def carregar_baseline(caminho=CAMINHO_BASELINE):
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f).get("resultados", {})
+
+
+def salvar_baseline(resultados, caminho=CAMINHO_BASELINE):
+    """Grava (mesclando com a baseline existente) as medições e a identificação da máquina."""
+    conteudo = {"resultados": {}}
+    if os.path.exists(caminho):
+        with open(caminho, "r", encoding="utf-8") as f:
+            conteudo = json.load(f)
+
+    conteudo["gerado_em"] = datetime.now().isoformat(timespec="seconds")
+    conteudo["maquina"] = {
+        "python": platform.python_version(),
+        "sistema": platform.platform(),
+        "processador": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+    conteudo.setdefault("resultados", {}).update(resultados)
+
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(conteudo, f, indent=2, ensure_ascii=False, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de desempenho do HSP Simulator")
+    parser.add_argument("--filtro", help="Roda apenas benchmarks cujo nome contém este texto")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_PADRAO, help="Fração de lentidão tolerada (0.25 = 25%%)")
+    parser.add_argument("--repeticoes", type=float, default=1.0, help="Multiplicador do número de repetições")
+    parser.add_argument("--baseline", default=CAMINHO_BASELINE, help="Arquivo JSON da baseline")
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava as medições como nova baseline")
+    parser.add_argument("--perfil", action="store_true", help="Grava um perfil (flamegraph) da execução em data/perfis/")
+    args = parser.parse_args(argv)
+
+    with perfilar("benchmarks.performance", ativo=args.perfil or None):
+        resultados = executar_benchmarks(args.filtro, args.repeticoes)
+
+    if args.salvar_baseline:
+        salvar_baseline(resultados, args.baseline)
+        print(f"\nBaseline gravada em {args.baseline}")
+        return 0
+
+    baseline = carregar_baseline(args.baseline)
+    if not baseline:
+        print("\n[AVISO] Baseline inexistente: rode com --salvar-baseline para criá-la.")
+        return 0
+
+    regressoes = comparar_com_baseline(resultados, baseline, args.limiar)
+    for r in regressoes:
+        print(f"[REGRESSÃO] {r['nome']}: {r['baseline'] * 1000:.3f} ms -> {r['atual'] * 1000:.3f} ms ({r['variacao']:+.0%})")
+    if regressoes:
+        return 1
+
+    print(f"\nNenhuma regressão acima de {args.limiar:.0%} em relação à baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
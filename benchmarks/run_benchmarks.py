@@ -2,6 +2,7 @@ from core.app import SolarEngine
 from services.deps import Dependencies
 from benchmarks.auditor import SolarAuditor
 from utils.exporter import SolarExporter
+from utils.profiler import perfilar
 
 # Inicializa o ecossistema oficial
 repo = Dependencies.get_solar_repository()
@@ -52,4 +53,6 @@ def main():
     print("="*60)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # HSP_PROFILING=1 grava um perfil da auditoria completa em data/perfis/
+    with perfilar("run_benchmarks"):
+        main()
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""
+API com provedores climatológicos substituídos por dados fixos, para testes de carga.
+
+    uvicorn benchmarks.servidor_stub:app --workers 2
+
+HSP_CARGA_LATENCIA_PROVEDOR_MS simula o tempo de resposta de um provedor remoto (padrão 0),
+útil para comparar configurações de cache.
+"""
+import os
+import time
+from api import app, get_engine
+from core.app import SolarEngine
+from benchmarks.performance import DADOS_FIXOS
+
+LATENCIA_PROVEDOR_S = float(os.getenv("HSP_CARGA_LATENCIA_PROVEDOR_MS", "0")) / 1000
+
+
+class RepositorioStub:
+    """Repositório sem rede: mesma climatologia para qualquer coordenada, com latência opcional."""
+
+    def get_standardized_data(self, lat, lon):
+        if LATENCIA_PROVEDOR_S:
+            time.sleep(LATENCIA_PROVEDOR_S)
+        return DADOS_FIXOS
+
+
+_engine = SolarEngine(repository=RepositorioStub())
+app.dependency_overrides[get_engine] = lambda: _engine
@@ -1,12 +1,61 @@
 import json
-from services.providers import NasaPowerProvider
+import numpy as np
 from services.solar_repository import SolarRepository
 from core.perez_engine import PerezEngine
+from core.perfil_horario import gerar_perfil_horario
+from core.batch_engine import PerezEngineLote, normalizar_colunas
+from core.shadow_engine import ShadowEngine
+from core.solar_geometry import HORAS_PADRAO
+from core.parallel import HSP_POOL_ATIVO, HSP_POOL_WORKERS, HSP_POOL_CHUNK, HSP_POOL_MIN_ITENS, mapear_em_chunks
 from utils.constants import CELL_TECHNOLOGY_REFERENCE
+from utils.metrics import LOTE_TAMANHO
+
+
+def _item_para_parametros(item):
+    """Converte um ItemArranjoRequest (ou dict equivalente) em um dict nativo, serializável entre processos."""
+    if hasattr(item, "model_dump"):
+        return item.model_dump()
+    return dict(item)
+
+
+def _parametros_para_colunas(parametros):
+    """Transpõe a lista de itens (dicts) para o formato colunar aceito pelo motor vetorizado."""
+    campos = ("id_placa", "inclinacao_graus", "azimute_graus", "albedo_solo", "distancia_centro_modulo_chao",
+              "tecnologia_celula", "is_bifacial", "comprimento_modulo", "largura_modulo", "orientacao")
+    colunas = {campo: [p.get(campo) for p in parametros] for campo in campos if parametros and campo in parametros[0]}
+
+    obstaculos = [p.get("config_obstaculo") or {} for p in parametros]
+    colunas["altura_obstaculo"] = [o.get("altura_obstaculo") if o else None for o in obstaculos]
+    colunas["distancia_obstaculo"] = [o.get("distancia_obstaculo", 1.0) for o in obstaculos]
+    colunas["referencia_azimutal_obstaculo"] = [o.get("referencia_azimutal_obstaculo", 0.0) for o in obstaculos]
+    colunas["largura_obstaculo"] = [o.get("largura_obstaculo", 10.0) for o in obstaculos]
+    return colunas
+
+
+def _calcular_chunk_arranjo(lat, lon, dados_clima, itens):
+    """
+    Worker do pool de processos: calcula um chunk de itens do arranjo.
+    Os dados climatológicos chegam UMA vez por chunk, evitando consultas ao repositório nos workers.
+    """
+    engine = SolarEngine(repository=None)
+    return [engine._calcular_item_arranjo(lat, lon, dados_clima, item) for item in itens]
+
 
 class SolarEngine:
-    def __init__(self, repository: SolarRepository):
+    def __init__(self, repository: SolarRepository, usar_pool_processos=HSP_POOL_ATIVO,
+                 max_workers=HSP_POOL_WORKERS, tamanho_chunk=HSP_POOL_CHUNK, min_itens_paralelo=HSP_POOL_MIN_ITENS):
+        """
+        :param repository: Repositório de dados climatológicos.
+        :param usar_pool_processos: Distribui lotes grandes entre núcleos (ProcessPoolExecutor).
+        :param max_workers: Tamanho do pool de processos (None = número de CPUs).
+        :param tamanho_chunk: Quantidade de itens enviada a cada worker por tarefa.
+        :param min_itens_paralelo: Lotes menores que isso rodam no próprio processo.
+        """
         self.repository = repository
+        self.usar_pool_processos = usar_pool_processos
+        self.max_workers = max_workers
+        self.tamanho_chunk = tamanho_chunk
+        self.min_itens_paralelo = min_itens_paralelo
     
     def calcular_projeto_solar(self,
             lat, lon, inclinacao, azimute, albedo=0.2, altura_instalacao=0.15, 
@@ -17,7 +66,10 @@ class SolarEngine:
             largura_modulo=1.134,
             dados_pre_carregados=None, 
             config_obstaculo=None, 
-            formato="dict"):
+            formato="dict",
+            resolucao="mensal",
+            modelo_difusa="simplificado",
+            rb_tabelado=False):
         """
         Função principal para cálculo de HSP (Horas de Sol Pleno) com suporte a ganho bifacial.
         
@@ -42,13 +94,25 @@ class SolarEngine:
             - 'largura_obstaculo': (float) Largura horizontal da face do objeto (m).
             Se None, assume-se que não há sombreamento por obstáculos próximos.
         :param formato: "dict" para retorno nativo, "json" para string formatada.
+        :param resolucao: "mensal" (dia representativo), "diaria" (365 dias agregados por mês),
+            "horaria" (série horária do PVGIS; `dados_pre_carregados`, se informado, deve ser a série horária)
+            ou "horaria_sintetica" (perfil horário gerado a partir da climatologia mensal).
+        :param modelo_difusa: "simplificado" (padrão) ou "perez1990" (tabela completa de coeficientes de Perez).
+        :param rb_tabelado: Modo rápido (só "mensal"): rb interpolado da tabela pré-calculada de core/tabela_rb.py.
         """
         
-        # 1. Obtém os dados climatológicos (HSP, temperatura, etc.)
+        # 1. Obtém os dados climatológicos (HSP, temperatura, etc.) ou a série horária
         if dados_pre_carregados is not None:
             dados_climatologicos = dados_pre_carregados
+        elif resolucao == "horaria":
+            dados_climatologicos = self.repository.get_hourly_data(lat=lat, lon=lon)
         else:
             dados_climatologicos = self.repository.get_standardized_data(lat=lat, lon=lon)
+
+        if resolucao == "horaria_sintetica":
+            # Perfil horário derivado das médias mensais (INPE/NASA não publicam séries horárias)
+            dados_climatologicos = gerar_perfil_horario(lat, lon, dados_climatologicos)
+            resolucao = "horaria"
         
         # 2. Configura o Método de Cálculo
         fator_bifacial = CELL_TECHNOLOGY_REFERENCE.get(tecnologia, {}).get("fator_conservador", 0.70)
@@ -61,7 +125,10 @@ class SolarEngine:
             altura_instalacao=altura_instalacao,
             largura_modulo=largura_modulo,
             comprimento_modulo=comprimento_modulo,
-            orientacao=orientacao
+            orientacao=orientacao,
+            resolucao=resolucao,
+            modelo_difusa=modelo_difusa,
+            rb_tabelado=rb_tabelado
         )
         
         # 3. Executa o cálculo
@@ -73,49 +140,190 @@ class SolarEngine:
         
         return resultado
     
-    def calcular_arranjo_completo(self, lat, lon, itens):
+    def calcular_arranjo_completo(self, lat, lon, itens, usar_pool_processos=None):
         """
         Lógica de processamento em lote movida do api.py para o Core.
+
+        :param usar_pool_processos: Sobrescreve a configuração da instância para esta chamada.
+            Com o pool ativo, os itens são divididos em chunks e processados em paralelo;
+            lotes pequenos continuam no próprio processo.
         """
         
         # 1. Busca e processa os dados da API Meteorológica apenas UMA VEZ para a coordenada global
         dados_cache_api = self.repository.get_standardized_data(lat, lon)
 
-        resultados = []
-
         # 2. Processa cada item usando sua própria configuração individual
-        for item in itens:
-
-            # Chama o core injetando os dados_pre_carregados e as configs do item
-            res = self.calcular_projeto_solar(
-                lat=lat,
-                lon=lon,
-                inclinacao=item.inclinacao_graus,
-                azimute=item.azimute_graus,
-                albedo=item.albedo_solo,
-                altura_instalacao=item.distancia_centro_modulo_chao,
-                tecnologia=item.tecnologia_celula,
-                is_bifacial=item.is_bifacial,
-                comprimento_modulo=item.comprimento_modulo,
-                largura_modulo=item.largura_modulo,
-                orientacao=item.orientacao,
-                dados_pre_carregados=dados_cache_api,
-                config_obstaculo=item.config_obstaculo.model_dump() if item.config_obstaculo else None
-            )
+        parametros = [_item_para_parametros(item) for item in itens]
+        LOTE_TAMANHO.observe(len(parametros), operacao="arranjo")
+
+        if usar_pool_processos is None:
+            usar_pool_processos = self.usar_pool_processos
+
+        if not usar_pool_processos:
+            return _calcular_chunk_arranjo(lat, lon, dados_cache_api, parametros)
+
+        return mapear_em_chunks(
+            _calcular_chunk_arranjo, parametros, lat, lon, dados_cache_api,
+            max_workers=self.max_workers,
+            tamanho_chunk=self.tamanho_chunk,
+            min_itens_paralelo=self.min_itens_paralelo
+        )
+
+    def calcular_arranjo_colunar(self, lat, lon, colunas, dados_pre_carregados=None, modelo_difusa="simplificado",
+                                 rb_tabelado=False, obstaculos=None):
+        """
+        Caminho vetorizado para arranjos grandes no formato colunar (um array por campo).
+        Evita a criação de um PerezEngine e de um dict por placa: todas as placas são
+        calculadas em operações NumPy sobre arrays.
+
+        :param colunas: dict campo -> lista/array/escalar (ver `normalizar_colunas`).
+        :param modelo_difusa: "simplificado" ou "perez1990" (ver core/modelo_perez.py).
+        :param rb_tabelado: rb pela tabela pré-calculada (core/tabela_rb.py), modo rápido para arranjos grandes.
+        :param obstaculos: Cena com vários obstáculos (paredes, caixas, postes) em metros locais (ver core/cena.py),
+            avaliada contra as posições `posicao_x`/`posicao_y` das placas.
+        :return: dict com 'id_placa' (N,), 'media', 'media_sem_sombra', 'perda_sombreamento' (N,)
+            e 'mensal', 'mensal_sem_sombra' (N, 12), todos como np.ndarray.
+        """
+        colunas = normalizar_colunas(colunas)
+        LOTE_TAMANHO.observe(len(colunas["id_placa"]), operacao="arranjo_colunar")
 
+        if dados_pre_carregados is not None:
+            dados_climatologicos = dados_pre_carregados
+        else:
+            dados_climatologicos = self.repository.get_standardized_data(lat, lon)
+
+        resultado = PerezEngineLote(lat, modelo_difusa=modelo_difusa, rb_tabelado=rb_tabelado).calcular(
+            dados_climatologicos, colunas, obstaculos)
+        return {"id_placa": colunas["id_placa"], **resultado}
+
+    def calcular_mapa_orientacao(self, lat, lon, inclinacoes, azimutes, albedo=0.2, altura_instalacao=0.15,
+                                 tecnologia="TOPCON", orientacao="Retrato", is_bifacial=True,
+                                 comprimento_modulo=2.278, largura_modulo=1.134,
+                                 dados_pre_carregados=None, config_obstaculo=None, rb_tabelado=False):
+        """
+        Varredura do espaço de projeto: HSP de todas as combinações inclinação × azimute
+        em uma única avaliação do motor vetorizado.
+
+        :param inclinacoes: Inclinações avaliadas (graus), eixo das linhas do mapa.
+        :param azimutes: Azimutes avaliados (graus, 0=Norte), eixo das colunas do mapa.
+        :param rb_tabelado: rb pela tabela pré-calculada (core/tabela_rb.py): modo rápido para grades finas.
+        :return: dict com 'inclinacoes' (T,), 'azimutes' (A,), 'media' e 'media_sem_sombra' (T, A)
+            e 'mensal', 'mensal_sem_sombra' (T, A, 12).
+        """
+        inclinacoes = np.asarray(inclinacoes, dtype=float)
+        azimutes = np.asarray(azimutes, dtype=float)
+        grade_inc, grade_azi = np.meshgrid(inclinacoes, azimutes, indexing="ij")
+
+        obstaculo = config_obstaculo or {}
+        colunas = {
+            "inclinacao_graus": grade_inc.ravel(),
+            "azimute_graus": grade_azi.ravel(),
+            "albedo_solo": albedo,
+            "distancia_centro_modulo_chao": altura_instalacao,
+            "tecnologia_celula": tecnologia,
+            "is_bifacial": is_bifacial,
+            "comprimento_modulo": comprimento_modulo,
+            "largura_modulo": largura_modulo,
+            "orientacao": orientacao,
+            **{campo: valor for campo, valor in obstaculo.items() if valor is not None},
+        }
+        res = self.calcular_arranjo_colunar(lat, lon, colunas, dados_pre_carregados, rb_tabelado=rb_tabelado)
+
+        forma = grade_inc.shape
+        return {
+            "inclinacoes": inclinacoes,
+            "azimutes": azimutes,
+            "media": res["media"].reshape(forma),
+            "media_sem_sombra": res["media_sem_sombra"].reshape(forma),
+            "mensal": res["mensal"].reshape(forma + (12,)),
+            "mensal_sem_sombra": res["mensal_sem_sombra"].reshape(forma + (12,)),
+        }
+
+    def calcular_matriz_sombreamento(self, lat, config_obstaculo, altura_instalacao=0.15, comprimento_modulo=2.278,
+                                     largura_modulo=1.134, orientacao="Retrato", horas=HORAS_PADRAO):
+        """
+        Matriz mês × horário da fração de radiação direta bloqueada pelo obstáculo.
+        Não depende dos dados climatológicos: apenas da latitude e da geometria (memorizada no ShadowEngine).
+
+        :param horas: Horas solares verdadeiras amostradas (12.0 = meio-dia solar).
+        :return: dict com 'horas' (H,), 'altitude_sol' e 'fracao_sombreada' (12, H) — NaN com o sol abaixo
+            do horizonte — e 'perda_media_mensal' (12,), a média diurna de cada mês (NaN se o sol não nasce).
+        """
+        horas, altitudes, perdas = ShadowEngine().calcular_matriz_perda(
+            lat, config_obstaculo,
+            altura_instalacao_modulo=altura_instalacao,
+            comprimento_modulo=comprimento_modulo,
+            largura_modulo=largura_modulo,
+            orientacao=orientacao,
+            horas=horas
+        )
+        # Média só das horas diurnas; meses sem sol (noite polar) ficam NaN, sem o aviso do np.nanmean
+        diurnas = (~np.isnan(perdas)).sum(axis=1)
+        perda_media = np.divide(np.nansum(perdas, axis=1), diurnas, out=np.full(len(perdas), np.nan), where=diurnas > 0)
+        return {
+            "horas": horas,
+            "altitude_sol": altitudes,
+            "fracao_sombreada": perdas,
+            "perda_media_mensal": perda_media,
+        }
+
+    def calcular_arranjo_compacto(self, lat, lon, itens, dados_pre_carregados=None, modelo_difusa="simplificado"):
+        """
+        Modo compacto do processamento em lote: usa o motor vetorizado, arredonda todas as séries
+        de uma vez (NumPy) e omite o bloco 'referencia' quando ele é idêntico ao 'real' (sem perda por sombra).
+        As séries mensais são devolvidas como np.ndarray, prontas para um encoder JSON com suporte a NumPy.
+        """
+        parametros = [_item_para_parametros(item) for item in itens]
+        res = self.calcular_arranjo_colunar(lat, lon, _parametros_para_colunas(parametros), dados_pre_carregados,
+                                            modelo_difusa=modelo_difusa)
+
+        mensal = np.round(res["mensal"], 3)
+        mensal_sem_sombra = np.round(res["mensal_sem_sombra"], 3)
+        media = np.round(res["media"], 3)
+        media_sem_sombra = np.round(res["media_sem_sombra"], 3)
+        sem_perda = (mensal == mensal_sem_sombra).all(axis=1)
+
+        resultados = []
+        for i, id_placa in enumerate(res["id_placa"].tolist()):
+            unidade = {"real": {"media": media[i], "mensal": mensal[i]}}
+            if not sem_perda[i]:
+                unidade["referencia"] = {"media_sem_sombra": media_sem_sombra[i], "mensal_sem_sombra": mensal_sem_sombra[i]}
             resultados.append({
-                "id_placa": item.id_placa,
-                "kWh/m²/dia": {
-                    "real": {
-                        "media": res["media"],
-                        "mensal": res["mensal"],
-                    },
-                    "referencia": {
-                        "media_sem_sombra": res["media_sem_sombra"],
-                        "mensal_sem_sombra": res["mensal_sem_sombra"],
-                    }
-                },
-                "perda_sombreamento_estimada": res["perda_sombreamento_estimada"]
+                "id_placa": id_placa,
+                "kWh/m²/dia": unidade,
+                "perda_sombreamento_estimada": f"{res['perda_sombreamento'][i]:.1f}%" if parametros[i].get("config_obstaculo") else "0%"
             })
+        return resultados
 
-        return resultados
\ No newline at end of file
+    def _calcular_item_arranjo(self, lat, lon, dados_clima, item):
+        """Calcula um único item do arranjo (dict de parâmetros) no formato de resposta da API."""
+        res = self.calcular_projeto_solar(
+            lat=lat,
+            lon=lon,
+            inclinacao=item["inclinacao_graus"],
+            azimute=item["azimute_graus"],
+            albedo=item["albedo_solo"],
+            altura_instalacao=item["distancia_centro_modulo_chao"],
+            tecnologia=item["tecnologia_celula"],
+            is_bifacial=item["is_bifacial"],
+            comprimento_modulo=item["comprimento_modulo"],
+            largura_modulo=item["largura_modulo"],
+            orientacao=item["orientacao"],
+            dados_pre_carregados=dados_clima,
+            config_obstaculo=item.get("config_obstaculo") or None
+        )
+
+        return {
+            "id_placa": item["id_placa"],
+            "kWh/m²/dia": {
+                "real": {
+                    "media": res["media"],
+                    "mensal": res["mensal"],
+                },
+                "referencia": {
+                    "media_sem_sombra": res["media_sem_sombra"],
+                    "mensal_sem_sombra": res["mensal_sem_sombra"],
+                }
+            },
+            "perda_sombreamento_estimada": res["perda_sombreamento_estimada"]
+        }
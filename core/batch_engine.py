@@ -0,0 +1,238 @@
+import numpy as np
+from core import tabela_rb
+from core.cena import perdas_cena
+from core.shadow_engine import ShadowEngine
+from core.solar_geometry import DIAS_REPRESENTATIVOS, declinacao_solar, angulo_por_do_sol, posicao_solar, fator_rb
+from core.modelo_perez import coeficientes_perez_diarios, coeficientes_simplificados, validar_modelo_difusa
+from utils.constants import CELL_TECHNOLOGY_REFERENCE
+
+# Valores padrão de cada coluna (mesmos de ConfigTecnicaBase)
+COLUNAS_PADRAO = {
+    "albedo_solo": 0.2,
+    "distancia_centro_modulo_chao": 0.15,
+    "tecnologia_celula": "TOPCON",
+    "is_bifacial": True,
+    "comprimento_modulo": 2.278,
+    "largura_modulo": 1.134,
+    "orientacao": "Retrato",
+    "altura_obstaculo": np.nan,
+    "distancia_obstaculo": 1.0,
+    "referencia_azimutal_obstaculo": 0.0,
+    "largura_obstaculo": 10.0,
+    "posicao_x": 0.0,
+    "posicao_y": 0.0,
+}
+COLUNAS_OBRIGATORIAS = ("inclinacao_graus", "azimute_graus")
+COLUNAS_NUMERICAS = (
+    "inclinacao_graus", "azimute_graus", "albedo_solo", "distancia_centro_modulo_chao",
+    "comprimento_modulo", "largura_modulo", "altura_obstaculo", "distancia_obstaculo",
+    "referencia_azimutal_obstaculo", "largura_obstaculo", "posicao_x", "posicao_y",
+)
+
+
+def normalizar_colunas(colunas):
+    """
+    Validação em bloco do formato colunar (struct-of-arrays).
+    Escalares são replicados para todas as placas; `None`/NaN em `altura_obstaculo` indica placa sem obstáculo.
+
+    :param colunas: dict campo -> lista/array/escalar.
+    :return: dict campo -> np.ndarray, todos com o mesmo comprimento N.
+    :raises ValueError: Colunas obrigatórias ausentes, comprimentos divergentes ou valores não numéricos.
+    """
+    faltantes = [c for c in COLUNAS_OBRIGATORIAS if colunas.get(c) is None]
+    if faltantes:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltantes)}")
+
+    n = len(np.atleast_1d(colunas["inclinacao_graus"]))
+    normalizadas = {}
+
+    for campo in COLUNAS_OBRIGATORIAS + tuple(COLUNAS_PADRAO):
+        valor = colunas.get(campo)
+        if valor is None:
+            valor = COLUNAS_PADRAO[campo]
+
+        if campo in COLUNAS_NUMERICAS:
+            if isinstance(valor, (list, tuple)):
+                valor = [np.nan if v is None else v for v in valor]
+            try:
+                array = np.asarray(valor, dtype=float)
+            except (TypeError, ValueError):
+                raise ValueError(f"Coluna '{campo}' contém valores não numéricos.")
+        elif campo == "is_bifacial":
+            array = np.asarray(valor, dtype=bool)
+        else:
+            array = np.asarray(valor, dtype=str)
+
+        if array.ndim == 0:
+            array = np.full(n, array.item(), dtype=array.dtype)
+        elif array.shape != (n,):
+            raise ValueError(f"Coluna '{campo}' tem {array.size} valores; esperado {n}.")
+        normalizadas[campo] = array
+
+    if "id_placa" in colunas and colunas["id_placa"] is not None:
+        ids = np.asarray(colunas["id_placa"], dtype=str)
+        if ids.shape != (n,):
+            raise ValueError(f"Coluna 'id_placa' tem {ids.size} valores; esperado {n}.")
+        normalizadas["id_placa"] = ids
+    else:
+        normalizadas["id_placa"] = np.array([f"Placa_{i + 1:02d}" for i in range(n)])
+
+    return normalizadas
+
+
+def fatores_bifaciais(tecnologias):
+    """Mapeia a coluna de tecnologias para o fator bifacial conservador (0.70 se desconhecida)."""
+    tecnologias = np.asarray(tecnologias, dtype=str)
+    fatores = np.full(tecnologias.shape, 0.70)
+    for chave, ref in CELL_TECHNOLOGY_REFERENCE.items():
+        fatores[tecnologias == chave] = ref["fator_conservador"]
+    return fatores
+
+
+class PerezEngineLote:
+    """
+    Versão vetorizada do PerezEngine: calcula N módulos de uma mesma coordenada em operações NumPy,
+    reproduzindo a física de `PerezEngine.calcular_hsp_corrigido_inc_azi` (mensal, dia representativo).
+    """
+
+    def __init__(self, lat, amostras_sombra=100, tamanho_bloco=1024, modelo_difusa="simplificado", rb_tabelado=False):
+        """
+        :param lat: Latitude em graus decimais.
+        :param amostras_sombra: Pontos entre nascer e pôr do sol usados na estimativa de sombra.
+        :param tamanho_bloco: Módulos processados por vez na etapa de sombra (limita o uso de memória).
+        :param modelo_difusa: "simplificado" ou "perez1990" (ver core/modelo_perez.py).
+        :param rb_tabelado: Modo rápido para varreduras grandes: rb pela tabela pré-calculada
+            (core/tabela_rb.py) em vez da fórmula completa, com erro absoluto <= ERRO_MAXIMO_RB.
+        """
+        self.modelo_difusa = validar_modelo_difusa(modelo_difusa)
+        self.rb_tabelado = rb_tabelado
+        self.lat_deg = lat
+        self.lat_rad = np.radians(lat)
+        self.tamanho_bloco = tamanho_bloco
+        self.shadow_engine = ShadowEngine()
+
+        # Geometria solar dos 12 dias representativos (depende apenas da latitude)
+        self.delta = declinacao_solar(DIAS_REPRESENTATIVOS)
+        self.ws = angulo_por_do_sol(self.lat_rad, self.delta)
+        frac = np.linspace(-1, 1, amostras_sombra)
+        self.omega = self.ws[:, None] * frac[None, :]
+        self.altitudes, self.azimutes = posicao_solar(self.lat_rad, self.delta[:, None], self.omega)
+
+    def calcular_rb(self, inclinacao_deg, azimute_deg):
+        """rb para cada (módulo, mês): shape (N, 12)."""
+        if self.rb_tabelado:
+            return tabela_rb.rb_tabelado(self.lat_deg, inclinacao_deg, azimute_deg)
+        beta = np.radians(np.asarray(inclinacao_deg, dtype=float))[:, None]
+        gamma = np.radians(np.asarray(azimute_deg, dtype=float))[:, None]
+        return fator_rb(self.lat_rad, self.delta[None, :], self.ws[None, :], beta, gamma)
+
+    def calcular_perdas_sombra(self, altura_instalacao, dimensao_percorrida, altura_obstaculo,
+                               distancia_obstaculo, referencia_azimutal_obstaculo, largura_obstaculo):
+        """
+        Fração média de perda de radiação direta por (módulo, mês): shape (N, 12).
+        Módulos com `altura_obstaculo` NaN não têm obstáculo (perda zero).
+        """
+        n = len(altura_instalacao)
+        perdas = np.zeros((n, 12))
+        tem_obstaculo = ~np.isnan(altura_obstaculo)
+        indices = np.flatnonzero(tem_obstaculo)
+
+        for inicio in range(0, len(indices), self.tamanho_bloco):
+            bloco = indices[inicio:inicio + self.tamanho_bloco]
+            col = lambda v: np.asarray(v, dtype=float)[bloco][:, None, None]
+            perda_amostras = self.shadow_engine.estimar_perda_sombreamento_vetorizado(
+                self.altitudes[None], self.azimutes[None],
+                altura_instalacao_modulo=col(altura_instalacao),
+                dimensao_percorrida=col(dimensao_percorrida),
+                altura_obstaculo=col(altura_obstaculo),
+                distancia_obstaculo=col(distancia_obstaculo),
+                referencia_azimutal_obstaculo=col(referencia_azimutal_obstaculo),
+                largura_obstaculo=col(largura_obstaculo)
+            )
+            perdas[bloco] = perda_amostras.mean(axis=2)
+
+        return perdas
+
+    def calcular_irradiancia(self, gh, dh, rb, beta, albedo, is_bifacial, fator_bifacial, altura_instalacao,
+                             dimensao_referencia):
+        """
+        Irradiação diária total (frontal + traseira) por (módulo, mês).
+        `gh`/`dh` têm shape (12,); parâmetros dos módulos têm shape (N,) e `rb` (N, 12).
+        """
+        col = lambda v: np.asarray(v, dtype=float)[:, None]
+        cos_b, sin_b = np.cos(beta)[:, None], np.sin(beta)[:, None]
+        albedo = col(albedo)
+
+        # --- FACE FRONTAL ---
+        rb_front = np.maximum(0, rb)
+        # F1/F2 dependem só do clima de cada mês: shape (12,), comum a todos os módulos
+        if self.modelo_difusa == "perez1990":
+            f1, f2 = coeficientes_perez_diarios(gh, dh, self.lat_rad, self.delta, self.ws, DIAS_REPRESENTATIVOS)
+        else:
+            f1, f2 = coeficientes_simplificados(gh, dh)
+        h_diff_front = dh * ((1 - f1) * ((1 + cos_b) / 2) + f1 * rb_front + f2 * sin_b)
+        h_refl_front = gh * albedo * (1 - cos_b) / 2
+        h_beam_front = (gh - dh) * rb_front
+        h_total = h_beam_front + h_diff_front + h_refl_front
+
+        # --- FACE TRASEIRA ---
+        h_beam_rear = (gh - dh) * np.maximum(0, -rb)
+        h_diff_rear = dh * (1 - cos_b) / 2
+        ratio = col(altura_instalacao) / col(dimensao_referencia)
+        vf_ground = ratio / np.sqrt(ratio**2 + 1)
+        vf_tilt = (1 - cos_b) / 2
+        vf_final = np.clip(vf_ground + vf_tilt, 0, 1)
+        h_refl_rear = gh * albedo * vf_final * 0.95
+        h_rear = (h_beam_rear + h_diff_rear + h_refl_rear) * col(fator_bifacial)
+
+        h_total = h_total + np.where(np.asarray(is_bifacial, dtype=bool)[:, None], h_rear, 0.0)
+        return np.maximum(0, h_total)
+
+    def calcular(self, dados, colunas, obstaculos=None):
+        """
+        Calcula o HSP de todos os módulos descritos em `colunas` (saída de `normalizar_colunas`).
+
+        :param obstaculos: Cena com vários obstáculos (paredes, caixas, postes) em coordenadas locais,
+            ver core/cena.py; os módulos ficam em (`posicao_x`, `posicao_y`). Substitui o obstáculo por placa.
+
+        :return: dict de arrays: 'mensal' e 'mensal_sem_sombra' (N, 12), 'media', 'media_sem_sombra'
+            e 'perda_sombreamento' (N,) — a perda em percentual numérico (0 a 100).
+        """
+        gh = np.asarray(dados["hsp_global"][:12], dtype=float)
+        dh = np.asarray(dados["hsp_diffuse"][:12], dtype=float)
+
+        retrato = colunas["orientacao"] == "Retrato"
+        dimensao = np.where(retrato, colunas["comprimento_modulo"], colunas["largura_modulo"])
+        beta = np.radians(colunas["inclinacao_graus"])
+        fator_bifacial = fatores_bifaciais(colunas["tecnologia_celula"])
+
+        rb = self.calcular_rb(colunas["inclinacao_graus"], colunas["azimute_graus"])
+        if obstaculos:
+            if not np.isnan(colunas["altura_obstaculo"]).all():
+                raise ValueError("Use a cena de obstáculos ou o obstáculo por placa, não os dois.")
+            perdas = perdas_cena(self.lat_deg, {
+                "x": colunas["posicao_x"], "y": colunas["posicao_y"],
+                "altura_instalacao": colunas["distancia_centro_modulo_chao"], "dimensao": dimensao,
+                "largura": np.where(retrato, colunas["largura_modulo"], colunas["comprimento_modulo"]),
+            }, obstaculos)
+        else:
+            perdas = self.calcular_perdas_sombra(
+                colunas["distancia_centro_modulo_chao"], dimensao, colunas["altura_obstaculo"],
+                colunas["distancia_obstaculo"], colunas["referencia_azimutal_obstaculo"], colunas["largura_obstaculo"]
+            )
+
+        argumentos = dict(
+            beta=beta, albedo=colunas["albedo_solo"], is_bifacial=colunas["is_bifacial"],
+            fator_bifacial=fator_bifacial, altura_instalacao=colunas["distancia_centro_modulo_chao"],
+            dimensao_referencia=dimensao
+        )
+        bruto = self.calcular_irradiancia(gh, dh, rb, **argumentos)
+        liquido = self.calcular_irradiancia(gh, dh, rb * (1 - perdas), **argumentos)
+
+        return {
+            "mensal": liquido,
+            "mensal_sem_sombra": bruto,
+            "media": liquido.mean(axis=1),
+            "media_sem_sombra": bruto.mean(axis=1),
+            "perda_sombreamento": perdas.mean(axis=1) * 100,
+        }
@@ -0,0 +1,361 @@
+"""
+Cenas com vários obstáculos (paredes, caixas e postes) em coordenadas locais.
+
+Sistema local em metros: x para leste e y para norte (azimute 0 = norte, sentido horário, como no
+resto do projeto). Cada módulo é um ponto — a borda do módulo, como em `distancia_obstaculo` — com a
+altura de instalação, a dimensão percorrida pela sombra (comprimento em Retrato, largura em Paisagem)
+e a dimensão lateral (a outra).
+
+Obstáculos (dicts):
+- {"tipo": "parede", "inicio": (x, y), "fim": (x, y), "altura": h}
+- {"tipo": "caixa", "centro": (x, y), "largura": lx, "profundidade": ly, "rotacao": graus, "altura": h}
+  (caixa d'água, casa de máquinas): as quatro faces entram como paredes; `rotacao` gira a caixa no
+  sentido horário a partir dos eixos leste (largura) e norte (profundidade).
+- {"tipo": "poste", "centro": (x, y), "diametro": d, "altura": h}
+
+Para cada amostra do sol (altitude a, azimute z), um raio sai do módulo na direção do sol. A distância t
+até o primeiro ponto atingido do obstáculo e o comprimento da sombra (h - altura do módulo) / tan(a)
+dão a penetração (comprimento - t) / dimensão. Paredes e caixas cobrem toda a largura do módulo; a
+faixa de sombra de um poste cobre só diâmetro / dimensão lateral. Todas as sombras de um instante
+entram pela borda voltada para o sol, então a união por amostra é o máximo entre os obstáculos —
+somar as perdas contaria duas vezes a área em que as sombras se sobrepõem. Amostras com o sol abaixo
+de ALTITUDE_MINIMA_SOMBRA não contam como sombra: a direta ali é desprezível e a sombra, sem limite
+de comprimento.
+
+Diferenças em relação ao modelo relativo (ShadowEngine / `config_obstaculo`), que dão perdas menores
+para o mesmo obstáculo (ver tests/unit/test_cena.py):
+- o ShadowEngine compara o comprimento da sombra com a distância perpendicular `distancia_obstaculo`
+  (d); aqui a distância é medida ao longo do raio, d / cos(z - azimute do obstáculo) para uma parede
+  frontal, e o sol oblíquo penetra menos;
+- o ShadowEngine conta o sol abaixo do horizonte como perda total; aqui, o sol abaixo de
+  ALTITUDE_MINIMA_SOMBRA não sombreia.
+Por isso /calcular-arranjo-cena e /calcular-arranjo-colunar não coincidem para a mesma parede
+(a -23,5°, parede de 3 m a 2 m ao norte com 4 m de largura: junho perde 0,241 aqui e 0,302 lá).
+
+Antes do cálculo, dois filtros baratos descartam os pares módulo × obstáculo que nunca sombreiam:
+1. índice espacial (grade uniforme): com o sol acima de ALTITUDE_MINIMA_SOMBRA, a sombra de um obstáculo
+   de altura efetiva h alcança no máximo h / tan(ALTITUDE_MINIMA_SOMBRA), e só do lado oposto ao sol;
+   só os módulos nas células que a caixa envolvente do obstáculo, expandida por esse alcance em cada
+   direção, toca formam pares com ele;
+2. teste geométrico: o obstáculo ocupa um intervalo de azimutes visto do módulo e só projeta sombra até
+   ele se o sol passar por esse intervalo abaixo da elevação do topo do obstáculo (atan(h / distância mínima)).
+Os dois são exatos (não mudam o resultado); o índice mantém o custo proporcional aos pares próximos,
+e não a módulos × obstáculos, em telhados e usinas grandes.
+"""
+import numpy as np
+from functools import lru_cache
+from core import estagios
+from core.solar_geometry import _somente_leitura
+from utils.metrics import REGISTRO, CENA_PARES
+
+TIPOS_OBSTACULO = ("parede", "caixa", "poste")
+# Faixas de azimute do envelope de altitudes (duas voltas: intervalos que cruzam o norte)
+FAIXAS_AZIMUTE = 360
+# Sol mais baixo que projeta sombra (graus); limita o alcance da sombra a ~28,6 x a altura efetiva
+ALTITUDE_MINIMA_SOMBRA = 2.0
+# Lado das células do índice espacial (m)
+TAMANHO_CELULA = 10.0
+
+
+def decompor_obstaculos(obstaculos):
+    """
+    Converte a lista de obstáculos em primitivas vetorizáveis.
+    :return: (segmentos (K, 5): ax, ay, bx, by, altura; circulos (C, 4): cx, cy, raio, altura).
+    :raises ValueError: Tipo desconhecido ou campos ausentes.
+    """
+    segmentos, circulos = [], []
+    for i, obstaculo in enumerate(obstaculos):
+        tipo = obstaculo.get("tipo", "parede")
+        try:
+            altura = float(obstaculo["altura"])
+            if tipo == "parede":
+                (ax, ay), (bx, by) = obstaculo["inicio"], obstaculo["fim"]
+                segmentos.append((ax, ay, bx, by, altura))
+            elif tipo == "caixa":
+                cx, cy = obstaculo["centro"]
+                meia_l, meia_p = float(obstaculo["largura"]) / 2, float(obstaculo["profundidade"]) / 2
+                rotacao = np.radians(float(obstaculo.get("rotacao", 0.0)))
+                # Rotação horária (azimute): leste -> sul, norte -> leste
+                cos_r, sin_r = np.cos(rotacao), np.sin(rotacao)
+                cantos = [(cx + dx * cos_r + dy * sin_r, cy - dx * sin_r + dy * cos_r)
+                          for dx, dy in ((-meia_l, -meia_p), (meia_l, -meia_p), (meia_l, meia_p), (-meia_l, meia_p))]
+                for (ax, ay), (bx, by) in zip(cantos, cantos[1:] + cantos[:1]):
+                    segmentos.append((ax, ay, bx, by, altura))
+            elif tipo == "poste":
+                cx, cy = obstaculo["centro"]
+                circulos.append((cx, cy, float(obstaculo["diametro"]) / 2, altura))
+            else:
+                raise ValueError(f"Obstáculo {i}: tipo não suportado {tipo!r} (use {', '.join(TIPOS_OBSTACULO)}).")
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Obstáculo {i} ({tipo}) incompleto ou inválido: {e}")
+
+    return (np.asarray(segmentos, dtype=float).reshape(-1, 5),
+            np.asarray(circulos, dtype=float).reshape(-1, 4))
+
+
+@lru_cache(maxsize=256)
+def envelope_altitude(lat, resolucao="mensal"):
+    """
+    Menor altitude solar acima de ALTITUDE_MINIMA_SOMBRA (graus) das amostras de cada faixa de 1° de azimute, organizada como
+    tabela de mínimos por intervalo (sparse table): nível j guarda o mínimo de 2**j faixas consecutivas.
+    :return: array (níveis, 2 * FAIXAS_AZIMUTE) somente leitura; inf nas faixas que o sol nunca visita.
+    """
+    _, _, altitudes, azimutes = estagios.geometria(lat, resolucao)
+    acima = altitudes > ALTITUDE_MINIMA_SOMBRA
+    minimos = np.full(FAIXAS_AZIMUTE, np.inf)
+    np.minimum.at(minimos, np.floor(azimutes[acima]).astype(int) % FAIXAS_AZIMUTE, altitudes[acima])
+
+    niveis = [np.concatenate([minimos, minimos])]
+    largura = 1
+    while 2 * largura <= 2 * FAIXAS_AZIMUTE:
+        anterior = niveis[-1]
+        niveis.append(np.minimum(anterior, np.concatenate([anterior[largura:], np.full(largura, np.inf)])))
+        largura *= 2
+    return _somente_leitura(np.stack(niveis))[0]
+
+
+def _altitude_minima(envelope, inicio_deg, largura_deg):
+    """Menor altitude do sol nas faixas do intervalo [inicio, inicio + largura] (graus), em O(1) por consulta."""
+    primeira = np.floor(np.mod(inicio_deg, 360)).astype(int)
+    ultima = np.floor(np.mod(inicio_deg, 360) + np.minimum(largura_deg, 359.999)).astype(int)
+    nivel = np.floor(np.log2(ultima - primeira + 1)).astype(int)
+    return np.minimum(envelope[nivel, primeira], envelope[nivel, ultima - (1 << nivel) + 1])
+
+
+def _azimute(dx, dy):
+    return np.mod(np.degrees(np.arctan2(dx, dy)), 360)
+
+
+def _limites_segmentos(px, py, segmentos):
+    """Intervalo de azimutes (início, largura) e distância mínima de cada par (posição do módulo, segmento)."""
+    ax, ay, bx, by = (segmentos[:, i] - p for i, p in ((0, px), (1, py), (2, px), (3, py)))
+    az_a, az_b = _azimute(ax, ay), _azimute(bx, by)
+    abertura = np.mod(az_b - az_a, 360)
+    inicio = np.where(abertura > 180, az_b, az_a)
+    largura = np.where(abertura > 180, 360 - abertura, abertura)
+
+    ex, ey = bx - ax, by - ay
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = np.clip(-(ax * ex + ay * ey) / (ex**2 + ey**2), 0, 1)
+    s = np.nan_to_num(s)
+    distancia = np.hypot(ax + s * ex, ay + s * ey)
+    return inicio, largura, distancia
+
+
+def _limites_circulos(px, py, circulos):
+    """Intervalo de azimutes (início, largura) e distância mínima de cada par (posição do módulo, poste)."""
+    cx, cy = circulos[:, 0] - px, circulos[:, 1] - py
+    raio = circulos[:, 2]
+    centro = np.hypot(cx, cy)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        meia = np.degrees(np.arcsin(np.clip(raio / centro, 0, 1)))
+    meia = np.where(centro > raio, meia, 180.0)
+    return _azimute(cx, cy) - meia, 2 * meia, np.maximum(centro - raio, 0)
+
+
+@lru_cache(maxsize=256)
+def extensao_sombra(lat, resolucao="mensal"):
+    """
+    Quanto a sombra avança (m por metro de altura efetiva) para oeste, leste, sul e norte: a sombra cai
+    do lado oposto ao sol, com comprimento até 1 / tan da menor altitude do sol em cada faixa de azimute.
+    Limite exato: os extremos de cada faixa de 1° estão nas suas bordas, onde ficam os pontos cardeais.
+    :return: (oeste, leste, sul, norte), floats >= 0.
+    """
+    minimos = envelope_altitude(lat, resolucao)[0, :FAIXAS_AZIMUTE]
+    visitadas = np.isfinite(minimos)
+    cotangente = 1 / np.tan(np.radians(minimos[visitadas]))
+    bordas = np.radians(np.flatnonzero(visitadas))
+    dx = -np.concatenate([np.sin(bordas), np.sin(bordas + np.radians(1))]) * np.tile(cotangente, 2)
+    dy = -np.concatenate([np.cos(bordas), np.cos(bordas + np.radians(1))]) * np.tile(cotangente, 2)
+    return tuple(float(np.max(v, initial=0.0)) for v in (-dx, dx, -dy, dy))
+
+
+def pares_proximos(lat, modulos, segmentos, circulos, resolucao="mensal", tamanho_celula=TAMANHO_CELULA):
+    """
+    Índice espacial em grade uniforme: cada primitiva é registrada nas células tocadas pela sua caixa
+    envolvente expandida pela extensão da sombra (`extensao_sombra` × altura efetiva sobre o módulo mais
+    baixo), e cada módulo só forma pares com as primitivas registradas na própria célula. Nenhum par que
+    possa sombrear é perdido (a extensão é um limite superior).
+    :param modulos: dict com arrays (M,) `x`, `y` e `altura_instalacao`.
+    :return: (modulo (P,), primitiva (P,)), agrupados por módulo; primitivas >= K são postes.
+    """
+    n, k = len(modulos["x"]), len(segmentos)
+    if n == 0 or k + len(circulos) == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+    altura_efetiva = np.concatenate([segmentos[:, 4], circulos[:, 3]]) - modulos["altura_instalacao"].min()
+    oeste, leste, sul, norte = (e * np.maximum(altura_efetiva, 0) for e in extensao_sombra(float(lat), resolucao))
+    x_min = np.concatenate([np.minimum(segmentos[:, 0], segmentos[:, 2]), circulos[:, 0] - circulos[:, 2]]) - oeste
+    x_max = np.concatenate([np.maximum(segmentos[:, 0], segmentos[:, 2]), circulos[:, 0] + circulos[:, 2]]) + leste
+    y_min = np.concatenate([np.minimum(segmentos[:, 1], segmentos[:, 3]), circulos[:, 1] - circulos[:, 2]]) - sul
+    y_max = np.concatenate([np.maximum(segmentos[:, 1], segmentos[:, 3]), circulos[:, 1] + circulos[:, 2]]) + norte
+
+    # Células de cada primitiva; primitivas sem alcance (mais baixas que todos os módulos) ficam de fora
+    celula_x, celula_y = np.floor(modulos["x"] / tamanho_celula), np.floor(modulos["y"] / tamanho_celula)
+    ix0 = np.maximum(np.floor(x_min / tamanho_celula), celula_x.min())
+    ix1 = np.minimum(np.floor(x_max / tamanho_celula), celula_x.max())
+    iy0 = np.maximum(np.floor(y_min / tamanho_celula), celula_y.min())
+    iy1 = np.minimum(np.floor(y_max / tamanho_celula), celula_y.max())
+    nx = np.where(altura_efetiva > 0, np.maximum(ix1 - ix0 + 1, 0), 0).astype(int)
+    ny = np.maximum(iy1 - iy0 + 1, 0).astype(int)
+    celulas = nx * ny
+
+    primitiva = np.repeat(np.arange(len(altura_efetiva)), celulas)
+    local = np.arange(celulas.sum()) - np.repeat(np.cumsum(celulas) - celulas, celulas)
+    registro_x = ix0[primitiva] + local % nx[primitiva]
+    registro_y = iy0[primitiva] + local // nx[primitiva]
+
+    # Chave linear da célula (a grade só cobre a extensão dos módulos)
+    linhas = int(celula_y.max() - celula_y.min()) + 1
+    chave_registro = (registro_x - celula_x.min()) * linhas + (registro_y - celula_y.min())
+    chave_modulo = (celula_x - celula_x.min()) * linhas + (celula_y - celula_y.min())
+
+    ordem = np.argsort(chave_registro, kind="stable")
+    chave_registro, primitiva = chave_registro[ordem], primitiva[ordem]
+    primeira = np.searchsorted(chave_registro, chave_modulo, side="left")
+    quantidade = np.searchsorted(chave_registro, chave_modulo, side="right") - primeira
+    modulo = np.repeat(np.arange(n), quantidade)
+    posicao = np.arange(quantidade.sum()) + np.repeat(primeira - np.cumsum(quantidade) + quantidade, quantidade)
+    return modulo, primitiva[posicao]
+
+
+def _relacoes(lat, modulos, segmentos, circulos, resolucao, tamanho_celula=TAMANHO_CELULA):
+    """
+    Índice espacial seguido do teste geométrico (primitivas >= K são postes, índice - K).
+    `tamanho_celula=None` dispensa o índice e testa todos os pares módulo × primitiva.
+    :return: dict de arrays (P,) dos pares mantidos: `modulo`, `primitiva`, `inicio` e `largura` do
+        intervalo de azimutes (graus), `altura_efetiva` (m) e `elevacao_topo` (graus).
+    """
+    envelope = envelope_altitude(float(lat), resolucao)
+    k = len(segmentos)
+    alturas = np.concatenate([segmentos[:, 4], circulos[:, 3]])
+    total = len(modulos["x"]) * len(alturas)
+    if tamanho_celula is None:
+        modulo, primitiva = (g.ravel() for g in np.meshgrid(np.arange(len(modulos["x"])), np.arange(len(alturas)),
+                                                              indexing="ij"))
+    else:
+        modulo, primitiva = pares_proximos(lat, modulos, segmentos, circulos, resolucao, tamanho_celula)
+    CENA_PARES.inc(total - len(modulo), resultado="fora_do_alcance")
+
+    px, py = modulos["x"][modulo], modulos["y"][modulo]
+    inicio, largura, distancia = np.empty(len(modulo)), np.empty(len(modulo)), np.empty(len(modulo))
+    eh_segmento = primitiva < k
+    for mascara, limites, tabela, deslocamento in ((eh_segmento, _limites_segmentos, segmentos, 0),
+                                                   (~eh_segmento, _limites_circulos, circulos, k)):
+        if mascara.any():
+            idx = primitiva[mascara] - deslocamento
+            inicio[mascara], largura[mascara], distancia[mascara] = limites(px[mascara], py[mascara], tabela[idx])
+
+    altura_efetiva = alturas[primitiva] - modulos["altura_instalacao"][modulo]
+    elevacao_topo = np.degrees(np.arctan2(altura_efetiva, distancia))
+    mantidos = (altura_efetiva > 0) & (_altitude_minima(envelope, inicio, largura) < elevacao_topo)
+
+    CENA_PARES.inc(int(mantidos.sum()), resultado="avaliado")
+    CENA_PARES.inc(int((~mantidos).sum()), resultado="descartado")
+    return {"modulo": modulo[mantidos], "primitiva": primitiva[mantidos], "inicio": np.mod(inicio[mantidos], 360),
+            "largura": largura[mantidos], "altura_efetiva": altura_efetiva[mantidos],
+            "elevacao_topo": elevacao_topo[mantidos]}
+
+
+def pares_candidatos(lat, modulos, segmentos, circulos, resolucao="mensal", tamanho_celula=TAMANHO_CELULA):
+    """
+    Pares (módulo, primitiva) que podem sombrear em alguma amostra do sol (índice espacial + teste geométrico).
+    :param modulos: dict com arrays (M,) `x`, `y` e `altura_instalacao`.
+    """
+    relacoes = _relacoes(lat, modulos, segmentos, circulos, resolucao, tamanho_celula)
+    return relacoes["modulo"], relacoes["primitiva"]
+
+
+def _distancia_ao_longo_do_raio(px, py, primitivas, k, ux, uy):
+    """
+    Distância t entre o módulo e o obstáculo ao longo do raio em direção ao sol, para amostras em que
+    o raio atinge o obstáculo (o azimute do sol está no intervalo da primitiva).
+    Segmento A-B: t = (a x e) / (u x e), com a = A - P e e = B - A. Poste: borda do círculo mais próxima.
+    """
+    t = np.empty(len(px))
+    eh_segmento = primitivas[:, 5] < k
+    seg, circ = primitivas[eh_segmento], primitivas[~eh_segmento]
+
+    ax, ay = seg[:, 0] - px[eh_segmento], seg[:, 1] - py[eh_segmento]
+    ex, ey = seg[:, 2] - seg[:, 0], seg[:, 3] - seg[:, 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_seg = (ax * ey - ay * ex) / (ux[eh_segmento] * ey - uy[eh_segmento] * ex)
+    t[eh_segmento] = np.where(np.isnan(t_seg), np.inf, np.maximum(t_seg, 0))
+
+    cx, cy = circ[:, 0] - px[~eh_segmento], circ[:, 1] - py[~eh_segmento]
+    projecao = cx * ux[~eh_segmento] + cy * uy[~eh_segmento]
+    folga = np.maximum(circ[:, 2] ** 2 - (cx**2 + cy**2 - projecao**2), 0)
+    t[~eh_segmento] = np.maximum(projecao - np.sqrt(folga), 0)
+    return t
+
+
+def perdas_cena(lat, modulos, obstaculos, resolucao="mensal", tamanho_bloco=2048, tamanho_celula=TAMANHO_CELULA):
+    """
+    Fração média de perda da radiação direta por (módulo, dia simulado), com todos os obstáculos da cena.
+
+    Os pares mantidos pelo teste geométrico são cruzados com as amostras do sol de uma vez: com as
+    amostras ordenadas por azimute, o intervalo de cada par vira uma faixa contígua (`searchsorted`),
+    e a distância ao longo do raio só é calculada onde o sol está nesse intervalo e abaixo do topo do
+    obstáculo. A união entra com `np.maximum.at` por (módulo, amostra).
+
+    :param modulos: dict com arrays (M,) `x`, `y`, `altura_instalacao`, `dimensao` (percorrida pela sombra) e
+        `largura` (lateral), todos em metros.
+    :param obstaculos: Lista de obstáculos (ver docstring do módulo).
+    :param tamanho_bloco: Pares avaliados por vez (limita o uso de memória).
+    :param tamanho_celula: Lado (m) das células do índice espacial; None testa todos os pares.
+    :return: array (M, D): D = 12 ("mensal") ou 365 ("diaria").
+    """
+    modulos = {campo: np.asarray(modulos[campo], dtype=float)
+               for campo in ("x", "y", "altura_instalacao", "dimensao", "largura")}
+    segmentos, circulos = decompor_obstaculos(obstaculos)
+    _, _, altitudes, azimutes = estagios.geometria(float(lat), resolucao)
+    n = len(modulos["x"])
+
+    relacoes = _relacoes(lat, modulos, segmentos, circulos, resolucao, tamanho_celula)
+    uniao = np.zeros((n, altitudes.size))
+    if len(relacoes["modulo"]) == 0:
+        return uniao.reshape((n,) + altitudes.shape).mean(axis=2)
+
+    altitude, azimute = altitudes.ravel(), azimutes.ravel()
+    projeta_sombra = altitude > ALTITUDE_MINIMA_SOMBRA
+    inverso_tan = 1 / np.tan(np.radians(np.where(projeta_sombra, altitude, 90.0)))
+    ux, uy = np.sin(np.radians(azimute)), np.cos(np.radians(azimute))
+    # Amostras que projetam sombra, ordenadas por azimute, em duas voltas (intervalos que cruzam o norte)
+    diurnas = np.flatnonzero(projeta_sombra)
+    diurnas = diurnas[np.argsort(azimute[diurnas], kind="stable")]
+    azimute_ordenado = np.concatenate([azimute[diurnas], azimute[diurnas] + 360])
+    diurnas = np.concatenate([diurnas, diurnas])
+
+    # Primitivas numa tabela única: ax, ay, bx, by (ou cx, cy, raio, -), índice, largura da faixa de sombra
+    k = len(segmentos)
+    primitivas = np.zeros((k + len(circulos), 7))
+    primitivas[:k, :4] = segmentos[:, :4]
+    primitivas[k:, :3] = circulos[:, :3]
+    primitivas[:, 5] = np.arange(len(primitivas))
+    primitivas[:, 6] = np.concatenate([np.full(k, np.inf), 2 * circulos[:, 2]])
+
+    for inicio in range(0, len(relacoes["modulo"]), tamanho_bloco):
+        bloco = {campo: valores[inicio:inicio + tamanho_bloco] for campo, valores in relacoes.items()}
+        primeira = np.searchsorted(azimute_ordenado, bloco["inicio"], side="left")
+        ultima = np.searchsorted(azimute_ordenado, bloco["inicio"] + bloco["largura"], side="right")
+        quantidade = ultima - primeira
+        par = np.repeat(np.arange(len(quantidade)), quantidade)
+        posicao = np.arange(quantidade.sum()) + np.repeat(primeira - np.cumsum(quantidade) + quantidade, quantidade)
+        amostra = diurnas[posicao]
+        abaixo_do_topo = altitude[amostra] < bloco["elevacao_topo"][par]
+        par, amostra = par[abaixo_do_topo], amostra[abaixo_do_topo]
+        m, prim = bloco["modulo"][par], primitivas[bloco["primitiva"][par]]
+
+        t = _distancia_ao_longo_do_raio(modulos["x"][m], modulos["y"][m], prim, k, ux[amostra], uy[amostra])
+        comprimento_sombra = bloco["altura_efetiva"][par] * inverso_tan[amostra]
+        perda = np.clip((comprimento_sombra - t) / modulos["dimensao"][m], 0.0, 1.0)
+        perda *= np.minimum(1.0, prim[:, 6] / modulos["largura"][m])
+
+        # União por amostra: máximo entre os obstáculos de cada módulo
+        np.maximum.at(uniao, (m, amostra), perda)
+
+    return uniao.reshape((n,) + altitudes.shape).mean(axis=2)
+
+
+REGISTRO.registrar_cache("cena_envelope_altitude", envelope_altitude)
+REGISTRO.registrar_cache("cena_extensao_sombra", extensao_sombra)
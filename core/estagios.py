@@ -0,0 +1,84 @@
+"""
+Estágios memorizados do PerezEngine (resoluções mensal e diária).
+
+O cálculo é dividido pelas entradas de que cada etapa depende:
+1. geometria solar ........... latitude
+2. fatores de orientação (rb)  latitude, inclinação, azimute
+3. sombreamento .............. latitude, altura de instalação, dimensão do módulo, obstáculo
+4. combinação (irradiância) .. clima, albedo, fator bifacial, altura — barata, sempre recalculada
+
+Cada estágio é memorizado pelas próprias entradas (escalares): trocar o albedo, a tecnologia ou o
+modo bifacial só refaz a combinação; trocar a inclinação refaz o rb; trocar o obstáculo refaz a sombra.
+"""
+import numpy as np
+from functools import lru_cache
+from core import tabela_rb
+from core.shadow_engine import ShadowEngine
+from core.solar_geometry import (DIAS_REPRESENTATIVOS, declinacao_solar, angulo_por_do_sol, posicao_solar,
+                                 fator_rb, geometria_diaria, _somente_leitura)
+from utils.metrics import REGISTRO
+
+# Pontos entre o nascer e o pôr do sol usados na estimativa de sombra de cada dia
+AMOSTRAS_SOMBRA = 100
+
+
+@lru_cache(maxsize=256)
+def geometria(lat, resolucao="mensal"):
+    """
+    Geometria solar dos dias simulados: os 12 dias representativos ("mensal") ou os 365 dias ("diaria").
+    :return: (delta (D,), ws (D,), altitudes (D, S), azimutes (D, S)) como arrays somente leitura.
+    """
+    if resolucao == "diaria":
+        return geometria_diaria(lat, AMOSTRAS_SOMBRA)
+
+    lat_rad = np.radians(lat)
+    delta = declinacao_solar(DIAS_REPRESENTATIVOS)
+    ws = angulo_por_do_sol(lat_rad, delta)
+    omega = ws[:, None] * np.linspace(-1, 1, AMOSTRAS_SOMBRA)[None, :]
+    altitudes, azimutes = posicao_solar(lat_rad, delta[:, None], omega)
+    return _somente_leitura(delta, ws, altitudes, azimutes)
+
+
+@lru_cache(maxsize=4096)
+def fatores_orientacao(lat, inclinacao_deg, azimute_deg, resolucao="mensal", tabelado=False):
+    """
+    rb de cada dia simulado (D,), somente leitura.
+    `tabelado=True` (só "mensal") interpola a tabela de core/tabela_rb.py, sem passar pela geometria.
+    """
+    if tabelado:
+        return _somente_leitura(tabela_rb.rb_tabelado(lat, inclinacao_deg, azimute_deg))[0]
+    delta, ws, _, _ = geometria(lat, resolucao)
+    rb = fator_rb(np.radians(lat), delta, ws, np.radians(inclinacao_deg), np.radians(azimute_deg))
+    return _somente_leitura(rb)[0]
+
+
+@lru_cache(maxsize=1024)
+def perdas_sombreamento(lat, altura_instalacao, dimensao_percorrida, altura_obstaculo, distancia_obstaculo,
+                        referencia_azimutal_obstaculo, largura_obstaculo, resolucao="mensal"):
+    """Fração média de perda da radiação direta em cada dia simulado (D,), somente leitura."""
+    _, _, altitudes, azimutes = geometria(lat, resolucao)
+    perdas = ShadowEngine().estimar_perda_sombreamento_vetorizado(
+        altitudes, azimutes, altura_instalacao, dimensao_percorrida, altura_obstaculo,
+        distancia_obstaculo, referencia_azimutal_obstaculo, largura_obstaculo
+    ).mean(axis=1)
+    return _somente_leitura(perdas)[0]
+
+
+def chave_obstaculo(config_obstaculo):
+    """Campos do obstáculo como tupla de floats (chave de cache), com os padrões do ShadowEngine."""
+    return (
+        float(config_obstaculo.get('altura_obstaculo', 0.0)),
+        float(config_obstaculo.get('distancia_obstaculo', 1.0)),
+        float(config_obstaculo.get('referencia_azimutal_obstaculo', 0.0)),
+        float(config_obstaculo.get('largura_obstaculo', 10.0)),
+    )
+
+
+def limpar_caches():
+    for estagio in (geometria, fatores_orientacao, perdas_sombreamento):
+        estagio.cache_clear()
+
+
+REGISTRO.registrar_cache("estagio_geometria", geometria)
+REGISTRO.registrar_cache("estagio_orientacao", fatores_orientacao)
+REGISTRO.registrar_cache("estagio_sombreamento", perdas_sombreamento)
@@ -0,0 +1,74 @@
+import os
+import atexit
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Parâmetros padrão do pool (ajustáveis via variáveis de ambiente)
+HSP_POOL_ATIVO = os.getenv("HSP_POOL_ATIVO", "0") == "1"
+HSP_POOL_WORKERS = int(os.getenv("HSP_POOL_WORKERS", "0")) or None
+HSP_POOL_CHUNK = int(os.getenv("HSP_POOL_CHUNK", "64"))
+HSP_POOL_MIN_ITENS = int(os.getenv("HSP_POOL_MIN_ITENS", "128"))
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def obter_pool(max_workers=None):
+    """
+    Retorna um ProcessPoolExecutor compartilhado pelo processo.
+    Criar um pool por requisição custaria mais que o próprio cálculo, então
+    os pools são reaproveitados e indexados pelo número de workers.
+    """
+    workers = max_workers or os.cpu_count() or 1
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            _pools[workers] = pool
+        return pool
+
+
+def encerrar_pools():
+    """Finaliza todos os pools abertos (chamado automaticamente na saída)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+atexit.register(encerrar_pools)
+
+
+def dividir_em_chunks(itens, tamanho_chunk):
+    """Divide uma sequência em fatias contíguas de no máximo `tamanho_chunk` itens."""
+    tamanho_chunk = max(1, int(tamanho_chunk))
+    return [itens[i:i + tamanho_chunk] for i in range(0, len(itens), tamanho_chunk)]
+
+
+def mapear_em_chunks(funcao, itens, *args, max_workers=None, tamanho_chunk=HSP_POOL_CHUNK,
+                     min_itens_paralelo=HSP_POOL_MIN_ITENS):
+    """
+    Executa `funcao(*args, chunk)` para cada chunk de `itens` e concatena os resultados na ordem original.
+
+    :param funcao: Função de nível de módulo (precisa ser serializável via pickle).
+    :param itens: Lista de itens já convertidos para tipos nativos (dict, float, str...).
+    :param args: Argumentos comuns enviados UMA vez por chunk (ex: dados climatológicos).
+    :param max_workers: Tamanho do pool. None usa o número de CPUs.
+    :param tamanho_chunk: Quantidade de itens enviada a cada worker por tarefa.
+    :param min_itens_paralelo: Abaixo deste tamanho o lote roda no próprio processo,
+        pois o custo de serialização supera o ganho do paralelismo.
+    """
+    itens = list(itens)
+    workers = max_workers or os.cpu_count() or 1
+
+    if len(itens) < min_itens_paralelo or workers <= 1:
+        return funcao(*args, itens)
+
+    chunks = dividir_em_chunks(itens, tamanho_chunk)
+    pool = obter_pool(workers)
+    futuros = [pool.submit(funcao, *args, chunk) for chunk in chunks]
+
+    resultados = []
+    for futuro in futuros:
+        resultados.extend(futuro.result())
+    return resultados
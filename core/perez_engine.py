@@ -1,9 +1,23 @@
+import time
 import numpy as np
+from core import estagios, tabela_rb
 from core.shadow_engine import ShadowEngine
+from core.solar_geometry import (DIAS_REPRESENTATIVOS, MES_DO_DIA, DIAS_POR_MES, angulo_por_do_sol,
+                                 trajetoria_solar_serie, cosseno_incidencia)
+from core.modelo_perez import (coeficientes_perez, coeficientes_perez_diarios, coeficientes_simplificados,
+                               validar_modelo_difusa)
+from utils.metrics import ESTAGIO_LATENCIA
+
+# "mensal": um dia representativo por mês; "diaria": os 365 dias do ano, agregados por mês;
+# "horaria": série horária (ex: TMY de 8760 h do PVGIS), agregada por mês
+RESOLUCOES = ("mensal", "diaria", "horaria")
+# Zênite de 85°: limita o rb horário perto do nascer/pôr do sol, onde cos(zênite) -> 0
+COS_ZENITE_MINIMO = float(np.cos(np.radians(85)))
 
 class PerezEngine:
     def __init__(self, lat, is_bifacial=False, fator_bifacial=0.85, albedo=0.2, 
-                 altura_instalacao=0.0, comprimento_modulo=2.278, largura_modulo=1.134, orientacao="Retrato"):
+                 altura_instalacao=0.0, comprimento_modulo=2.278, largura_modulo=1.134, orientacao="Retrato",
+                 resolucao="mensal", modelo_difusa="simplificado", rb_tabelado=False):
         """
         Motor de cálculo baseado no modelo de Perez para irradiância em superfícies inclinadas.
         
@@ -15,7 +29,18 @@ class PerezEngine:
         :param comprimento_modulo: Dimensão do lado maior do painel (m).
         :param largura_modulo: Dimensão do lado menor do painel (m).
         :param orientacao: "Retrato" ou "Paisagem".
+        :param resolucao: "mensal" (dia representativo de cada mês), "diaria" (365 dias, vetorizado) ou
+            "horaria" (série horária, vetorizado). O modo diário capta o início/fim de sombras que o dia
+            representativo não alcança; o horário usa a irradiância real de cada hora em vez das médias mensais.
+        :param modelo_difusa: "simplificado" (F1/F2 fixos, padrão) ou "perez1990" (tabela completa de Perez,
+            ver core/modelo_perez.py).
+        :param rb_tabelado: Modo rápido: rb interpolado da tabela pré-calculada (core/tabela_rb.py, erro
+            absoluto <= ERRO_MAXIMO_RB). Disponível apenas na resolução "mensal".
         """
+        if resolucao not in RESOLUCOES:
+            raise ValueError(f"Resolução não suportada: {resolucao!r} (use {', '.join(RESOLUCOES)}).")
+        if rb_tabelado and resolucao != "mensal":
+            raise ValueError("O rb tabelado cobre apenas a resolução 'mensal'.")
         
         self.lat_rad = np.radians(lat)
         self.lat_deg = lat
@@ -26,113 +51,176 @@ class PerezEngine:
         self.comprimento_modulo = comprimento_modulo
         self.largura_modulo = largura_modulo
         self.orientacao = orientacao
+        self.resolucao = resolucao
+        self.modelo_difusa = validar_modelo_difusa(modelo_difusa)
+        self.rb_tabelado = rb_tabelado
 
         self.dimensao_referencia_modulo = comprimento_modulo if orientacao == "Retrato" else largura_modulo
         self.shadow_engine = ShadowEngine() 
 
-    def _obter_fator_perda_sombra(self, delta, ws, config_obstaculo):
-        """Calcula quanto da radiação direta é perdida por sombra no dia médio do mês."""
-        if not config_obstaculo:
-            return 0.0
+    def calcular_hsp_corrigido_inc_azi(self, dados, inclinacao_deg, azimute_deg, config_obstaculo=None):
+        """
+        HSP mensal corrigido para o plano do módulo, com e sem sombra.
 
-        # Amostragem de 20 pontos entre o nascer e o pôr do sol
-        omega_points = np.linspace(-ws, ws, 100)
-        perda_acumulada = 0
-        
-        for omega in omega_points:
-            # 1. Altitude Solar
-            sin_h = np.sin(self.lat_rad)*np.sin(delta) + np.cos(self.lat_rad)*np.cos(delta)*np.cos(omega)
-            alt_rad = np.arcsin(np.clip(sin_h, -1, 1))
-            alt_deg = np.degrees(alt_rad)
-            
-            # 2. Azimute Solar
-            cos_az = (np.sin(delta) * np.cos(self.lat_rad) - np.cos(delta) * np.sin(self.lat_rad) * np.cos(omega)) / np.cos(alt_rad)
-            az_deg = np.degrees(np.arccos(np.clip(cos_az, -1, 1)))
-            if omega > 0: 
-                az_deg = 360 - az_deg # Ajuste para o período da tarde
-
-            # 3. Verifica sombra            
-            perda_ponto = self.shadow_engine.estimar_perda_sombreamento(
-                altitude_sol_deg=alt_deg, 
-                azimute_sol_deg=az_deg, 
-                altura_instalacao_modulo=self.altura_instalacao,
-                comprimento_modulo=self.comprimento_modulo, 
-                largura_modulo=self.largura_modulo, 
-                orientacao=self.orientacao, 
-                config_obstaculo=config_obstaculo)
-
-            perda_acumulada += perda_ponto
-        
-        return perda_acumulada / len(omega_points)
+        :param dados: Climatologia mensal padronizada (`hsp_global`, `hsp_diffuse`) ou, na resolução
+            "horaria", a série horária de `SolarDataProvider.get_hourly_data`.
+        """
+        if self.resolucao == "horaria":
+            return self._calcular_hsp_horario(dados, inclinacao_deg, azimute_deg, config_obstaculo)
+        return self._calcular_hsp_por_estagios(dados, inclinacao_deg, azimute_deg, config_obstaculo)
 
-    def calcular_hsp_corrigido_inc_azi(self, dados, inclinacao_deg, azimute_deg, config_obstaculo=None):
+    def _calcular_hsp_por_estagios(self, dados, inclinacao_deg, azimute_deg, config_obstaculo=None):
+        """
+        Resoluções mensal e diária. Geometria, rb e sombra vêm dos estágios memorizados de
+        core/estagios.py; só a combinação com clima, albedo e face traseira roda a cada chamada.
+
+        - "mensal": um dia representativo por mês (Klein).
+        - "diaria": a climatologia mensal é distribuída pelos dias do mês (mesma média), os 365 dias
+          são calculados de uma vez e os resultados diários voltam a meses pela média de cada mês.
+        """
+        beta = np.radians(inclinacao_deg)
+        lat = float(self.lat_deg)
+        diaria = self.resolucao == "diaria"
+
+        # 1. Geometria solar e 2. fatores de orientação (rb)
+        t0 = time.perf_counter()
+        if self.rb_tabelado:
+            # Sem obstáculo, a geometria da latitude nem chega a ser calculada
+            delta = tabela_rb.DECLINACOES
+        else:
+            delta, _, _, _ = estagios.geometria(lat, self.resolucao)
+        rb = estagios.fatores_orientacao(lat, float(inclinacao_deg), float(azimute_deg), self.resolucao,
+                                         self.rb_tabelado)
+        t1 = time.perf_counter()
+
+        # 3. Sombreamento: fração da radiação direta perdida (ex: 0.2 se 20% do dia útil estiver sombreado)
+        if config_obstaculo:
+            perdas = estagios.perdas_sombreamento(
+                lat, float(self.altura_instalacao), float(self.dimensao_referencia_modulo),
+                *estagios.chave_obstaculo(config_obstaculo), self.resolucao
+            )
+        else:
+            perdas = np.zeros_like(rb)
+        t2 = time.perf_counter()
+
+        # 4. Combinação: a perda se aplica apenas à componente DIRETA, reduzindo o rb proporcionalmente
+        mes = MES_DO_DIA if diaria else np.arange(12)
+        gh = np.asarray(dados['hsp_global'][:12], dtype=float)[mes]
+        dh = np.asarray(dados['hsp_diffuse'][:12], dtype=float)[mes]
+        f1, f2 = self._coeficientes_difusa(gh, dh, delta, np.arange(1, 366) if diaria else DIAS_REPRESENTATIVOS)
+        h_bruto = self._irradiancia_vetorizada(gh, dh, rb, beta, f1, f2)
+        h_liquido = self._irradiancia_vetorizada(gh, dh, rb * (1 - perdas), beta, f1, f2)
+
+        def media_mensal(valores):
+            if not diaria:
+                return valores.tolist()
+            return (np.bincount(MES_DO_DIA, weights=valores, minlength=12) / DIAS_POR_MES).tolist()
+
+        results_bruto = media_mensal(h_bruto)
+        results_liquido = media_mensal(h_liquido)
+        perdas_mensais = media_mensal(perdas)
+        t3 = time.perf_counter()
+
+        ESTAGIO_LATENCIA.observe(t1 - t0, estagio="geometria")
+        ESTAGIO_LATENCIA.observe(t2 - t1, estagio="sombreamento")
+        ESTAGIO_LATENCIA.observe(t3 - t2, estagio="transposicao")
+
+        return self._montar_resultado(results_liquido, results_bruto, perdas_mensais, config_obstaculo)
+
+    def _coeficientes_difusa(self, gh, dh, delta, dia_ano):
+        """F1/F2 da difusa frontal para totais diários (um valor por mês ou por dia)."""
+        if self.modelo_difusa == "perez1990":
+            ws = angulo_por_do_sol(self.lat_rad, delta)
+            f1, f2 = coeficientes_perez_diarios(gh, dh, self.lat_rad, delta, ws, dia_ano)
+        else:
+            f1, f2 = coeficientes_simplificados(gh, dh)
+        return np.broadcast_arrays(f1, f2)
+
+    def _irradiancia_vetorizada(self, gh, dh, rb, beta, f1, f2):
+        """Irradiação total (frontal + traseira) sobre arrays: um valor por dia simulado ou por hora."""
+        rb_front = np.maximum(0, rb)
+        h_diff_front = dh * ((1 - f1) * ((1 + np.cos(beta)) / 2) + f1 * rb_front + f2 * np.sin(beta))
+        h_refl_front = gh * self.albedo * (1 - np.cos(beta)) / 2
+        h_total = (gh - dh) * rb_front + h_diff_front + h_refl_front
+
+        if self.is_bifacial:
+            h_beam_rear = (gh - dh) * np.maximum(0, -rb)
+            h_diff_rear = dh * (1 - np.cos(beta)) / 2
+
+            ratio = self.altura_instalacao / self.dimensao_referencia_modulo
+            vf_ground = (ratio / np.sqrt(ratio**2 + 1))
+            vf_tilt = (1 - np.cos(beta)) / 2
+            vf_final = np.clip(vf_ground + vf_tilt, 0, 1)
+
+            h_refl_rear = gh * self.albedo * vf_final * 0.95
+            h_total = h_total + (h_beam_rear + h_diff_rear + h_refl_rear) * self.fator_bifacial
+
+        return np.maximum(0, h_total)
+
+    def _perdas_sombra_vetorizado(self, altitudes, azimutes, config_obstaculo):
+        return self.shadow_engine.estimar_perda_sombreamento_vetorizado(
+            altitudes, azimutes, self.altura_instalacao, self.dimensao_referencia_modulo,
+            config_obstaculo.get('altura_obstaculo', 0.0),
+            config_obstaculo.get('distancia_obstaculo', 1.0),
+            config_obstaculo.get('referencia_azimutal_obstaculo', 0.0),
+            config_obstaculo.get('largura_obstaculo', 10.0),
+        )
+
+    def _calcular_hsp_horario(self, serie, inclinacao_deg, azimute_deg, config_obstaculo=None):
+        """
+        Resolução horária: posição do sol, rb, sombra e transposição de cada hora da série em
+        operações NumPy; as médias horárias (W/m²) viram HSP mensal (kWh/m²/dia) como no PvgisProvider.
+        A perda por sombra de cada mês é ponderada pela irradiância direta no plano, não pelo tempo.
+        """
         beta = np.radians(inclinacao_deg)
         gamma = np.radians(azimute_deg)
-        results_liquido = []
-        results_bruto = []
-        perdas_mensais = []
-        days_n = [17, 47, 75, 105, 135, 162, 198, 228, 258, 288, 318, 344]
-
-        for i in range(12):
-            gh = dados['hsp_global'][i]
-            dh = dados['hsp_diffuse'][i]
-            n = days_n[i]
-
-            # 1. Geometria Solar
-            delta = np.radians(23.45 * np.sin(np.radians(360 * (284 + n) / 365)))
-            ws = np.arccos(np.clip(-np.tan(self.lat_rad) * np.tan(delta), -1, 1))
-            
-            # Cálculo do rb (fator de inclinação)
-            num = (np.sin(self.lat_rad)*np.cos(beta) + np.cos(self.lat_rad)*np.sin(beta)*np.cos(gamma))*np.sin(delta)*ws + \
-                  (np.cos(self.lat_rad)*np.cos(beta) - np.sin(self.lat_rad)*np.sin(beta)*np.cos(gamma))*np.cos(delta)*np.sin(ws) - \
-                  (np.sin(beta)*np.sin(gamma))*np.cos(delta)*(1-np.cos(ws))
-            den = np.sin(self.lat_rad)*np.sin(delta)*ws + np.cos(self.lat_rad)*np.cos(delta)*np.sin(ws)
-            rb = float(np.asarray(num / den).flatten()[0])
-
-            # --- LÓGICA DE SOMBRA ---
-            # Calculamos o fator de perda (ex: 0.2 se 20% do dia útil estiver sombreado)
-            fator_perda = self._obter_fator_perda_sombra(delta, ws, config_obstaculo)
-            perdas_mensais.append(fator_perda)
-            
-            # Aplicamos a perda apenas na componente DIRETA (gh - dh)
-            # Se houver sombra, reduzimos o rb proporcionalmente
-            rb_shaded = rb * (1 - fator_perda)
-
-            # --- FACE FRONTAL ---
-
-            def calcular_irradiancia(rb_valor):
-                rb_front = max(0, rb_valor)
-                f1 = 0.28 * (1 - (dh/gh)) if gh > 0 else 0
-                f2 = 0.02
-                h_diff_front = dh * ((1-f1)*((1+np.cos(beta))/2) + f1*rb_front + f2*np.sin(beta))
-                h_refl_front = gh * self.albedo * (1 - np.cos(beta)) / 2
-                
-                # Irradiância Direta Líquida (já com desconto da sombra)
-                h_beam_front = (gh - dh) * rb_front
-                h_front = h_beam_front + h_diff_front + h_refl_front
-
-                # --- FACE TRASEIRA ---
-                h_total = h_front
-                if self.is_bifacial:
-                    h_beam_rear = (gh - dh) * max(0, -rb_valor) # Traseira também pode sofrer sombra
-                    h_diff_rear = dh * (1 - np.cos(beta)) / 2
-                    
-                    ratio = self.altura_instalacao / self.dimensao_referencia_modulo
-                    vf_ground = (ratio / np.sqrt(ratio**2 + 1)) 
-                    vf_tilt = (1 - np.cos(beta)) / 2
-                    vf_final = np.clip(vf_ground + vf_tilt, 0, 1)
-                    
-                    h_refl_rear = gh * self.albedo * vf_final * 0.95 
-                    h_rear = (h_beam_rear + h_diff_rear + h_refl_rear) * self.fator_bifacial
-                    h_total += h_rear
-
-                return float(max(0, np.asarray(h_total).flatten()[0]))
-        
-            
-            
-            results_bruto.append(calcular_irradiancia(rb)) # RB Original
-            results_liquido.append(calcular_irradiancia(rb_shaded)) # RB com desconto de sombra
-
+        gh = np.asarray(serie['irradiancia_global'], dtype=float)
+        dh = np.asarray(serie['irradiancia_difusa'], dtype=float)
+        mes = np.asarray(serie['mes'])
+
+        t0 = time.perf_counter()
+        altitudes, azimutes = trajetoria_solar_serie(self.lat_deg, serie['longitude'], serie['dia_ano'], serie['hora_utc'])
+        sol_acima = altitudes > 0
+        cos_zenite = np.maximum(np.sin(np.radians(altitudes)), COS_ZENITE_MINIMO)
+        # rb horário: razão entre a direta no plano e na horizontal (negativo: sol atrás do módulo)
+        rb = np.where(sol_acima, cosseno_incidencia(altitudes, azimutes, beta, gamma) / cos_zenite, 0.0)
+        t1 = time.perf_counter()
+
+        if config_obstaculo:
+            perdas = np.where(sol_acima, self._perdas_sombra_vetorizado(altitudes, azimutes, config_obstaculo), 0.0)
+        else:
+            perdas = np.zeros_like(rb)
+        t2 = time.perf_counter()
+
+        if self.modelo_difusa == "perez1990":
+            direta_normal = np.where(sol_acima, np.maximum(gh - dh, 0) / cos_zenite, 0.0)
+            f1, f2 = coeficientes_perez(dh, direta_normal, 90 - altitudes, serie['dia_ano'])
+        else:
+            f1, f2 = coeficientes_simplificados(gh, dh)
+        h_bruto = self._irradiancia_vetorizada(gh, dh, rb, beta, f1, f2)
+        h_liquido = self._irradiancia_vetorizada(gh, dh, rb * (1 - perdas), beta, f1, f2)
+
+        horas_por_mes = np.bincount(mes, minlength=12)
+        # W/m² médio do mês -> kWh/m²/dia: * 24 / 1000
+        results_bruto = (np.bincount(mes, weights=h_bruto, minlength=12) / horas_por_mes * 0.024).tolist()
+        results_liquido = (np.bincount(mes, weights=h_liquido, minlength=12) / horas_por_mes * 0.024).tolist()
+
+        direta_plano = np.maximum(gh - dh, 0) * np.maximum(rb, 0)
+        direta_mensal = np.bincount(mes, weights=direta_plano, minlength=12)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            perdas_mensais = np.where(
+                direta_mensal > 0, np.bincount(mes, weights=direta_plano * perdas, minlength=12) / direta_mensal, 0.0
+            ).tolist()
+        t3 = time.perf_counter()
+
+        ESTAGIO_LATENCIA.observe(t1 - t0, estagio="geometria")
+        ESTAGIO_LATENCIA.observe(t2 - t1, estagio="sombreamento")
+        ESTAGIO_LATENCIA.observe(t3 - t2, estagio="transposicao")
+
+        return self._montar_resultado(results_liquido, results_bruto, perdas_mensais, config_obstaculo)
+
+    @staticmethod
+    def _montar_resultado(results_liquido, results_bruto, perdas_mensais, config_obstaculo):
         media_bruta = float(np.mean(results_bruto))
         media_hsp = float(np.mean(results_liquido))
         media_perda = (sum(perdas_mensais) / 12) * 100 if config_obstaculo else 0
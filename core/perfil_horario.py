@@ -0,0 +1,104 @@
+"""
+Perfis horários sintéticos a partir da climatologia mensal (INPE, NASA POWER).
+
+A global de cada instante segue Collares-Pereira & Rabl (1979) e a difusa, Liu & Jordan (1960):
+razões r = I/H entre a irradiância do instante e a irradiação do dia, que dependem só da latitude,
+do dia do ano e do ângulo horário. As razões são memorizadas por (local, mês); montar o perfil de
+uma climatologia custa uma multiplicação por mês.
+"""
+import numpy as np
+from functools import lru_cache
+from core.solar_geometry import (DIAS_REPRESENTATIVOS, DIAS_POR_MES, declinacao_solar, angulo_por_do_sol,
+                                 equacao_do_tempo)
+from utils.metrics import REGISTRO
+
+FONTE_PERFIL = "Perfil sintético (Collares-Pereira & Rabl / Liu & Jordan)"
+
+
+def razao_difusa_liu_jordan(omega, ws):
+    """Razão r_d entre a difusa no ângulo horário `omega` (rad) e a difusa diária; zero fora do período diurno."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        razao = (np.pi / 24) * (np.cos(omega) - np.cos(ws)) / (np.sin(ws) - ws * np.cos(ws))
+    return np.where(np.abs(omega) < ws, razao, 0.0)
+
+
+def razao_global_collares_pereira_rabl(omega, ws):
+    """Razão r_t entre a global no ângulo horário `omega` (rad) e a global diária; zero fora do período diurno."""
+    a = 0.409 + 0.5016 * np.sin(ws - np.radians(60))
+    b = 0.6609 - 0.4767 * np.sin(ws - np.radians(60))
+    return razao_difusa_liu_jordan(omega, ws) * (a + b * np.cos(omega))
+
+
+def _normalizar(razoes, passo_horas):
+    """Soma de cada dia × passo igual a 1: o perfil devolve exatamente a média mensal de entrada."""
+    soma = razoes.sum(axis=1, keepdims=True) * passo_horas
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(soma > 0, razoes / soma, 0.0)
+
+
+@lru_cache(maxsize=1024)
+def razoes_mensais(lat, lon, mes, passo_horas=1.0, todos_os_dias=False):
+    """
+    Instantes e razões r_t / r_d de um mês, memorizados por (local, mês, passo).
+
+    :param mes: 0 a 11.
+    :param passo_horas: Intervalo entre amostras (1.0 = horário, 0.25 = 15 min), centradas em cada intervalo.
+    :param todos_os_dias: Amostra todos os dias do mês em vez do dia representativo.
+    :return: (dia_ano, hora_utc, r_t, r_d) como arrays 1D somente leitura. `hora_utc` é a hora solar
+        convertida para UTC (longitude e equação do tempo) e pode sair do intervalo [0, 24).
+    """
+    if todos_os_dias:
+        inicio = int(DIAS_POR_MES[:mes].sum()) + 1
+        dias = np.arange(inicio, inicio + int(DIAS_POR_MES[mes]))
+    else:
+        dias = np.array([DIAS_REPRESENTATIVOS[mes]])
+
+    hora_solar = np.arange(passo_horas / 2, 24, passo_horas)
+    ws = angulo_por_do_sol(np.radians(lat), declinacao_solar(dias))[:, None]
+    omega = np.radians((hora_solar[None, :] - 12) * 15)
+
+    r_t = _normalizar(razao_global_collares_pereira_rabl(omega, ws), passo_horas)
+    r_d = _normalizar(razao_difusa_liu_jordan(omega, ws), passo_horas)
+    hora_utc = hora_solar[None, :] - lon / 15 - equacao_do_tempo(dias)[:, None] / 60
+    dia_ano = np.broadcast_to(dias[:, None], r_t.shape)
+
+    arrays = (dia_ano.astype(np.int16).ravel(), hora_utc.astype(np.float32).ravel(),
+              r_t.astype(np.float32).ravel(), r_d.astype(np.float32).ravel())
+    for array in arrays:
+        array.flags.writeable = False
+    return arrays
+
+
+def gerar_perfil_horario(lat, lon, dados, passo_horas=1.0, todos_os_dias=False):
+    """
+    Série horária sintética no contrato de `SolarDataProvider.get_hourly_data`, para o
+    `PerezEngine(resolucao="horaria")`, a partir da climatologia mensal padronizada.
+
+    :param dados: Dicionário com `hsp_global` e `hsp_diffuse` (kWh/m²/dia), 12 valores cada.
+    :return: dict com `irradiancia_global`/`irradiancia_difusa` (W/m², float32), `mes`, `dia_ano`,
+        `hora_utc` e `longitude`. As amostras cobrem as 24 h de cada dia, de modo que a média mensal
+        × 0,024 reproduz o HSP de entrada.
+    """
+    globais, difusas, meses, dias, horas = [], [], [], [], []
+    for mes in range(12):
+        dia_ano, hora_utc, r_t, r_d = razoes_mensais(float(lat), float(lon), mes, float(passo_horas), todos_os_dias)
+        global_mes = r_t * np.float32(dados['hsp_global'][mes] * 1000)
+        # A difusa nunca passa da global do mesmo instante
+        globais.append(global_mes)
+        difusas.append(np.minimum(r_d * np.float32(dados['hsp_diffuse'][mes] * 1000), global_mes))
+        meses.append(np.full(len(r_t), mes, dtype=np.int8))
+        dias.append(dia_ano)
+        horas.append(hora_utc)
+
+    return {
+        "irradiancia_global": np.concatenate(globais),
+        "irradiancia_difusa": np.concatenate(difusas),
+        "mes": np.concatenate(meses),
+        "dia_ano": np.concatenate(dias),
+        "hora_utc": np.concatenate(horas),
+        "longitude": lon,
+        "metadata": {"source": FONTE_PERFIL, "passo_horas": passo_horas},
+    }
+
+
+REGISTRO.registrar_cache("perfil_horario", razoes_mensais)
@@ -1,4 +1,7 @@
 import numpy as np
+from functools import lru_cache
+from core.solar_geometry import HORAS_PADRAO, trajetoria_solar_anual
+from utils.metrics import REGISTRO
 
 class ShadowEngine:
     """
@@ -58,4 +61,74 @@ class ShadowEngine:
                 percentual_perda = penetracao / dimensao_percorrida
                 return float(np.clip(percentual_perda, 0.0, 1.0))
         
-        return 0.0 # Sem sombra
\ No newline at end of file
+        return 0.0 # Sem sombra
+
+    def estimar_perda_sombreamento_vetorizado(self, altitude_sol_deg, azimute_sol_deg, altura_instalacao_modulo,
+                                              dimensao_percorrida, altura_obstaculo, distancia_obstaculo,
+                                              referencia_azimutal_obstaculo, largura_obstaculo):
+        """
+        Versão vetorizada de `estimar_perda_sombreamento` para um obstáculo por módulo.
+        Todos os argumentos são arrays (ou escalares) que fazem broadcasting entre si, por exemplo
+        posições solares com shape (1, 12, S) contra parâmetros de módulos com shape (N, 1, 1).
+
+        :param dimensao_percorrida: Comprimento (Retrato) ou largura (Paisagem) do módulo (m).
+        :return: Array com a fração de perda (0.0 a 1.0) por amostra; sol abaixo do horizonte conta como 1.0.
+        """
+        altitude_sol_deg = np.asarray(altitude_sol_deg, dtype=float)
+
+        # Altura efetiva do obstáculo em relação ao painel
+        h_obs = np.maximum(0, np.asarray(altura_obstaculo) - altura_instalacao_modulo)
+
+        # Verificação de Azimute (Abertura da parede)
+        meio_angulo_abertura = np.degrees(np.arctan2(np.asarray(largura_obstaculo) / 2, distancia_obstaculo))
+        diff_az = np.abs(azimute_sol_deg - np.asarray(referencia_azimutal_obstaculo))
+        diff_az = np.where(diff_az > 180, 360 - diff_az, diff_az)
+
+        # Comprimento da sombra no chão e penetração no módulo
+        with np.errstate(divide="ignore", invalid="ignore"):
+            comprimento_sombra = h_obs / np.tan(np.radians(altitude_sol_deg))
+            percentual_perda = np.clip((comprimento_sombra - distancia_obstaculo) / dimensao_percorrida, 0.0, 1.0)
+
+        sombreado = (h_obs > 0) & (diff_az <= meio_angulo_abertura) & (comprimento_sombra > distancia_obstaculo)
+        perda = np.where(sombreado, percentual_perda, 0.0)
+
+        # Se o sol está abaixo do horizonte, tecnicamente é "sombra" (noite)
+        return np.where(altitude_sol_deg <= 0, 1.0, perda)
+
+    def calcular_matriz_perda(self, lat, config_obstaculo, altura_instalacao_modulo=0.0, comprimento_modulo=2.278,
+                              largura_modulo=1.134, orientacao='Retrato', horas=HORAS_PADRAO):
+        """
+        Fração de perda de radiação direta para cada mês × horário (hora solar verdadeira).
+        O resultado é memorizado pela geometria do obstáculo: chamadas repetidas não recalculam.
+
+        :param horas: Horas solares amostradas (12.0 = meio-dia solar).
+        :return: (horas (H,), altitudes_sol (12, H), perdas (12, H)) como arrays somente leitura;
+            a perda é NaN quando o sol está abaixo do horizonte.
+        """
+        config_obstaculo = config_obstaculo or {}
+        dimensao_percorrida = comprimento_modulo if orientacao == 'Retrato' else largura_modulo
+        return matriz_perda_sombreamento(
+            float(lat), float(altura_instalacao_modulo), float(dimensao_percorrida),
+            float(config_obstaculo.get('altura_obstaculo', 0.0)),
+            float(config_obstaculo.get('distancia_obstaculo', 1.0)),
+            float(config_obstaculo.get('referencia_azimutal_obstaculo', 0.0)),
+            float(config_obstaculo.get('largura_obstaculo', 10.0)),
+            tuple(float(h) for h in horas)
+        )
+
+
+@lru_cache(maxsize=256)
+def matriz_perda_sombreamento(lat, altura_instalacao_modulo, dimensao_percorrida, altura_obstaculo,
+                              distancia_obstaculo, referencia_azimutal_obstaculo, largura_obstaculo, horas=HORAS_PADRAO):
+    """Matriz mês × hora de `ShadowEngine.calcular_matriz_perda`, memorizada por geometria (argumentos escalares)."""
+    horas, altitudes, azimutes = trajetoria_solar_anual(lat, horas)
+    perdas = ShadowEngine().estimar_perda_sombreamento_vetorizado(
+        altitudes, azimutes, altura_instalacao_modulo, dimensao_percorrida, altura_obstaculo,
+        distancia_obstaculo, referencia_azimutal_obstaculo, largura_obstaculo
+    )
+    perdas = np.where(altitudes > 0, perdas, np.nan)
+    perdas.flags.writeable = False
+    return horas, altitudes, perdas
+
+
+REGISTRO.registrar_cache("matriz_sombreamento", matriz_perda_sombreamento)
@@ -0,0 +1,157 @@
+import numpy as np
+from functools import lru_cache
+
+# Dia representativo de cada mês (dia médio de Klein), usado pelo PerezEngine
+DIAS_REPRESENTATIVOS = np.array([17, 47, 75, 105, 135, 162, 198, 228, 258, 288, 318, 344])
+DIAS_REPRESENTATIVOS_TUPLA = tuple(int(d) for d in DIAS_REPRESENTATIVOS)
+# Ano não bissexto: mês (0-11) de cada um dos 365 dias, para agregar resultados diários em mensais
+DIAS_POR_MES = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+MES_DO_DIA = np.repeat(np.arange(12), DIAS_POR_MES)
+# Horas solares amostradas por padrão nas matrizes mês × hora (05:00 às 19:00, passo de 30 min)
+HORAS_PADRAO = tuple(float(h) for h in np.arange(5.0, 19.5, 0.5))
+
+
+def declinacao_solar(dia_ano):
+    """Declinação solar (rad) pela equação de Cooper (1969). Aceita escalar ou array."""
+    return np.radians(23.45 * np.sin(np.radians(360 * (284 + np.asarray(dia_ano)) / 365)))
+
+
+def angulo_por_do_sol(lat_rad, delta):
+    """Ângulo horário do pôr do sol (rad) para superfície horizontal."""
+    return np.arccos(np.clip(-np.tan(lat_rad) * np.tan(delta), -1, 1))
+
+
+def posicao_solar(lat_rad, delta, omega):
+    """
+    Altitude e azimute solar (graus) para os ângulos horários `omega` (rad).
+    Convenção de azimute: 0°=Norte, 90°=Leste, 180°=Sul, 270°=Oeste (tarde quando omega > 0).
+    Todos os argumentos fazem broadcasting entre si.
+    """
+    sin_h = np.sin(lat_rad)*np.sin(delta) + np.cos(lat_rad)*np.cos(delta)*np.cos(omega)
+    alt_rad = np.arcsin(np.clip(sin_h, -1, 1))
+    alt_deg = np.degrees(alt_rad)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_az = (np.sin(delta) * np.cos(lat_rad) - np.cos(delta) * np.sin(lat_rad) * np.cos(omega)) / np.cos(alt_rad)
+    az_deg = np.degrees(np.arccos(np.clip(cos_az, -1, 1)))
+    az_deg = np.where(np.asarray(omega) > 0, 360 - az_deg, az_deg)  # Ajuste para o período da tarde
+    return alt_deg, az_deg
+
+
+def fator_rb(lat_rad, delta, ws, beta, gamma):
+    """
+    Razão entre a irradiação direta diária no plano inclinado e no horizontal (rb).
+    :param beta: Inclinação do plano (rad).
+    :param gamma: Azimute do plano (rad, 0=Norte).
+    """
+    num = (np.sin(lat_rad)*np.cos(beta) + np.cos(lat_rad)*np.sin(beta)*np.cos(gamma))*np.sin(delta)*ws + \
+          (np.cos(lat_rad)*np.cos(beta) - np.sin(lat_rad)*np.sin(beta)*np.cos(gamma))*np.cos(delta)*np.sin(ws) - \
+          (np.sin(beta)*np.sin(gamma))*np.cos(delta)*(1-np.cos(ws))
+    den = np.sin(lat_rad)*np.sin(delta)*ws + np.cos(lat_rad)*np.cos(delta)*np.sin(ws)
+    # Noite polar (ws = 0): den = 0 e o rb do dia é NaN
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return num / den
+
+
+def equacao_do_tempo(dia_ano):
+    """Equação do tempo (minutos) pela série de Spencer (1971). Aceita escalar ou array."""
+    b = 2 * np.pi * (np.asarray(dia_ano) - 1) / 365
+    return 229.18 * (0.000075 + 0.001868 * np.cos(b) - 0.032077 * np.sin(b)
+                     - 0.014615 * np.cos(2 * b) - 0.040849 * np.sin(2 * b))
+
+
+def posicao_solar_utc(lat, lon, dia_ano, hora_utc):
+    """
+    Altitude e azimute solar (graus) para instantes em hora UTC (ex: séries horárias do PVGIS).
+    A hora solar verdadeira soma a correção de longitude (lon/15 h) e a equação do tempo.
+    `dia_ano` e `hora_utc` fazem broadcasting entre si.
+    """
+    hora_solar = np.asarray(hora_utc, dtype=float) + lon / 15 + equacao_do_tempo(dia_ano) / 60
+    omega = np.radians((hora_solar - 12) * 15)
+    return posicao_solar(np.radians(lat), declinacao_solar(dia_ano), omega)
+
+
+def cosseno_incidencia(alt_deg, az_deg, beta, gamma):
+    """
+    Cosseno do ângulo de incidência do sol num plano inclinado (negativo: sol atrás do plano).
+    :param beta: Inclinação do plano (rad).
+    :param gamma: Azimute do plano (rad), na convenção de `posicao_solar` (0=Norte, 90°=Leste).
+    """
+    alt = np.radians(alt_deg)
+    az = np.radians(az_deg)
+    return np.sin(alt) * np.cos(beta) + np.cos(alt) * np.sin(beta) * np.cos(az - gamma)
+
+
+def posicao_solar_horaria(lat, dia_ano, horas):
+    """
+    Altitude e azimute solar (graus) em hora solar verdadeira (12h = meio-dia solar).
+    `dia_ano` e `horas` fazem broadcasting: ex. dias (12, 1) contra horas (H,) gera matrizes (12, H).
+    """
+    delta = declinacao_solar(dia_ano)
+    omega = np.radians((np.asarray(horas, dtype=float) - 12) * 15)
+    return posicao_solar(np.radians(lat), delta, omega)
+
+
+def _somente_leitura(*arrays):
+    for array in arrays:
+        array.flags.writeable = False
+    return arrays
+
+
+@lru_cache(maxsize=512)
+def trajetoria_solar_dia(lat, dia_ano, hora_inicio=5.5, hora_fim=18.5, pontos=60):
+    """
+    Trajetória do sol em um dia, calculada em uma única chamada NumPy e memorizada por (latitude, dia).
+    :return: (horas, altitudes_deg, azimutes_deg) como arrays somente leitura.
+    """
+    horas = np.linspace(hora_inicio, hora_fim, pontos)
+    altitudes, azimutes = posicao_solar_horaria(lat, dia_ano, horas)
+    return _somente_leitura(horas, altitudes, azimutes)
+
+
+@lru_cache(maxsize=128)
+def trajetoria_solar_anual(lat, horas=HORAS_PADRAO, dias=DIAS_REPRESENTATIVOS_TUPLA):
+    """
+    Posição do sol para todos os meses × horas em uma única chamada NumPy (memorizada por latitude).
+    :param horas: Horas solares amostradas (tupla, para permitir o cache).
+    :param dias: Dia do ano usado para cada mês.
+    :return: (horas (H,), altitudes (12, H), azimutes (12, H)) como arrays somente leitura.
+    """
+    horas = np.asarray(horas, dtype=float)
+    altitudes, azimutes = posicao_solar_horaria(lat, np.asarray(dias)[:, None], horas[None, :])
+    return _somente_leitura(horas, altitudes, azimutes)
+
+
+@lru_cache(maxsize=128)
+def geometria_diaria(lat, amostras=100):
+    """
+    Geometria solar dos 365 dias do ano em uma única chamada NumPy (memorizada por latitude).
+    Cada dia é amostrado com `amostras` ângulos horários entre o nascer e o pôr do sol, como
+    no dia representativo do modo mensal do PerezEngine.
+    :return: (delta (365,), ws (365,), altitudes (365, S), azimutes (365, S)) como arrays somente leitura.
+    """
+    lat_rad = np.radians(lat)
+    delta = declinacao_solar(np.arange(1, 366))
+    ws = angulo_por_do_sol(lat_rad, delta)
+    omega = ws[:, None] * np.linspace(-1, 1, amostras)[None, :]
+    altitudes, azimutes = posicao_solar(lat_rad, delta[:, None], omega)
+    return _somente_leitura(delta, ws, altitudes, azimutes)
+
+
+@lru_cache(maxsize=64)
+def _trajetoria_solar_serie(lat, lon, dias_bytes, horas_bytes):
+    dia_ano = np.frombuffer(dias_bytes, dtype=np.int16)
+    hora_utc = np.frombuffer(horas_bytes, dtype=np.float32)
+    altitudes, azimutes = posicao_solar_utc(lat, lon, dia_ano, hora_utc)
+    return _somente_leitura(altitudes.astype(np.float32), azimutes.astype(np.float32))
+
+
+def trajetoria_solar_serie(lat, lon, dia_ano, hora_utc):
+    """
+    `posicao_solar_utc` para o eixo de tempo de uma série horária, memorizada por (latitude, longitude,
+    eixo de tempo): simulações repetidas sobre o mesmo TMY não recalculam a posição do sol.
+    :return: (altitudes, azimutes) em float32, somente leitura.
+    """
+    dias = np.ascontiguousarray(dia_ano, dtype=np.int16).tobytes()
+    horas = np.ascontiguousarray(hora_utc, dtype=np.float32).tobytes()
+    return _trajetoria_solar_serie(float(lat), float(lon), dias, horas)
@@ -0,0 +1,128 @@
+"""
+Tabela pré-calculada do fator de transposição rb (modo rápido para varreduras e carteiras).
+
+O rb de `fator_rb` separa-se exatamente em inclinação (beta) e azimute (gamma):
+
+    rb = cos(beta) + sin(beta) * (cos(gamma) * Q - sin(gamma) * R)
+
+onde Q e R dependem só da latitude e do mês (o primeiro termo do numerador é o próprio
+denominador). A tabela guarda Q e R numa grade fina de latitudes × 12 meses, persistida em disco
+(.npy, aberto com mmap e compartilhado entre os processos do pool); inclinação e azimute entram
+pela expressão fechada acima, sem erro de interpolação nessas duas dimensões. Uma consulta custa
+uma interpolação linear em latitude e um produto matricial; nas varreduras do lote, ~5x mais rápida
+que `fator_rb`.
+
+Erro: |rb_tabela - rb_exato| <= sin(beta) * hypot(dQ, dR) <= ERRO_MAXIMO_RB em toda a faixa
+|lat| <= LAT_MAXIMA (pior caso no inverno a 65°, onde o próprio rb passa de 40); até 60° o erro
+fica abaixo de 1e-5 e na faixa do Brasil, abaixo de 1e-7. Latitudes fora da faixa usam a fórmula exata.
+"""
+import os
+import numpy as np
+from functools import lru_cache
+from core.solar_geometry import DIAS_REPRESENTATIVOS, declinacao_solar, angulo_por_do_sol
+from utils.logger import get_logger
+from utils.metrics import REGISTRO
+
+HSP_TABELA_RB_DIR = os.getenv("HSP_TABELA_RB_DIR", "data/tabelas")
+
+VERSAO_TABELA = 1
+LAT_MAXIMA = 65.0
+PASSO_LATITUDE = 0.01
+LATITUDES = np.linspace(-LAT_MAXIMA, LAT_MAXIMA, int(round(2 * LAT_MAXIMA / PASSO_LATITUDE)) + 1)
+# Limite do erro absoluto do rb interpolado (ver docstring do módulo e tests/unit/test_tabela_rb.py)
+ERRO_MAXIMO_RB = 5e-4
+
+DECLINACOES = declinacao_solar(DIAS_REPRESENTATIVOS)
+
+logger = get_logger("tabela_rb")
+
+
+def coeficientes_rb(lat):
+    """
+    Coeficientes exatos (Q, R) de cada mês para a latitude `lat` (graus, escalar ou array).
+    :return: (Q, R), cada um com shape lat.shape + (12,); NaN nos meses de noite polar.
+    """
+    lat_rad = np.radians(np.asarray(lat, dtype=float))[..., None]
+    ws = angulo_por_do_sol(lat_rad, DECLINACOES)
+    den = np.sin(lat_rad) * np.sin(DECLINACOES) * ws + np.cos(lat_rad) * np.cos(DECLINACOES) * np.sin(ws)
+    # Meses de noite polar (ws = 0, fora da tabela): den = 0 e Q, R ficam NaN
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q = (np.cos(lat_rad) * np.sin(DECLINACOES) * ws - np.sin(lat_rad) * np.cos(DECLINACOES) * np.sin(ws)) / den
+        r = np.cos(DECLINACOES) * (1 - np.cos(ws)) / den
+    return q, r
+
+
+def gerar_tabela():
+    """Tabela (L, 2, 12): Q e R de cada latitude de LATITUDES, lado a lado para uma leitura contígua."""
+    return np.stack(coeficientes_rb(LATITUDES), axis=1)
+
+
+def caminho_tabela(diretorio=None):
+    nome = f"rb_v{VERSAO_TABELA}_lat{LAT_MAXIMA:g}_passo{PASSO_LATITUDE:g}.npy"
+    return os.path.join(diretorio or HSP_TABELA_RB_DIR, nome)
+
+
+@lru_cache(maxsize=4)
+def carregar_tabela(diretorio=None):
+    """
+    Abre a tabela do disco (mmap, somente leitura) ou a gera e grava de forma atômica
+    (temporário + os.replace). Sem permissão de escrita, a tabela fica só em memória.
+    """
+    caminho = caminho_tabela(diretorio)
+    forma = (len(LATITUDES), 2, 12)
+    if os.path.exists(caminho):
+        tabela = np.load(caminho, mmap_mode="r")
+        if tabela.shape == forma:
+            return tabela
+        logger.warning("Tabela rb com formato inesperado; regenerando", extra={"caminho": caminho})
+
+    tabela = gerar_tabela()
+    try:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "wb") as f:
+            np.save(f, tabela)
+        os.replace(temporario, caminho)
+    except OSError as e:
+        logger.warning("Tabela rb não persistida", extra={"caminho": caminho, "erro": str(e)})
+    tabela.flags.writeable = False
+    return tabela
+
+
+def interpolar_coeficientes(lat, tabela=None):
+    """(Q, R) interpolados linearmente em latitude; fora de ±LAT_MAXIMA, os coeficientes exatos."""
+    tabela = carregar_tabela() if tabela is None else tabela
+    lat = np.asarray(lat, dtype=float)
+    x = (np.clip(lat, -LAT_MAXIMA, LAT_MAXIMA) + LAT_MAXIMA) / PASSO_LATITUDE
+    k = np.minimum(x.astype(np.intp), len(LATITUDES) - 2)
+    w = (x - k)[..., None, None]
+    coef = tabela[k] * (1 - w) + tabela[k + 1] * w
+    q, r = coef[..., 0, :], coef[..., 1, :]
+
+    fora = np.abs(lat) > LAT_MAXIMA
+    if np.any(fora):
+        q_exato, r_exato = coeficientes_rb(lat)
+        q = np.where(fora[..., None], q_exato, q)
+        r = np.where(fora[..., None], r_exato, r)
+    return q, r
+
+
+def rb_tabelado(lat, inclinacao_deg, azimute_deg, tabela=None):
+    """
+    rb mensal pela tabela. Os argumentos (graus) fazem broadcasting entre si; a latitude escalar
+    (caso do lote, todos os módulos no mesmo local) é interpolada uma única vez e o rb de todos os
+    módulos sai de um único produto matricial (N, 3) @ (3, 12).
+    :return: array com shape broadcast(lat, inclinacao, azimute) + (12,).
+    """
+    q, r = interpolar_coeficientes(lat, tabela)
+    beta = np.radians(np.asarray(inclinacao_deg, dtype=float))
+    gamma = np.radians(np.asarray(azimute_deg, dtype=float))
+    beta, gamma = np.broadcast_arrays(beta, gamma)
+    base = np.stack([np.cos(beta), np.sin(beta) * np.cos(gamma), -np.sin(beta) * np.sin(gamma)], axis=-1)
+    coeficientes = np.stack([np.ones_like(q), q, r], axis=-2)
+    if coeficientes.ndim == 2:
+        return base @ coeficientes
+    return np.matmul(base[..., None, :], coeficientes)[..., 0, :]
+
+
+REGISTRO.registrar_cache("tabela_rb", carregar_tabela)
@@ -6,13 +6,21 @@ from dashboard.visualizations import SolarDashboardRenderer
 from services.deps import Dependencies
 from utils.constants import ALBEDO_REFERENCE, CELL_TECHNOLOGY_REFERENCE
 
+st.set_page_config(page_title="Dimensionador HSP", layout="wide")
+
 # Inicializa a infraestrutura
+# O Streamlit reexecuta este script a cada interação: repositório (com o Atlas INPE em memória),
+# motor e renderizador são recursos do processo, criados uma única vez e compartilhados entre sessões.
+@st.cache_resource
+def carregar_infraestrutura():
+    repo = Dependencies.get_solar_repository()
+    engine = SolarEngine(repository=repo)
 
-repo = Dependencies.get_solar_repository()
-engine = SolarEngine(repository=repo)
+    # Inicializa o renderizador injetando as dependências
+    renderer = SolarDashboardRenderer(engine=engine, repository=repo)
+    return repo, engine, renderer
 
-# Inicializa o renderizador injetando as dependências
-renderer = SolarDashboardRenderer(engine=engine, repository=repo)
+repo, engine, renderer = carregar_infraestrutura()
 
 # --- CARREGAMENTO DE LOCALIDADES ---
 @st.cache_data
@@ -22,13 +30,8 @@ def carregar_localidades():
 
 localidades = carregar_localidades()
 
-st.set_page_config(page_title="Dimensionador HSP", layout="wide")
 st.title("☀️ Comparativo Solar: Projeto vs. Referência (0°/0°)")
 
-# --- LÓGICA DE CACHE INTELIGENTE ---
-if 'cache_api_data' not in st.session_state:
-    st.session_state.cache_api_data = {}
-
 # Barra lateral para inputs
 with st.sidebar:
     st.header("PARÂMETROS DO PROJETO")
@@ -127,17 +130,53 @@ with st.sidebar:
         api_obstacle_config = None    
         orientacao = "Retrato" # Valor padrão, pode ser ajustado na configuração do obstáculo
 
-if st.button("Calcular e Comparar"):
-    renderer.renderizar_layout_comparativo(
-        lat=lat, 
-        lon=lon, 
-        inc=inc, 
-        azi=azi, 
-        alb=alb, 
-        h=h,
-        tec_chave=tec_chave, 
-        modo_bifacial=modo_bifacial, 
-        orientacao=orientacao,
-        usar_obstaculo=usar_obstaculo,
-        config_obstaculo=api_obstacle_config,
-        nome_exibicao=nome_exibicao)
\ No newline at end of file
+aba_comparativo, aba_mapa, aba_sombra = st.tabs(
+    ["📊 Comparativo", "🗺️ Mapa Inclinação × Azimute", "🌗 Sombreamento Mês × Hora"]
+)
+
+with aba_comparativo:
+    if st.button("Calcular e Comparar"):
+        renderer.renderizar_layout_comparativo(
+            lat=lat, 
+            lon=lon, 
+            inc=inc, 
+            azi=azi, 
+            alb=alb, 
+            h=h,
+            tec_chave=tec_chave, 
+            modo_bifacial=modo_bifacial, 
+            orientacao=orientacao,
+            usar_obstaculo=usar_obstaculo,
+            config_obstaculo=api_obstacle_config,
+            nome_exibicao=nome_exibicao)
+
+with aba_mapa:
+    # Todo o espaço de projeto em uma única avaliação em lote (em cache por local e parâmetros)
+    col_per, col_inc, col_azi = st.columns(3)
+    periodo = col_per.selectbox("Período", ["Anual", "Jan", "Fev", "Mar", "Abr", "Mai", "Jun",
+                                            "Jul", "Ago", "Set", "Out", "Nov", "Dez"])
+    passo_inc = col_inc.select_slider("Resolução da Inclinação (°)", [1, 2, 5, 10], value=5)
+    passo_azi = col_azi.select_slider("Resolução do Azimute (°)", [5, 10, 15, 30], value=10)
+
+    if st.toggle("Gerar Mapa", value=False):
+        renderer.renderizar_mapa_orientacao(
+            lat=lat,
+            lon=lon,
+            inc=inc,
+            azi=azi,
+            alb=alb,
+            h=h,
+            tec_chave=tec_chave,
+            modo_bifacial=modo_bifacial,
+            orientacao=orientacao,
+            config_obstaculo=api_obstacle_config,
+            periodo=periodo,
+            passo_inc=passo_inc,
+            passo_azi=passo_azi)
+
+with aba_sombra:
+    # Uma matriz por geometria de obstáculo (em cache no motor): substitui a varredura de mês/horário pelos sliders
+    if usar_obstaculo:
+        renderer.renderizar_matriz_sombreamento(lat=lat, h=h, config_obstaculo=api_obstacle_config, orientacao=orientacao)
+    else:
+        st.info("Ative 'Considerar Obstáculo Próximo' na barra lateral para ver a matriz de sombreamento.")
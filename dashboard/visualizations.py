@@ -1,14 +1,53 @@
 import streamlit as st
-import pandas as pd
-import altair as alt
-import plotly.graph_objects as go
 import numpy as np
 from datetime import datetime
 import math
 
 from core.perez_engine import PerezEngine
+from core.solar_geometry import posicao_solar_horaria, trajetoria_solar_dia
 from services.solar_repository import SolarRepository
 
+
+@st.cache_data(show_spinner="Buscando dados climatológicos...", max_entries=512)
+def obter_dados_climaticos(_repository, lat, lon):
+    """
+    Cache de dados climatológicos compartilhado entre todas as sessões do processo.
+    O repositório (prefixo '_') não entra na chave: apenas a coordenada normalizada.
+    """
+    return _repository.get_standardized_data(lat, lon)
+
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def calcular_cenario(_engine, lat, lon, inc, azi, alb, h, tec_chave, modo_bifacial, orientacao, config_obstaculo, dados_clima):
+    """Memoriza o resultado de um cenário: refazer a tela com os mesmos parâmetros não recalcula o motor."""
+    return _engine.calcular_projeto_solar(
+        lat=lat, lon=lon, inclinacao=inc, azimute=azi,
+        albedo=alb, altura_instalacao=h, tecnologia=tec_chave,
+        is_bifacial=modo_bifacial,
+        dados_pre_carregados=dados_clima,
+        orientacao=orientacao,
+        config_obstaculo=config_obstaculo
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def calcular_mapa_orientacao(_engine, lat, lon, passo_inc, passo_azi, alb, h, tec_chave, modo_bifacial, orientacao,
+                             config_obstaculo, dados_clima):
+    """
+    Memoriza o mapa inclinação × azimute por local e conjunto de parâmetros.
+    Mover os sliders de orientação não invalida o mapa: inclinação/azimute do projeto não fazem parte da chave.
+    """
+    return _engine.calcular_mapa_orientacao(
+        lat=lat, lon=lon,
+        inclinacoes=np.arange(0, 90 + passo_inc, passo_inc),
+        azimutes=np.arange(0, 360 + passo_azi, passo_azi),
+        albedo=alb, altura_instalacao=h, tecnologia=tec_chave,
+        is_bifacial=modo_bifacial, orientacao=orientacao,
+        dados_pre_carregados=dados_clima,
+        config_obstaculo=config_obstaculo
+    )
+
+
 class SolarDashboardRenderer:
     def __init__(self, engine: PerezEngine, repository: SolarRepository):
         """
@@ -19,69 +58,41 @@ class SolarDashboardRenderer:
 
     def calcular_posicoes(self, lat, altura, dia_ano, hora):
         """Calcula a física da sombra e a posição do sol (Azimute e Altitude)."""
-        # Declinação Solar (Cooper, 1969)
-        delta = 23.45 * math.sin(math.radians(360/365 * (dia_ano - 81)))
-        # Ângulo Horário (15 graus por hora)
-        h_ang = (hora - 12) * 15
-        lat_rad, delta_rad, h_rad = map(math.radians, [lat, delta, h_ang])
+        # Mesma geometria solar do PerezEngine (core/solar_geometry.py)
+        alt_deg, gamma_deg = (float(v) for v in posicao_solar_horaria(lat, dia_ano, hora))
         
-        # Altitude Solar (Ângulo acima do horizonte)
-        sin_alpha = (math.sin(lat_rad) * math.sin(delta_rad) + 
-                    math.cos(lat_rad) * math.cos(delta_rad) * math.cos(h_rad))
-        
-        if sin_alpha <= 0.001: 
+        if math.sin(math.radians(alt_deg)) <= 0.001: 
             return None 
         
-        alpha_rad = math.asin(sin_alpha)
-        comprimento_sombra = altura / math.tan(alpha_rad)
-        
-        # Azimute Solar
-        arg_cos = (math.sin(delta_rad) - math.sin(lat_rad) * math.sin(alpha_rad)) / (math.cos(lat_rad) * math.cos(alpha_rad))
-        arg_cos = max(min(arg_cos, 1), -1) 
-        gamma_deg = math.degrees(math.acos(arg_cos))
-        
-        if h_ang > 0: 
-            gamma_deg = 360 - gamma_deg
-        
-        return gamma_deg, (gamma_deg + 180) % 360, comprimento_sombra, math.degrees(alpha_rad)
+        comprimento_sombra = altura / math.tan(math.radians(alt_deg))
+        return gamma_deg, (gamma_deg + 180) % 360, comprimento_sombra, alt_deg
 
     def renderizar_layout_comparativo(
             self, lat, lon, inc, azi, alb, h, tec_chave, modo_bifacial, 
             orientacao, usar_obstaculo, config_obstaculo, nome_exibicao):
+        # Bibliotecas de gráfico carregam no primeiro desenho, não na abertura do dashboard
+        import pandas as pd
+        import altair as alt
+
         # Normalizamos para o cache interno do worker
         lat_fixed = round(float(lat), 4)
         lon_fixed = round(float(lon), 4)
-        chave_local = f"{lat_fixed}_{lon_fixed}"
         
-        # 1. Gerenciamento de Dados (NASA)
-        if chave_local in st.session_state.cache_api_data:
-            dados_clima = st.session_state.cache_api_data[chave_local]
-        else:
-            with st.spinner("Buscando novos dados na NASA..."):
-                dados_clima = self.repository.get_standardized_data(lat_fixed, lon_fixed)
-                st.session_state.cache_api_data[chave_local] = dados_clima
-                st.success("✅ Dados carregados!")
+        # 1. Gerenciamento de Dados (cache do processo, compartilhado entre sessões)
+        dados_clima = obter_dados_climaticos(self.repository, lat_fixed, lon_fixed)
 
         # 2. Execução dos Cálculos (Dois Cenários)
         with st.spinner("Calculando modelos..."):
             # Cenário A: Seu Projeto
-            res_projeto = self.engine.calcular_projeto_solar(
-                lat=lat, lon=lon, inclinacao=inc, azimute=azi, 
-                albedo=alb, altura_instalacao=h, tecnologia=tec_chave, 
-                is_bifacial=modo_bifacial,
-                dados_pre_carregados=dados_clima,
-                orientacao=orientacao,
-                config_obstaculo=config_obstaculo
+            res_projeto = calcular_cenario(
+                self.engine, lat, lon, inc, azi, alb, h, tec_chave, modo_bifacial, orientacao,
+                config_obstaculo, dados_clima
             )
             
             # Cenário B: Padrão (Inclinação 0, Azimute 0)
-            res_padrao = self.engine.calcular_projeto_solar(
-                lat=lat, lon=lon, inclinacao=0, azimute=0, 
-                albedo=alb, altura_instalacao=h, tecnologia=tec_chave, 
-                is_bifacial=modo_bifacial,
-                dados_pre_carregados=dados_clima,
-                orientacao=orientacao,
-                config_obstaculo=None
+            res_padrao = calcular_cenario(
+                self.engine, lat, lon, 0, 0, alb, h, tec_chave, modo_bifacial, orientacao,
+                None, dados_clima
             )
             
             # --- EXIBIÇÃO DE MÉTRICAS E GRÁFICOS ---
@@ -131,7 +142,121 @@ class SolarDashboardRenderer:
                 # O .style.format força o Streamlit a mostrar 3 casas decimais em tudo
                 st.table(df_table.style.format("{:.3f}"))
 
+    def renderizar_mapa_orientacao(
+            self, lat, lon, inc, azi, alb, h, tec_chave, modo_bifacial,
+            orientacao, config_obstaculo, periodo="Anual", passo_inc=5, passo_azi=10):
+        """
+        Mapa de calor do HSP para todo o espaço inclinação × azimute (uma avaliação em lote, em cache).
+        Com obstáculo, a perda por sombreamento aparece como curvas de nível sobre o mapa.
+        """
+        import plotly.graph_objects as go
+
+        lat_fixed = round(float(lat), 4)
+        lon_fixed = round(float(lon), 4)
+        dados_clima = obter_dados_climaticos(self.repository, lat_fixed, lon_fixed)
+
+        with st.spinner("Calculando mapa de orientação..."):
+            mapa = calcular_mapa_orientacao(
+                self.engine, lat, lon, passo_inc, passo_azi, alb, h, tec_chave, modo_bifacial, orientacao,
+                config_obstaculo, dados_clima
+            )
+
+        meses = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+        if periodo == "Anual":
+            hsp, hsp_sem_sombra = mapa["media"], mapa["media_sem_sombra"]
+        else:
+            indice_mes = meses.index(periodo)
+            hsp, hsp_sem_sombra = mapa["mensal"][..., indice_mes], mapa["mensal_sem_sombra"][..., indice_mes]
+
+        # Ótimo do mapa (HSP líquido, já descontada a sombra quando há obstáculo)
+        i_max, j_max = np.unravel_index(np.argmax(hsp), hsp.shape)
+        inc_otima, azi_otimo = mapa["inclinacoes"][i_max], mapa["azimutes"][j_max]
+
+        col1, col2 = st.columns(2)
+        col1.metric(f"Melhor Orientação ({periodo})", f"{inc_otima:.0f}° / {azi_otimo:.0f}°", f"{hsp[i_max, j_max]:.3f} kWh/m²/dia")
+
+        fig = go.Figure(go.Heatmap(
+            x=mapa["azimutes"], y=mapa["inclinacoes"], z=hsp,
+            colorscale="YlOrRd", colorbar=dict(title="HSP"),
+            hovertemplate="Azimute: %{x:.0f}°<br>Inclinação: %{y:.0f}°<br>HSP: %{z:.3f}<extra></extra>",
+            name="HSP"
+        ))
+
+        if config_obstaculo:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                perda = np.where(hsp_sem_sombra > 0, (1 - hsp / hsp_sem_sombra) * 100, 0.0)
+            i_proj = self._indice_mais_proximo(mapa["inclinacoes"], inc)
+            j_proj = self._indice_mais_proximo(mapa["azimutes"], azi)
+            col2.metric("Perda por Sombreamento no Projeto", f"{perda[i_proj, j_proj]:.1f}%")
+            fig.add_trace(go.Contour(
+                x=mapa["azimutes"], y=mapa["inclinacoes"], z=perda,
+                contours=dict(coloring="lines", showlabels=True, labelfont=dict(color="black")),
+                line=dict(width=1.5, dash="dot"), colorscale=[[0, "black"], [1, "black"]],
+                showscale=False, name="Perda por Sombra (%)",
+                hovertemplate="Perda: %{z:.1f}%<extra></extra>"
+            ))
+
+        fig.add_trace(go.Scatter(
+            x=[azi], y=[inc], mode="markers", name="Seu Projeto",
+            marker=dict(symbol="x", size=14, color="#4b4bff", line=dict(width=2))
+        ))
+        fig.add_trace(go.Scatter(
+            x=[azi_otimo], y=[inc_otima], mode="markers", name="Melhor Orientação",
+            marker=dict(symbol="star", size=16, color="white", line=dict(width=1, color="black"))
+        ))
+
+        fig.update_layout(
+            title=f"HSP ({periodo}) por Inclinação × Azimute",
+            xaxis=dict(title="Azimute (°) — 0=N, 90=L, 180=S, 270=O", tickvals=[0, 90, 180, 270, 360]),
+            yaxis=dict(title="Inclinação (°)"),
+            height=600,
+            template="plotly_white",
+            legend=dict(orientation="h", y=-0.2)
+        )
+        st.plotly_chart(fig, width='stretch')
+
+    def renderizar_matriz_sombreamento(self, lat, h, config_obstaculo, orientacao="Retrato"):
+        """
+        Mapa de calor mês × horário da fração de radiação direta bloqueada pelo obstáculo.
+        A matriz é memorizada pelo motor por geometria do obstáculo, sem depender dos dados climáticos.
+        """
+        import plotly.graph_objects as go
+
+        res = self.engine.calcular_matriz_sombreamento(
+            lat=lat, config_obstaculo=config_obstaculo, altura_instalacao=h, orientacao=orientacao
+        )
+        meses = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+        rotulos_horas = [f"{int(hora):02d}:{int(round((hora % 1) * 60)):02d}" for hora in res["horas"]]
+        percentual = res["fracao_sombreada"] * 100
+
+        mes_critico = int(np.nanargmax(res["perda_media_mensal"]))
+        col1, col2 = st.columns(2)
+        perda_critica = res["perda_media_mensal"][mes_critico] * 100
+        col1.metric("Mês Mais Sombreado", meses[mes_critico], f"-{perda_critica:.1f}% de direta", delta_color="off")
+        col2.metric("Horários com Sombra", f"{int(np.sum(np.nan_to_num(percentual) > 0))} de {int(np.sum(~np.isnan(percentual)))}")
+
+        fig = go.Figure(go.Heatmap(
+            x=rotulos_horas, y=meses, z=percentual,
+            zmin=0, zmax=100, colorscale="Greys", colorbar=dict(title="Sombra (%)"),
+            hovertemplate="%{y} às %{x}<br>Radiação direta bloqueada: %{z:.0f}%<extra></extra>",
+            hoverongaps=False
+        ))
+        fig.update_layout(
+            title="Fração Sombreada por Mês × Horário (hora solar; vazio = sol abaixo do horizonte)",
+            xaxis=dict(title="Hora Solar"),
+            yaxis=dict(title="Mês", autorange="reversed"),
+            height=500,
+            template="plotly_white"
+        )
+        st.plotly_chart(fig, width='stretch')
+
+    @staticmethod
+    def _indice_mais_proximo(valores, alvo):
+        return int(np.argmin(np.abs(np.asarray(valores) - alvo)))
+
     def renderizar_grafico_sombra(self, meses_lista, mes_v, hora_sim, lat, h, usar_obstaculo, h_obs, d_obs, azi_obs, azi, orientacao="Paisagem"):
+        import plotly.graph_objects as go
+
         mes_num = meses_lista.index(mes_v) + 1
         dia_ano = datetime(2026, mes_num, 21).timetuple().tm_yday
         
@@ -151,17 +276,11 @@ class SolarDashboardRenderer:
         # =================================================================
         # Criamos o rastro na borda do gráfico (90% do raio máximo)
         rastro_distancia = max_r * 0.9 
-        traj_theta = []
-        alturaSol = []
-        
-        # Fazemos a varredura do dia para desenhar o caminho
-        for hr_track in np.linspace(5.5, 18.5, 60):
-            p_track = self.calcular_posicoes(lat, altura_ref, dia_ano, hr_track)
-            if p_track:
-                alturaSol.append(p_track[3]) # Guarda a altitude para possível uso futuro
-                traj_theta.append(p_track[0]) # Pega o Azimute do sol
+        # Varredura do dia inteiro em uma única chamada vetorizada (memorizada por latitude e dia)
+        _, alturas_sol, azimutes_sol = trajetoria_solar_dia(float(lat), dia_ano)
+        traj_theta = azimutes_sol[np.sin(np.radians(alturas_sol)) > 0.001]
         
-        if traj_theta:
+        if traj_theta.size:
             fig.add_trace(go.Scatterpolar(
                 r=[rastro_distancia] * len(traj_theta), 
                 theta=traj_theta,
@@ -206,16 +325,7 @@ class SolarDashboardRenderer:
             marker=dict(size=15, color='red', symbol='square')
         ))
 
-        # --- ELEMENTO 3: TRAJETÓRIA DO SOL ---
-        traj_theta, traj_r = [], []
-        for hr in np.linspace(5.5, 18.5, 60):
-            p = self.calcular_posicoes(lat, altura_ref, dia_ano, hr)
-            if p:
-                # Para o rastro do sol, mapeamos a altitude (90-alt) para caber na escala do gráfico
-                # Mas como o gráfico agora é focado em metros, o sol é apenas referencial
-                traj_theta.append(p[0])
-                traj_r.append(p[0]) # Apenas para rastro direcional
-
+        # --- ELEMENTO 3: DIREÇÃO DO SOL ---
         if pos_agora:
             # Indicador da direção do Sol (seta externa)
             fig.add_trace(go.Scatterpolar(
@@ -1 +1 @@
-from .schemas import ProjetoSolarRequest, ProjetoSolarResponse, ProjetoArranjoRequest, ArranjoSolarResponse
\ No newline at end of file
+from .schemas import ProjetoSolarRequest, ProjetoSolarResponse, ProjetoArranjoRequest, ArranjoSolarResponse, ArranjoColunarRequest, ArranjoColunarResponse, MatrizSombreamentoRequest, MatrizSombreamentoResponse
\ No newline at end of file
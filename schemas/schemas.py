@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, List
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+from typing import Optional, List, Union
 
 # --- MODELOS DE RESPOSTA (Para documentação no Swagger) ---
 class DadosHSPReal(BaseModel):
@@ -12,7 +12,9 @@ class DadosHSPReferencia(BaseModel):
 
 class UnidadeEnergia(BaseModel):
     real: DadosHSPReal = Field(..., description="Dados reais considerando sombreamento")
-    referencia: DadosHSPReferencia = Field(..., description="Dados de referência para comparação")
+    referencia: Optional[DadosHSPReferencia] = Field(
+        None, description="Dados de referência para comparação (omitido no modo compacto quando não há perda por sombra)"
+    )
 
 class ProjetoSolarResponse(BaseModel):
     hsp_unidade: UnidadeEnergia = Field(
@@ -54,6 +56,25 @@ class ArranjoSolarResponse(BaseModel):
     total_placas: int = Field(..., title="Total de Itens", description="Quantidade de placas processadas")
     resultados: List[ItemArranjoResponse] = Field(..., title="Lista de Resultados")
 
+class ArranjoColunarResponse(BaseModel):
+    total_placas: int = Field(..., title="Total de Itens", description="Quantidade de placas processadas")
+    id_placa: List[str] = Field(..., description="Identificadores na mesma ordem da requisição")
+    media: List[float] = Field(..., description="Média anual de HSP corrigida com perdas, por placa")
+    mensal: List[List[float]] = Field(..., description="12 valores mensais de HSP com perdas, por placa")
+    media_sem_sombra: List[float] = Field(..., description="Potencial teórico médio anual (Sem Sombra), por placa")
+    mensal_sem_sombra: List[List[float]] = Field(..., description="12 valores mensais teóricos (Sem Sombra), por placa")
+    perda_sombreamento_estimada: List[float] = Field(..., description="Perda por obstrução em percentual numérico (0 a 100)")
+
+class MatrizSombreamentoResponse(BaseModel):
+    meses: List[str] = Field(..., description="Rótulos das linhas da matriz")
+    horas: List[float] = Field(..., description="Horas solares verdadeiras das colunas (12.0 = meio-dia solar)")
+    fracao_sombreada: List[List[Optional[float]]] = Field(
+        ..., description="Fração da radiação direta bloqueada (0 a 1) por mês × hora; null com o sol abaixo do horizonte"
+    )
+    perda_media_mensal: List[Optional[float]] = Field(
+        ..., description="Média diurna da fração sombreada em cada mês; null nos meses sem sol (noite polar)"
+    )
+
 # --- MODELOS DE ENTRADA ---
 class ConfigObstaculo(BaseModel):
     altura_obstaculo: float = Field(
@@ -114,4 +135,89 @@ class ProjetoArranjoRequest(BaseModel):
     # Lista de placas/fileiras para analisar
     itens: List[ItemArranjoRequest]
 
+class MatrizSombreamentoRequest(BaseModel):
+    latitude: float = Field(..., json_schema_extra={"example": -5.8125})
+    distancia_centro_modulo_chao: float = Field(
+        0.15, title="Altura de Instalação", description="Altura do centro do módulo até o solo (m)"
+    )
+    comprimento_modulo: float = Field(2.278, title="Comprimento", description="Lado maior do painel em metros")
+    largura_modulo: float = Field(1.134, title="Largura", description="Lado menor do painel em metros")
+    orientacao: str = Field("Retrato", title="Orientação", description="Posicionamento: 'Retrato' ou 'Paisagem'")
+    config_obstaculo: ConfigObstaculo = Field(..., title="Configuração de Sombra")
+    intervalo_minutos: int = Field(
+        30, ge=5, le=120, title="Resolução", description="Passo entre as colunas da matriz (minutos)"
+    )
+
+class ArranjoColunarRequest(BaseModel):
+    """
+    Formato colunar (struct-of-arrays) para arranjos grandes: cada campo é uma lista com um valor por placa
+    ou um escalar aplicado a todas. Em `altura_obstaculo`, `null` indica placa sem obstáculo.
+    """
+    latitude: float = Field(..., json_schema_extra={"example": -7.562})
+    longitude: float = Field(..., json_schema_extra={"example": -37.688})
+    id_placa: Optional[List[str]] = Field(None, title="Identificadores", description="Se omitido, gera Placa_01, Placa_02...")
+    inclinacao_graus: List[float] = Field(..., title="Inclinações")
+    azimute_graus: List[float] = Field(..., title="Azimutes")
+    albedo_solo: Union[float, List[float]] = Field(0.2, title="Albedos")
+    distancia_centro_modulo_chao: Union[float, List[float]] = Field(0.15, title="Alturas de Instalação")
+    tecnologia_celula: Union[str, List[str]] = Field("TOPCON", title="Tecnologias")
+    is_bifacial: Union[bool, List[bool]] = Field(True, title="Bifacialidade")
+    comprimento_modulo: Union[float, List[float]] = Field(2.278, title="Comprimentos")
+    largura_modulo: Union[float, List[float]] = Field(1.134, title="Larguras")
+    orientacao: Union[str, List[str]] = Field("Retrato", title="Orientações")
+    altura_obstaculo: Optional[Union[float, List[Optional[float]]]] = Field(None, title="Alturas dos Obstáculos")
+    distancia_obstaculo: Union[float, List[Optional[float]]] = Field(1.0, title="Distâncias dos Obstáculos")
+    referencia_azimutal_obstaculo: Union[float, List[Optional[float]]] = Field(0.0, title="Azimutes dos Obstáculos")
+    largura_obstaculo: Union[float, List[Optional[float]]] = Field(10.0, title="Larguras dos Obstáculos")
+
+    @model_validator(mode="after")
+    def validar_comprimentos(self):
+        n = len(self.inclinacao_graus)
+        for campo, valor in self:
+            if isinstance(valor, list) and len(valor) != n:
+                raise ValueError(f"Coluna '{campo}' tem {len(valor)} valores; esperado {n}.")
+        return self
+
+class ObstaculoCena(BaseModel):
+    """Obstáculo em coordenadas locais (m, x para leste, y para norte); os campos usados dependem do tipo."""
+    tipo: str = Field("parede", title="Tipo", description="'parede', 'caixa' ou 'poste'")
+    altura: float = Field(..., title="Altura", description="Altura do topo em relação ao solo (m)")
+    inicio: Optional[List[float]] = Field(None, title="Início", description="Parede: ponto inicial [x, y]")
+    fim: Optional[List[float]] = Field(None, title="Fim", description="Parede: ponto final [x, y]")
+    centro: Optional[List[float]] = Field(None, title="Centro", description="Caixa e poste: centro [x, y]")
+    largura: Optional[float] = Field(None, title="Largura", description="Caixa: lado no eixo leste (m)")
+    profundidade: Optional[float] = Field(None, title="Profundidade", description="Caixa: lado no eixo norte (m)")
+    rotacao: Optional[float] = Field(None, title="Rotação", description="Caixa: giro horário em graus")
+    diametro: Optional[float] = Field(None, title="Diâmetro", description="Poste: diâmetro (m)")
+
+class ArranjoCenaRequest(BaseModel):
+    """
+    Cena completa: posições dos módulos e obstáculos enviados uma única vez. O servidor deriva as
+    relações módulo × obstáculo (ver core/cena.py), então o payload cresce com módulos + obstáculos.
+    Os demais campos seguem o formato colunar (lista com um valor por placa ou escalar para todas).
+    """
+    latitude: float = Field(..., json_schema_extra={"example": -7.562})
+    longitude: float = Field(..., json_schema_extra={"example": -37.688})
+    id_placa: Optional[List[str]] = Field(None, title="Identificadores", description="Se omitido, gera Placa_01, Placa_02...")
+    posicao_x: List[float] = Field(..., title="Posições X", description="Borda do módulo, metros para leste")
+    posicao_y: List[float] = Field(..., title="Posições Y", description="Borda do módulo, metros para norte")
+    inclinacao_graus: Union[float, List[float]] = Field(15.0, title="Inclinações")
+    azimute_graus: Union[float, List[float]] = Field(0.0, title="Azimutes")
+    albedo_solo: Union[float, List[float]] = Field(0.2, title="Albedos")
+    distancia_centro_modulo_chao: Union[float, List[float]] = Field(0.15, title="Alturas de Instalação")
+    tecnologia_celula: Union[str, List[str]] = Field("TOPCON", title="Tecnologias")
+    is_bifacial: Union[bool, List[bool]] = Field(True, title="Bifacialidade")
+    comprimento_modulo: Union[float, List[float]] = Field(2.278, title="Comprimentos")
+    largura_modulo: Union[float, List[float]] = Field(1.134, title="Larguras")
+    orientacao: Union[str, List[str]] = Field("Retrato", title="Orientações")
+    obstaculos: List[ObstaculoCena] = Field(default_factory=list, title="Obstáculos")
+
+    @model_validator(mode="after")
+    def validar_comprimentos(self):
+        n = len(self.posicao_x)
+        for campo, valor in self:
+            if campo != "obstaculos" and isinstance(valor, list) and len(valor) != n:
+                raise ValueError(f"Coluna '{campo}' tem {len(valor)} valores; esperado {n}.")
+        return self
+
 # --- ENDPOINTS ---
\ No newline at end of file
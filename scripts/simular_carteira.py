@@ -0,0 +1,309 @@
+"""
+Simulação de carteira: roda milhares de instalações direto no SolarEngine, sem passar pela API.
+
+Uso:
+    python -m scripts.simular_carteira instalacoes.csv --saida data/carteira
+    python -m scripts.simular_carteira instalacoes.parquet --saida data/carteira --workers 8
+    python -m scripts.simular_carteira instalacoes.csv --saida data/carteira --consolidar data/carteira.parquet
+    python -m scripts.simular_carteira instalacoes.csv --saida data/carteira --rb-tabelado
+
+Entrada (CSV ou Parquet): uma linha por instalação com `latitude`, `longitude`, opcionalmente `id`,
+e os campos de ConfigTecnicaBase (inclinacao_graus, azimute_graus, albedo_solo, ...). O obstáculo
+vem em colunas planas (altura_obstaculo, distancia_obstaculo, referencia_azimutal_obstaculo,
+largura_obstaculo). Campos ausentes ou vazios assumem os padrões da API. O CSV segue o `--locale`
+do exportador (padrão pt_BR: ';' e vírgula decimal).
+
+Saída: um diretório com partes Parquet (parte-000000.parquet, ...) e um _checkpoint.json. Cada parte
+é gravada de forma atômica e só então registrada no checkpoint: repetir o mesmo comando após uma
+queda processa apenas as partes que faltam. O diretório é lido como um único dataset
+(`pd.read_parquet("data/carteira")`); `--consolidar` também gera um arquivo único, em streaming.
+Instalações inválidas ou sem dados climatológicos não interrompem a carteira: saem com a coluna `erro`.
+`perda_sombreamento` sai em percentual (0 a 100), como `perda_sombreamento_estimada` na API.
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import FIRST_COMPLETED, wait
+from core.app import SolarEngine
+from core.parallel import dividir_em_chunks, obter_pool
+from schemas.schemas import ConfigObstaculo, ProjetoSolarRequest
+from utils.exporter import LOCALES_CSV, SolarExporter
+from utils.logger import get_logger
+
+logger = get_logger("carteira")
+
+TAMANHO_PARTE_PADRAO = 1_000
+# Prefixo "_": o pyarrow ignora o arquivo ao ler o diretório como dataset (assim como as partes ".tmp")
+NOME_CHECKPOINT = "_checkpoint.json"
+CAMPOS_OBSTACULO = tuple(ConfigObstaculo.model_fields)
+# Versão do formato das partes (2: perda_sombreamento em %); partes de outra versão não são misturadas
+VERSAO_SAIDA = 2
+CAMPOS_RESULTADO = ("media", "media_sem_sombra", "perda_sombreamento", "mensal", "mensal_sem_sombra", "fonte_dados")
+
+
+def esquema_saida():
+    """Esquema Arrow das partes: fixo, para que partes só com erros tenham os mesmos tipos das demais."""
+    import pyarrow as pa
+    return pa.schema([
+        ("id", pa.string()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("media", pa.float64()),
+        ("media_sem_sombra", pa.float64()),
+        ("perda_sombreamento", pa.float64()),  # percentual (0 a 100)
+        ("mensal", pa.list_(pa.float64())),
+        ("mensal_sem_sombra", pa.list_(pa.float64())),
+        ("fonte_dados", pa.string()),
+        ("erro", pa.string()),
+    ])
+
+
+# --- ENTRADA ---
+def ler_instalacoes(caminho, locale="pt_BR"):
+    """Lê a carteira (CSV ou Parquet) como lista de dicts, com células vazias como None e `id` garantido."""
+    import pandas as pd
+
+    if caminho.lower().endswith(".parquet"):
+        df = pd.read_parquet(caminho)
+    else:
+        convencao = LOCALES_CSV[locale]
+        df = pd.read_csv(caminho, sep=convencao["separador"], decimal=convencao["decimal"], encoding=convencao["encoding"])
+
+    registros = df.astype(object).where(df.notna(), None).to_dict("records")
+    for indice, registro in enumerate(registros):
+        registro["id"] = str(registro["id"]) if registro.get("id") is not None else str(indice)
+    return registros
+
+
+def assinatura_arquivo(caminho):
+    """SHA-256 do conteúdo: o checkpoint só é reaproveitado para a mesma entrada."""
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def parametros_instalacao(registro):
+    """Valida uma linha da carteira com o mesmo schema do POST /calcular."""
+    dados = {k: v for k, v in registro.items() if v is not None and k not in CAMPOS_OBSTACULO and k != "id"}
+    obstaculo = {k: registro[k] for k in CAMPOS_OBSTACULO if registro.get(k) is not None}
+    if obstaculo.get("altura_obstaculo"):
+        dados["config_obstaculo"] = obstaculo
+    return ProjetoSolarRequest.model_validate(dados)
+
+
+# --- WORKERS ---
+_ENGINE = None
+
+
+def _engine_do_processo():
+    """Um SolarEngine por processo: os caches dos provedores (Atlas INPE, PVGIS, NASA) valem para todas as partes."""
+    global _ENGINE
+    if _ENGINE is None:
+        from services.deps import Dependencies
+        _ENGINE = SolarEngine(repository=Dependencies.get_solar_repository(), usar_pool_processos=False)
+    return _ENGINE
+
+
+def simular_parte(registros, rb_tabelado=False):
+    """
+    Worker do pool: simula uma parte da carteira e devolve uma linha de saída por instalação.
+    `rb_tabelado` usa a tabela pré-calculada de rb (core/tabela_rb.py) no lugar da fórmula completa.
+    """
+    engine = _engine_do_processo()
+    linhas = []
+    for registro in registros:
+        linha = {"id": registro["id"], "latitude": registro.get("latitude"), "longitude": registro.get("longitude"),
+                 **dict.fromkeys(CAMPOS_RESULTADO), "erro": None}
+        try:
+            p = parametros_instalacao(registro)
+            dados_clima = engine.repository.get_standardized_data(p.latitude, p.longitude)
+            res = engine.calcular_projeto_solar(
+                lat=p.latitude, lon=p.longitude,
+                inclinacao=p.inclinacao_graus, azimute=p.azimute_graus,
+                albedo=p.albedo_solo, altura_instalacao=p.distancia_centro_modulo_chao,
+                tecnologia=p.tecnologia_celula, is_bifacial=p.is_bifacial,
+                comprimento_modulo=p.comprimento_modulo, largura_modulo=p.largura_modulo,
+                orientacao=p.orientacao, dados_pre_carregados=dados_clima,
+                config_obstaculo=p.config_obstaculo.model_dump() if p.config_obstaculo else None,
+                rb_tabelado=rb_tabelado,
+            )
+            linha.update(
+                media=res["media"],
+                media_sem_sombra=res["media_sem_sombra"],
+                perda_sombreamento=(1 - res["media"] / res["media_sem_sombra"]) * 100 if res["media_sem_sombra"] else 0.0,
+                mensal=res["mensal"],
+                mensal_sem_sombra=res["mensal_sem_sombra"],
+                fonte_dados=dados_clima.get("metadata", {}).get("source"),
+            )
+        except Exception as e:
+            linha["erro"] = str(e)
+        linhas.append(linha)
+    return linhas
+
+
+# --- CHECKPOINT ---
+class Checkpoint:
+    """
+    Registro das partes concluídas, regravado de forma atômica (arquivo temporário + os.replace)
+    a cada parte. Uma queda entre a gravação da parte e a do checkpoint só faz a parte ser refeita.
+    """
+
+    def __init__(self, diretorio, assinatura, tamanho_parte, total_partes, reiniciar=False, rb_tabelado=False):
+        self.caminho = os.path.join(diretorio, NOME_CHECKPOINT)
+        self.dados = {"assinatura": assinatura, "tamanho_parte": tamanho_parte,
+                      "total_partes": total_partes, "rb_tabelado": rb_tabelado, "versao_saida": VERSAO_SAIDA,
+                      "partes": {}}
+
+        if os.path.exists(self.caminho) and not reiniciar:
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                anterior = json.load(f)
+            chave_anterior = (anterior["assinatura"], anterior["tamanho_parte"], anterior.get("rb_tabelado", False),
+                              anterior.get("versao_saida", 1))
+            if chave_anterior != (assinatura, tamanho_parte, rb_tabelado, VERSAO_SAIDA):
+                raise ValueError(
+                    f"{self.caminho} pertence a outra entrada, outro --tamanho-parte, outro modo de rb "
+                    "ou outra versão do formato de saída. "
+                    "Use outro --saida ou --reiniciar."
+                )
+            self.dados["partes"] = anterior["partes"]
+
+    @property
+    def concluidas(self):
+        return {int(indice) for indice in self.dados["partes"]}
+
+    def registrar(self, indice, linhas, erros):
+        self.dados["partes"][str(indice)] = {"linhas": linhas, "erros": erros}
+        temporario = self.caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self.dados, f, indent=2)
+        os.replace(temporario, self.caminho)
+
+
+def caminho_parte(diretorio, indice):
+    return os.path.join(diretorio, f"parte-{indice:06d}.parquet")
+
+
+def gravar_parte(diretorio, indice, linhas):
+    """Grava a parte via exportador num temporário oculto e a publica com os.replace (atômico)."""
+    destino = caminho_parte(diretorio, indice)
+    temporario = os.path.join(diretorio, f".parte-{indice:06d}.parquet.tmp")
+    SolarExporter.exportar(temporario, linhas, formato="parquet", esquema=esquema_saida())
+    os.replace(temporario, destino)
+
+
+# --- ORQUESTRAÇÃO ---
+def simular_carteira(entrada, diretorio, workers=None, tamanho_parte=TAMANHO_PARTE_PADRAO, locale="pt_BR",
+                     reiniciar=False, em_progresso=None, rb_tabelado=False):
+    """
+    Simula a carteira `entrada` gravando partes Parquet em `diretorio`, retomando de um checkpoint.
+
+    :param workers: processos do pool (None = número de CPUs; 1 roda no próprio processo).
+    :param em_progresso: callback(indice, linhas_da_parte) chamado a cada parte gravada.
+    :param rb_tabelado: Modo rápido: rb pela tabela pré-calculada (core/tabela_rb.py). Faz parte do checkpoint,
+        para que uma retomada não misture partes dos dois modos.
+    :return: dict com o total de partes, partes processadas nesta execução, linhas e erros.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    if reiniciar:
+        # Partes de uma execução anterior (talvez com mais partes) não podem sobrar no dataset
+        for nome in os.listdir(diretorio):
+            if nome.startswith("parte-") and nome.endswith(".parquet"):
+                os.remove(os.path.join(diretorio, nome))
+    registros = ler_instalacoes(entrada, locale)
+    partes = dividir_em_chunks(registros, tamanho_parte)
+    checkpoint = Checkpoint(diretorio, assinatura_arquivo(entrada), tamanho_parte, len(partes), reiniciar,
+                            rb_tabelado)
+    pendentes = [i for i in range(len(partes)) if i not in checkpoint.concluidas]
+    logger.info("Carteira carregada", extra={"instalacoes": len(registros), "partes": len(partes),
+                                             "pendentes": len(pendentes)})
+
+    def concluir(indice, linhas):
+        gravar_parte(diretorio, indice, linhas)
+        checkpoint.registrar(indice, len(linhas), sum(1 for linha in linhas if linha["erro"]))
+        if em_progresso:
+            em_progresso(indice, linhas)
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        for indice in pendentes:
+            concluir(indice, simular_parte(partes[indice], rb_tabelado))
+    else:
+        # Janela de partes em voo: mantém os workers ocupados sem enfileirar a carteira inteira na memória
+        pool = obter_pool(workers)
+        fila = iter(pendentes)
+        em_voo = {}
+        while True:
+            while len(em_voo) < 2 * workers:
+                indice = next(fila, None)
+                if indice is None:
+                    break
+                em_voo[pool.submit(simular_parte, partes[indice], rb_tabelado)] = indice
+            if not em_voo:
+                break
+            prontos, _ = wait(em_voo, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                concluir(em_voo.pop(futuro), futuro.result())
+
+    partes_registradas = checkpoint.dados["partes"].values()
+    return {
+        "partes": len(partes),
+        "processadas_agora": len(pendentes),
+        "linhas": sum(p["linhas"] for p in partes_registradas),
+        "erros": sum(p["erros"] for p in partes_registradas),
+    }
+
+
+def consolidar(diretorio, destino):
+    """Junta as partes (na ordem da entrada) num único arquivo, em streaming pelo exportador."""
+    import pyarrow.parquet as pq
+
+    with open(os.path.join(diretorio, NOME_CHECKPOINT), "r", encoding="utf-8") as f:
+        total_partes = json.load(f)["total_partes"]
+
+    def linhas():
+        for indice in range(total_partes):
+            for lote in pq.ParquetFile(caminho_parte(diretorio, indice)).iter_batches():
+                yield from lote.to_pylist()
+
+    return SolarExporter.exportar(destino, linhas(), esquema=esquema_saida())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulação de carteira de instalações no SolarEngine")
+    parser.add_argument("entrada", help="CSV ou Parquet com uma instalação por linha")
+    parser.add_argument("--saida", default="data/carteira", help="Diretório das partes Parquet e do checkpoint")
+    parser.add_argument("--workers", type=int, default=None, help="Processos do pool (padrão: número de CPUs)")
+    parser.add_argument("--tamanho-parte", type=int, default=TAMANHO_PARTE_PADRAO, help="Instalações por parte/checkpoint")
+    parser.add_argument("--locale", default="pt_BR", choices=list(LOCALES_CSV), help="Convenção numérica do CSV de entrada")
+    parser.add_argument("--reiniciar", action="store_true", help="Ignora o checkpoint existente e refaz tudo")
+    parser.add_argument("--rb-tabelado", action="store_true",
+                        help="Modo rápido: rb pela tabela pré-calculada em data/tabelas (erro <= 5e-4)")
+    parser.add_argument("--consolidar", metavar="ARQUIVO", help="Ao final, junta as partes em um arquivo (.parquet, .csv ou .arrow)")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+
+    def em_progresso(indice, linhas):
+        erros = sum(1 for linha in linhas if linha["erro"])
+        print(f"[parte {indice:06d}] {len(linhas)} instalações, {erros} com erro "
+              f"({time.perf_counter() - inicio:.1f} s)")
+
+    resumo = simular_carteira(args.entrada, args.saida, args.workers, args.tamanho_parte, args.locale,
+                              args.reiniciar, em_progresso, args.rb_tabelado)
+    duracao = time.perf_counter() - inicio
+    print(f"\n{resumo['linhas']} instalações em {resumo['partes']} partes "
+          f"({resumo['processadas_agora']} nesta execução, {duracao:.1f} s); {resumo['erros']} com erro.")
+
+    if args.consolidar:
+        total = consolidar(args.saida, args.consolidar)
+        print(f"Consolidado: {total} linhas em {args.consolidar}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,29 @@
-from .nasa_power_provider import NasaPowerProvider
-from .inpe_labren_provider import InpeLabrenProvider
-from .pvgis_provider import PvgisProvider
-from .solar_data_provider import SolarDataProvider
+import importlib
+
+# Carregamento preguiçoso (PEP 562): cada provedor puxa dependências pesadas (pvlib, pandas,
+# requests) e só é importado no primeiro acesso à classe, não ao importar o pacote.
+_MODULOS = {
+    "NasaPowerProvider": ".nasa_power_provider",
+    "InpeLabrenProvider": ".inpe_labren_provider",
+    "PvgisProvider": ".pvgis_provider",
+    "SolarDataProvider": ".solar_data_provider",
+}
 
 __all__ = [
     "NasaPowerProvider",
     "InpeLabrenProvider",
     "PvgisProvider",
     "SolarDataProvider"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(nome):
+    if nome not in _MODULOS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    valor = getattr(importlib.import_module(_MODULOS[nome], __name__), nome)
+    globals()[nome] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,8 +1,20 @@
-import pandas as pd
 import numpy as np
 import os
+from functools import lru_cache
+from utils.metrics import REGISTRO
 from .solar_data_provider import SolarDataProvider
 
+
+@lru_cache(maxsize=2)
+def carregar_atlas(data_path):
+    """
+    Lê a base consolidada do Atlas uma única vez por processo (pandas/pyarrow só carregam aqui).
+    Compartilhada entre instâncias: a API cria um provider por requisição.
+    """
+    import pandas as pd
+    return pd.read_parquet(data_path)
+
+
 class InpeLabrenProvider(SolarDataProvider):
     """
     Provider para os dados do Atlas Brasileiro de Energia Solar - 2ª Edição (2017).
@@ -19,7 +31,12 @@ class InpeLabrenProvider(SolarDataProvider):
                 "do Atlas [cite: 41, 42] esteja na pasta correta."
             )
             
-        self.df = pd.read_parquet(data_path)
+        self.data_path = data_path
+
+    @property
+    def df(self):
+        """Grid do Atlas, carregado no primeiro uso e compartilhado entre instâncias."""
+        return carregar_atlas(self.data_path)
 
     def get_solar_data(self, lat: float, lon: float) -> dict:
         # Trava Geográfica: O Atlas INPE só é válido para a América do Sul
@@ -28,8 +45,9 @@ class InpeLabrenProvider(SolarDataProvider):
             raise ValueError(f"Coordenadas {lat}, {lon} fora da cobertura do Atlas INPE/LABREN.")
         
         # Busca por proximidade no grid de 10km x 10km 
-        distances = np.sqrt((self.df['LAT'] - lat)**2 + (self.df['LON'] - lon)**2)
-        row = self.df.iloc[distances.idxmin()]
+        df = self.df
+        distances = np.sqrt((df['LAT'] - lat)**2 + (df['LON'] - lon)**2)
+        row = df.iloc[distances.idxmin()]
         
         months = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
         
@@ -45,4 +63,6 @@ class InpeLabrenProvider(SolarDataProvider):
                 "resolution": "10km x 10km",
                 "attribution": "Pereira et al., 2017"
             }
-        }
\ No newline at end of file
+        }
+
+REGISTRO.registrar_cache("inpe_atlas", carregar_atlas)
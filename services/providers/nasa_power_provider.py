@@ -1,15 +1,20 @@
-import requests
 from functools import lru_cache
+from utils.logger import get_logger
+from utils.metrics import REGISTRO
 from .solar_data_provider import SolarDataProvider
 
+logger = get_logger("providers.nasa_power")
+
 
 class NasaPowerProvider(SolarDataProvider):
     def __init__(self):
+        self.name = "NASA POWER"
         self.url = "https://power.larc.nasa.gov/api/temporal/climatology/point"
 
     @staticmethod
     @lru_cache(maxsize=128)
     def _get_cached_data(url, lat, lon):
+        import requests
         params = {
             "parameters": "ALLSKY_SFC_SW_DWN,ALLSKY_SFC_SW_DIFF,T2M,T2M_MAX,RH2M,WS10M",
             "community": "SB",
@@ -17,12 +22,14 @@ class NasaPowerProvider(SolarDataProvider):
             "latitude": round(lat, 4),
             "format": "JSON"
         }
-        print(f"[NASA API] Buscando dados para {lat}, {lon}")
+        logger.info("Buscando dados na API", extra={"lat": lat, "lon": lon})
         response = requests.get(url, params=params, timeout=10)
         response.raise_for_status()
         return response.json()['properties']['parameter']
 
     def fetch_solar_data(self, lat: float, lon: float) -> dict:
+        # Import tardio: requests só carrega na primeira consulta à NASA
+        import requests
         lat_fixed = round(float(lat), 4)
         lon_fixed = round(float(lon), 4)
 
@@ -30,7 +37,7 @@ class NasaPowerProvider(SolarDataProvider):
             return self._get_cached_data(self.url, lat_fixed, lon_fixed)
         except requests.exceptions.RequestException as e:
             # Erro de rede (timeout, DNS, etc)
-            print(f"Erro de conexão com a NASA: {e}")
+            logger.error("Erro de conexão com a NASA", extra={"erro": str(e)})
             raise Exception("Serviço meteorológico temporariamente indisponível.")
 
     def get_solar_data(self, lat: float, lon: float):
@@ -48,4 +55,6 @@ class NasaPowerProvider(SolarDataProvider):
                 "lat": lat,
                 "lon": lon
             }
-        }
\ No newline at end of file
+        }
+
+REGISTRO.registrar_cache("nasa_power", NasaPowerProvider._get_cached_data)
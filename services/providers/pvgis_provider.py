@@ -1,9 +1,19 @@
-import pandas as pd
-from pvlib import iotools
+from typing import TYPE_CHECKING
 from functools import lru_cache
+import numpy as np
+from core.solar_geometry import DIAS_POR_MES
+from utils.logger import get_logger
+from utils.metrics import REGISTRO
 from .solar_data_provider import SolarDataProvider
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = get_logger("providers.pvgis")
+
 class PvgisProvider(SolarDataProvider):
+    fornece_serie_horaria = True
+
     def __init__(self):
         self.name = "PVGIS"
 
@@ -11,18 +21,45 @@ class PvgisProvider(SolarDataProvider):
     @lru_cache(maxsize=128)
     def _get_cached_data(lat, lon):
         """Acesso direto à API via PVLib com Cache."""
-        print(f"[PVGIS API] Buscando dados para {lat}, {lon}")
+        # Import tardio: pvlib (e o scipy que ele arrasta) só carrega na primeira consulta ao PVGIS
+        from pvlib import iotools
+        logger.info("Buscando dados na API", extra={"lat": lat, "lon": lon})
         data, _ = iotools.get_pvgis_tmy(
             latitude=lat, longitude=lon, map_variables=True, outputformat='json'
         )
         return data
 
-    def fetch_solar_data(self, lat: float, lon: float) -> pd.DataFrame:
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _get_cached_hourly(lat, lon):
+        """
+        Série horária do TMY em arrays float32/inteiros somente leitura (~140 KB por local, contra
+        ~600 KB do DataFrame bruto): repetir a simulação horária não reconverte o DataFrame.
+        """
+        df_hourly = PvgisProvider._get_cached_data(lat, lon)
+        indice = df_hourly.index
+        mes = indice.month.to_numpy() - 1
+        # No TMY cada mês vem de um ano de origem: o dia do ano é contado num ano não bissexto
+        # (meses de anos bissextos após fevereiro não ganham um dia; 29/02 vira o dia 59)
+        dia_ano = np.cumsum(DIAS_POR_MES)[mes] - DIAS_POR_MES[mes] + np.minimum(indice.day.to_numpy(), DIAS_POR_MES[mes])
+        serie = {
+            "irradiancia_global": df_hourly['ghi'].to_numpy(dtype=np.float32),
+            "irradiancia_difusa": df_hourly['dhi'].to_numpy(dtype=np.float32),
+            "mes": mes.astype(np.int8),
+            "dia_ano": dia_ano.astype(np.int16),
+            "hora_utc": (indice.hour.to_numpy() + indice.minute.to_numpy() / 60).astype(np.float32),
+        }
+        for array in serie.values():
+            array.flags.writeable = False
+        serie["longitude"] = lon
+        return serie
+
+    def fetch_solar_data(self, lat: float, lon: float) -> "pd.DataFrame":
         """Camada intermediária para manter simetria com NasaProvider."""
         try:
             return self._get_cached_data(lat, lon)
         except Exception as e:
-            print(f"Erro de conexão com o PVGIS: {e}")
+            logger.error("Erro de conexão com o PVGIS", extra={"erro": str(e)})
             raise Exception("Serviço PVGIS temporariamente indisponível.")
 
     def get_solar_data(self, lat: float, lon: float) -> dict:
@@ -46,4 +83,12 @@ class PvgisProvider(SolarDataProvider):
                 "lat": lat,
                 "lon": lon
             }
-        }
\ No newline at end of file
+        }
+
+    def get_hourly_data(self, lat: float, lon: float) -> dict:
+        """Série horária do TMY (8760 h, instantes em UTC) no contrato de `SolarDataProvider.get_hourly_data`."""
+        self.fetch_solar_data(lat, lon)  # Traduz falhas de rede como em get_solar_data
+        return self._get_cached_hourly(lat, lon)
+
+REGISTRO.registrar_cache("pvgis", PvgisProvider._get_cached_data)
+REGISTRO.registrar_cache("pvgis_horario", PvgisProvider._get_cached_hourly)
@@ -2,6 +2,8 @@ from abc import ABC, abstractmethod
 
 
 class SolarDataProvider(ABC):
+    # Provedores que publicam série horária (ex: TMY do PVGIS) declaram True e implementam get_hourly_data
+    fornece_serie_horaria = False
 
     @abstractmethod
     def get_solar_data(self, lat: float, lon: float) -> dict:
@@ -14,4 +16,20 @@ class SolarDataProvider(ABC):
             "wind_speed": [...]
         }
         """
-        pass
\ No newline at end of file
+        pass
+
+    def get_hourly_data(self, lat: float, lon: float) -> dict:
+        """
+        Série horária para o `PerezEngine(resolucao="horaria")`:
+        {
+            "irradiancia_global": [...],   # W/m², float32
+            "irradiancia_difusa": [...],   # W/m², float32
+            "mes": [...],                  # 0-11
+            "dia_ano": [...],              # 1-365
+            "hora_utc": [...],             # horas decimais
+            "longitude": lon
+        }
+        Só é chamado em provedores com `fornece_serie_horaria = True`; os que só publicam médias
+        mensais não a fornecem.
+        """
+        raise NotImplementedError(f"{self.name} declara fornece_serie_horaria sem implementar get_hourly_data.")
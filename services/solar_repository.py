@@ -1,7 +1,12 @@
+import time
 from typing import List
+from utils.logger import get_logger
+from utils.metrics import PROVEDOR_LATENCIA, PROVEDOR_ERROS
 from .providers.solar_data_provider import SolarDataProvider
 from .providers.inpe_labren_provider import InpeLabrenProvider
 
+logger = get_logger("repository")
+
 class SolarRepository:
     def __init__(self, providers: List[SolarDataProvider]):
         """
@@ -32,12 +37,39 @@ class SolarRepository:
 
         last_error = None
         for provider in ordered_providers:
+            inicio = time.perf_counter()
             try:
-                print(f"[Repository] Tentando provedor: {provider.name}")
+                logger.info("Tentando provedor", extra={"provedor": provider.name, "amostrado": True})
                 return provider.get_solar_data(lat, lon)
             except Exception as e:
-                print(f"[Repository] Falha no {provider.name}: {e}")
+                logger.warning("Falha no provedor", extra={"provedor": provider.name, "erro": str(e)})
+                PROVEDOR_ERROS.inc(provedor=provider.name)
                 last_error = e
                 continue
+            finally:
+                PROVEDOR_LATENCIA.observe(time.perf_counter() - inicio, provedor=provider.name)
         
-        raise Exception(f"Todos os provedores solares falharam. Último erro: {last_error}")
\ No newline at end of file
+        raise Exception(f"Todos os provedores solares falharam. Último erro: {last_error}")
+
+    def get_hourly_data(self, lat: float, lon: float):
+        """
+        Série horária do primeiro provedor que a fornece (hoje, o PVGIS).
+        Provedores só com médias mensais (INPE, NASA POWER) são pulados sem contar como falha.
+        """
+        last_error = None
+        for provider in self.providers:
+            if not getattr(provider, "fornece_serie_horaria", False):
+                continue
+            inicio = time.perf_counter()
+            try:
+                serie = provider.get_hourly_data(lat, lon)
+            except Exception as e:
+                logger.warning("Falha no provedor", extra={"provedor": provider.name, "erro": str(e)})
+                PROVEDOR_ERROS.inc(provedor=provider.name)
+                PROVEDOR_LATENCIA.observe(time.perf_counter() - inicio, provedor=provider.name)
+                last_error = e
+                continue
+            PROVEDOR_LATENCIA.observe(time.perf_counter() - inicio, provedor=provider.name)
+            return serie
+
+        raise Exception(f"Nenhum provedor forneceu a série horária. Último erro: {last_error}")
@@ -25,6 +25,31 @@ def test_calculo_simples_sucesso():
     assert "real" in data["kWh/m²/dia"]
     assert data["kWh/m²/dia"]["real"]["media"] > 0
 
+def test_calculo_resolucao_diaria():
+    """A resolução diária devolve o mesmo formato; o modo compacto (vetorizado mensal) a recusa"""
+    payload = {"latitude": -5.8125, "longitude": -35.1875, "inclinacao_graus": 15}
+    response = client.post("/calcular?resolucao=diaria", json=payload)
+    assert response.status_code == 200
+    assert len(response.json()["kWh/m²/dia"]["real"]["mensal"]) == 12
+
+    assert client.post("/calcular?resolucao=diaria&compacto=true", json=payload).status_code == 422
+
+def test_calculo_resolucao_horaria_sintetica():
+    """Perfil horário gerado das médias mensais do INPE: mesmo formato de resposta"""
+    payload = {"latitude": -5.8125, "longitude": -35.1875, "inclinacao_graus": 15}
+    response = client.post("/calcular?resolucao=horaria_sintetica", json=payload)
+    assert response.status_code == 200
+    assert response.json()["kWh/m²/dia"]["real"]["media"] > 0
+
+def test_calculo_modelo_difusa_perez1990():
+    """O modelo completo de Perez muda a difusa frontal e vale também no modo compacto (motor em lote)"""
+    payload = {"latitude": -5.8125, "longitude": -35.1875, "inclinacao_graus": 30}
+    padrao = client.post("/calcular", json=payload).json()["kWh/m²/dia"]["real"]["media"]
+    perez = client.post("/calcular?modelo_difusa=perez1990", json=payload).json()["kWh/m²/dia"]["real"]["media"]
+    compacto = client.post("/calcular?modelo_difusa=perez1990&compacto=true", json=payload).json()["kWh/m²/dia"]["real"]["media"]
+    assert perez != padrao
+    assert abs(compacto - perez) <= 1e-3
+
 def test_calculo_arranjo_cache_performance():
     """Teste de lote: Verifica se o cálculo de múltiplas placas funciona"""
     payload = {
@@ -73,4 +98,184 @@ def test_arredondamento_coordenadas():
     assert res1.status_code == 200
     assert res2.status_code == 200
     # Como as coordenadas arredondadas são iguais, os resultados de HSP devem ser idênticos
-    assert res1.json()["kWh/m²/dia"]["real"]["media"] == res2.json()["kWh/m²/dia"]["real"]["media"]
\ No newline at end of file
+    assert res1.json()["kWh/m²/dia"]["real"]["media"] == res2.json()["kWh/m²/dia"]["real"]["media"]
+
+def test_metrics_expoe_latencia_por_rota():
+    """Após uma chamada ao /calcular, o /metrics deve expor a latência da rota e os estágios do motor"""
+    client.post("/calcular", json={"latitude": -7.562, "longitude": -37.688})
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    corpo = response.text
+    assert 'hsp_http_request_duration_seconds_count{metodo="POST",rota="/calcular",status="200"}' in corpo
+    assert 'hsp_engine_stage_duration_seconds_count{estagio="geometria"}' in corpo
+    assert 'hsp_provider_fetch_duration_seconds_count{provedor="INPE/LABREN Atlas 2017"}' in corpo
+
+def test_id_de_correlacao_devolvido_no_header():
+    """O X-Request-ID enviado pelo cliente deve voltar na resposta (correlação com os logs)"""
+    response = client.post("/calcular", json={"latitude": -7.562, "longitude": -37.688}, headers={"X-Request-ID": "req-123"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Request-ID"] == "req-123"
+
+def test_arranjo_colunar_equivale_ao_formato_por_item():
+    """O formato colunar deve devolver os mesmos valores do /calcular-arranjo tradicional"""
+    obstaculo = {"altura_obstaculo": 4.0, "distancia_obstaculo": 2.0, "referencia_azimutal_obstaculo": 0.0, "largura_obstaculo": 4.0}
+    itens = [
+        {"id_placa": "P1", "inclinacao_graus": 10, "azimute_graus": 0, "distancia_centro_modulo_chao": 0.5, "config_obstaculo": obstaculo},
+        {"id_placa": "P2", "inclinacao_graus": 20, "azimute_graus": 90, "distancia_centro_modulo_chao": 0.2},
+    ]
+    por_item = client.post("/calcular-arranjo", json={"latitude": -5.8125, "longitude": -35.1875, "itens": itens}).json()
+
+    colunar = client.post("/calcular-arranjo-colunar", json={
+        "latitude": -5.8125, "longitude": -35.1875,
+        "id_placa": ["P1", "P2"],
+        "inclinacao_graus": [10, 20],
+        "azimute_graus": [0, 90],
+        "distancia_centro_modulo_chao": [0.5, 0.2],
+        "altura_obstaculo": [4.0, None],
+        "distancia_obstaculo": [2.0, None],
+        "referencia_azimutal_obstaculo": [0.0, None],
+        "largura_obstaculo": 4.0
+    })
+
+    assert colunar.status_code == 200
+    data = colunar.json()
+    assert data["total_placas"] == 2
+    for i, item in enumerate(por_item["resultados"]):
+        assert data["id_placa"][i] == item["id_placa"]
+        assert abs(data["media"][i] - item["kWh/m²/dia"]["real"]["media"]) <= 1e-3
+        assert data["perda_sombreamento_estimada"][i] == float(item["perda_sombreamento_estimada"].rstrip("%"))
+
+def test_arranjo_colunar_rejeita_colunas_de_tamanhos_diferentes():
+    response = client.post("/calcular-arranjo-colunar", json={
+        "latitude": -5.8125, "longitude": -35.1875, "inclinacao_graus": [10, 20], "azimute_graus": [0]
+    })
+    assert response.status_code == 422
+
+def test_arranjo_cena_deriva_relacoes_no_servidor():
+    """Posições e obstáculos enviados uma vez: fileiras mais perto da parede perdem mais; obstáculo distante não pesa"""
+    payload = {
+        "latitude": -5.8125,
+        "longitude": -35.1875,
+        "posicao_x": [0.0, 0.0, 0.0],
+        "posicao_y": [0.0, -2.5, -5.0],
+        "inclinacao_graus": 10,
+        "obstaculos": [{"tipo": "parede", "inicio": [-2.0, 2.0], "fim": [2.0, 2.0], "altura": 10.0}]
+    }
+    response = client.post("/calcular-arranjo-cena", json=payload)
+    assert response.status_code == 200
+    perdas = response.json()["perda_sombreamento_estimada"]
+    assert perdas[0] > perdas[1] > perdas[2] >= 0
+
+    distante = dict(payload, obstaculos=payload["obstaculos"] + [
+        {"tipo": "poste", "centro": [800.0, 800.0], "diametro": 0.3, "altura": 10.0}
+    ])
+    assert client.post("/calcular-arranjo-cena", json=distante).json()["perda_sombreamento_estimada"] == perdas
+
+    invalido = dict(payload, obstaculos=[{"tipo": "arvore", "centro": [0.0, 3.0], "altura": 5.0}])
+    assert client.post("/calcular-arranjo-cena", json=invalido).status_code == 422
+    assert client.post("/calcular-arranjo-cena", json=dict(payload, posicao_y=[0.0])).status_code == 422
+
+def test_arranjo_colunar_binario_npz():
+    """Ida e volta no formato NPZ"""
+    import io
+    import numpy as np
+
+    buffer = io.BytesIO()
+    np.savez(buffer, inclinacao_graus=np.array([10.0, 20.0, 30.0]), azimute_graus=np.zeros(3))
+    response = client.post(
+        "/calcular-arranjo-colunar/binario?latitude=-5.8125&longitude=-35.1875",
+        content=buffer.getvalue(), headers={"Content-Type": "application/x-npz"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-npz"
+    with np.load(io.BytesIO(response.content)) as resultado:
+        assert resultado["mensal"].shape == (3, 12)
+        assert (resultado["media"] > 0).all()
+
+def test_arranjo_colunar_binario_decodifica_fora_do_event_loop(monkeypatch):
+    """Decodificação e codificação rodam no threadpool (sem event loop na thread), junto do cálculo"""
+    import io
+    import asyncio
+    import numpy as np
+    import api
+
+    no_event_loop = []
+    def registrar(funcao):
+        def envoltorio(*args):
+            try:
+                asyncio.get_running_loop()
+                no_event_loop.append(True)
+            except RuntimeError:
+                no_event_loop.append(False)
+            return funcao(*args)
+        return envoltorio
+    monkeypatch.setattr(api, "ler_colunas", registrar(api.ler_colunas))
+    monkeypatch.setattr(api, "escrever_colunas", registrar(api.escrever_colunas))
+
+    buffer = io.BytesIO()
+    np.savez(buffer, inclinacao_graus=np.array([10.0]), azimute_graus=np.zeros(1))
+    response = client.post(
+        "/calcular-arranjo-colunar/binario?latitude=-5.8125&longitude=-35.1875",
+        content=buffer.getvalue(), headers={"Content-Type": "application/x-npz"}
+    )
+    assert response.status_code == 200
+    assert no_event_loop == [False, False]
+
+def test_modo_compacto_omite_referencia_sem_sombra():
+    """No modo compacto, o bloco 'referencia' só aparece quando há perda por sombra"""
+    obstaculo = {"altura_obstaculo": 4.0, "distancia_obstaculo": 2.0, "referencia_azimutal_obstaculo": 0.0, "largura_obstaculo": 4.0}
+    payload = {
+        "latitude": -5.8125, "longitude": -35.1875,
+        "itens": [
+            {"id_placa": "Livre", "inclinacao_graus": 10, "azimute_graus": 0},
+            {"id_placa": "Sombra", "inclinacao_graus": 10, "azimute_graus": 0, "config_obstaculo": obstaculo},
+        ]
+    }
+    completo = client.post("/calcular-arranjo", json=payload).json()
+    response = client.post("/calcular-arranjo?compacto=true", json=payload)
+
+    assert response.status_code == 200
+    livre, sombra = response.json()["resultados"]
+    assert "referencia" not in livre["kWh/m²/dia"]
+    assert "referencia" in sombra["kWh/m²/dia"]
+    assert len(livre["kWh/m²/dia"]["real"]["mensal"]) == 12
+    for compacto_item, completo_item in zip((livre, sombra), completo["resultados"]):
+        assert abs(compacto_item["kWh/m²/dia"]["real"]["media"] - completo_item["kWh/m²/dia"]["real"]["media"]) <= 1e-3
+
+def test_matriz_sombreamento_mes_hora():
+    """A matriz de sombreamento tem 12 linhas, uma coluna por horário e null à noite"""
+    payload = {
+        "latitude": -23.5,
+        "config_obstaculo": {"altura_obstaculo": 4.0, "distancia_obstaculo": 2.0, "referencia_azimutal_obstaculo": 0.0, "largura_obstaculo": 4.0},
+        "intervalo_minutos": 60
+    }
+    response = client.post("/sombreamento/matriz", json=payload)
+
+    assert response.status_code == 200
+    dados = response.json()
+    assert len(dados["horas"]) == 15
+    assert len(dados["fracao_sombreada"]) == 12
+    assert all(len(linha) == 15 for linha in dados["fracao_sombreada"])
+    assert dados["fracao_sombreada"][5][0] is None          # Junho, 05h: sol abaixo do horizonte
+    assert dados["fracao_sombreada"][5][7] > 0               # Junho, 12h: muro ao norte sombreia
+    assert dados["perda_media_mensal"][5] > dados["perda_media_mensal"][0]
+
+def test_perfil_sob_demanda_exige_token(tmp_path, monkeypatch):
+    """O header de perfil só é aceito com o token de administrador e devolve o id do perfil gravado"""
+    from utils import profiler
+    monkeypatch.setattr(profiler, "HSP_PROFILING_TOKEN", "segredo")
+    monkeypatch.setattr(profiler, "HSP_PROFILING_DIR", str(tmp_path))
+    payload = {"latitude": -5.8125, "longitude": -35.1875, "inclinacao_graus": 10, "azimute_graus": 0}
+
+    negado = client.post("/calcular", json=payload, headers={"X-HSP-Profile": "errado"})
+    assert negado.status_code == 200
+    assert "X-Profile-ID" not in negado.headers
+
+    response = client.post("/calcular", json=payload, headers={"X-HSP-Profile": "segredo"})
+    assert response.status_code == 200
+    perfil_id = response.headers["X-Profile-ID"]
+    assert [p.name for p in tmp_path.iterdir()] == [f"{perfil_id}_post_hsp.folded"]
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import MagicMock
-from dashboard.visualizations import SolarDashboardRenderer
+import numpy as np
+from dashboard.visualizations import SolarDashboardRenderer, obter_dados_climaticos, calcular_cenario, calcular_mapa_orientacao
 
 @pytest.fixture
 def mock_components():
@@ -17,13 +18,11 @@ def test_renderer_initialization(mock_components):
     assert renderer.repository == repo
 
 def test_cache_logic_integration(mock_components):
-    """Verifica se o renderer tenta buscar dados no repositório"""
+    """Verifica se o renderer busca dados no repositório uma única vez (cache compartilhado do processo)"""
     engine, repo = mock_components
     renderer = SolarDashboardRenderer(engine=engine, repository=repo)
-    
-    # Simula o comportamento do Streamlit session_state
-    import streamlit as st
-    st.session_state.cache_api_data = {}
+    obter_dados_climaticos.clear()
+    calcular_cenario.clear()
     
     # Mock do retorno do repositório
     repo.get_standardized_data.return_value = {"hsp_global": [5.0]*12}
@@ -31,12 +30,64 @@ def test_cache_logic_integration(mock_components):
 
     # Executa uma renderização parcial (apenas para testar o fluxo de dados)
     # Usamos valores arbitrários
-    renderer.renderizar_layout_comparativo(
+    parametros = dict(
         lat=-7.0, lon=-35.0, inc=15, azi=0, alb=0.2, h=1.0, 
         tec_chave="TOPCON", modo_bifacial=True, orientacao="Retrato",
         usar_obstaculo=False, config_obstaculo=None, nome_exibicao="Teste"
     )
+    renderer.renderizar_layout_comparativo(**parametros)
 
     # Verifica se o repositório foi chamado (provas de que a integração funciona)
+    repo.get_standardized_data.assert_called_once_with(-7.0, -35.0)
+    assert engine.calcular_projeto_solar.call_count == 2
+
+    # Um novo renderizador (outra sessão) reaproveita clima e cenários já calculados
+    SolarDashboardRenderer(engine=engine, repository=repo).renderizar_layout_comparativo(**parametros)
     repo.get_standardized_data.assert_called_once()
-    assert "-7.0_-35.0" in st.session_state.cache_api_data
\ No newline at end of file
+    assert engine.calcular_projeto_solar.call_count == 2
+
+def test_mapa_orientacao_em_cache(mock_components, monkeypatch):
+    """O mapa inclinação × azimute é calculado uma vez por local/parâmetros; mudar a orientação do projeto não recalcula"""
+    engine, repo = mock_components
+    renderer = SolarDashboardRenderer(engine=engine, repository=repo)
+    obter_dados_climaticos.clear()
+    calcular_mapa_orientacao.clear()
+    monkeypatch.setattr("dashboard.visualizations.st.plotly_chart", MagicMock())
+
+    repo.get_standardized_data.return_value = {"hsp_global": [5.0]*12}
+    grade = np.full((3, 2), 5.0)
+    engine.calcular_mapa_orientacao.return_value = {
+        "inclinacoes": np.array([0.0, 45.0, 90.0]), "azimutes": np.array([0.0, 180.0]),
+        "media": grade, "media_sem_sombra": grade,
+        "mensal": np.full((3, 2, 12), 5.0), "mensal_sem_sombra": np.full((3, 2, 12), 5.0)
+    }
+
+    parametros = dict(
+        lat=-7.0, lon=-35.0, alb=0.2, h=1.0, tec_chave="TOPCON", modo_bifacial=True,
+        orientacao="Retrato", config_obstaculo=None
+    )
+    renderer.renderizar_mapa_orientacao(inc=15, azi=0, **parametros)
+    renderer.renderizar_mapa_orientacao(inc=30, azi=90, periodo="Jun", **parametros)
+
+    assert engine.calcular_mapa_orientacao.call_count == 1
+
+def test_matriz_sombreamento_usa_motor(mock_components, monkeypatch):
+    """A matriz mês × hora vem do motor (que a memoriza por obstáculo) e é desenhada como mapa de calor"""
+    engine, repo = mock_components
+    renderer = SolarDashboardRenderer(engine=engine, repository=repo)
+    grafico = MagicMock()
+    monkeypatch.setattr("dashboard.visualizations.st.plotly_chart", grafico)
+
+    fracao = np.zeros((12, 3))
+    fracao[5, 1] = 0.5
+    fracao[:, 0] = np.nan
+    engine.calcular_matriz_sombreamento.return_value = {
+        "horas": np.array([6.0, 12.0, 18.0]), "altitude_sol": np.zeros((12, 3)),
+        "fracao_sombreada": fracao, "perda_media_mensal": np.nanmean(fracao, axis=1)
+    }
+    obstaculo = {"altura_obstaculo": 3.0, "distancia_obstaculo": 2.0, "referencia_azimutal_obstaculo": 0.0, "largura_obstaculo": 5.0}
+    renderer.renderizar_matriz_sombreamento(lat=-7.0, h=0.2, config_obstaculo=obstaculo)
+
+    engine.calcular_matriz_sombreamento.assert_called_once_with(lat=-7.0, config_obstaculo=obstaculo, altura_instalacao=0.2, orientacao="Retrato")
+    figura = grafico.call_args[0][0]
+    assert list(figura.data[0].x) == ["06:00", "12:00", "18:00"]
@@ -77,4 +77,55 @@ def test_estresse_arranjo_misto(engine_setup):
 
     assert perda_sombra > 40, "A sombra deveria ser drástica."
     assert perda_livre == 0.0, "ERRO: A sombra da placa anterior 'vazou' para o cálculo atual."
-    assert res_sombra["media"] < res_livre["media"], "A média com sombra deve ser menor que a livre."
\ No newline at end of file
+    assert res_sombra["media"] < res_livre["media"], "A média com sombra deve ser menor que a livre."
+
+def test_arranjo_pool_processos_equivale_execucao_local(engine_setup):
+    """
+    TESTE 3: O backend com pool de processos deve produzir exatamente o mesmo
+    resultado (e na mesma ordem) que a execução no próprio processo.
+    """
+    engine = engine_setup
+    engine.max_workers = 2
+    engine.tamanho_chunk = 3
+    engine.min_itens_paralelo = 0
+
+    obstaculo = {
+        "altura_obstaculo": 3.0,
+        "distancia_obstaculo": 2.0,
+        "largura_obstaculo": 4.0,
+        "referencia_azimutal_obstaculo": 0
+    }
+    itens = [
+        {
+            "id_placa": f"P{i}", "inclinacao_graus": 5 * i, "azimute_graus": 0, "albedo_solo": 0.2,
+            "distancia_centro_modulo_chao": 0.5, "tecnologia_celula": "TOPCON", "is_bifacial": True,
+            "comprimento_modulo": 2.278, "largura_modulo": 1.134, "orientacao": "Retrato",
+            "config_obstaculo": obstaculo if i % 2 else None
+        }
+        for i in range(8)
+    ]
+
+    local = engine.calcular_arranjo_completo(lat=-23.5, lon=-46.6, itens=itens, usar_pool_processos=False)
+    paralelo = engine.calcular_arranjo_completo(lat=-23.5, lon=-46.6, itens=itens, usar_pool_processos=True)
+
+    assert [r["id_placa"] for r in paralelo] == [f"P{i}" for i in range(8)]
+    assert paralelo == local
+
+def test_mapa_orientacao_reproduz_calculo_pontual(engine_setup):
+    """
+    TESTE: A varredura inclinação × azimute (uma avaliação em lote) deve coincidir
+    com o cálculo individual de cada orientação.
+    """
+    engine = engine_setup
+    obstaculo = {"altura_obstaculo": 3.0, "distancia_obstaculo": 2.0, "largura_obstaculo": 4.0, "referencia_azimutal_obstaculo": 0}
+
+    mapa = engine.calcular_mapa_orientacao(lat=-23.5, lon=-46.6, inclinacoes=[0, 20, 45], azimutes=[0, 90, 180, 270],
+                                           config_obstaculo=obstaculo)
+
+    assert mapa["media"].shape == (3, 4)
+    assert mapa["mensal"].shape == (3, 4, 12)
+    for i, inc in enumerate(mapa["inclinacoes"]):
+        for j, azi in enumerate(mapa["azimutes"]):
+            esperado = engine.calcular_projeto_solar(lat=-23.5, lon=-46.6, inclinacao=inc, azimute=azi, config_obstaculo=obstaculo)
+            assert mapa["media"][i, j] == pytest.approx(esperado["media"], abs=1e-3)
+            assert mapa["media_sem_sombra"][i, j] == pytest.approx(esperado["media_sem_sombra"], abs=1e-3)
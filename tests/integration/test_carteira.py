@@ -0,0 +1,98 @@
+import json
+import pytest
+from scripts.simular_carteira import NOME_CHECKPOINT, caminho_parte, consolidar, simular_carteira
+from utils.exporter import SolarExporter
+
+pytest.importorskip("pyarrow")
+
+def _carteira(caminho, n=7):
+    linhas = [{
+        "id": f"UC{i}",
+        "latitude": -5.79 - i * 0.5,
+        "longitude": -35.21 - i * 0.5,
+        "inclinacao_graus": 10 + i,
+        "azimute_graus": 0,
+        "altura_obstaculo": 3.0 if i == 1 else None,
+        "distancia_obstaculo": 2.0 if i == 1 else None,
+        "referencia_azimutal_obstaculo": 0.0 if i == 1 else None,
+    } for i in range(n)]
+    linhas[3]["inclinacao_graus"] = "plana"  # linha inválida não interrompe a carteira
+    SolarExporter.exportar(str(caminho), linhas)
+
+def test_carteira_grava_partes_e_isola_linhas_invalidas(tmp_path):
+    import pandas as pd
+    entrada, saida = tmp_path / "carteira.csv", tmp_path / "saida"
+    _carteira(entrada)
+
+    resumo = simular_carteira(str(entrada), str(saida), workers=1, tamanho_parte=3)
+
+    assert resumo == {"partes": 3, "processadas_agora": 3, "linhas": 7, "erros": 1}
+    df = pd.read_parquet(saida).set_index("id")
+    assert df.loc["UC3", "erro"] and pd.isna(df.loc["UC3", "media"])
+    # Percentual (0 a 100), como perda_sombreamento_estimada na API
+    uc1 = df.loc["UC1"]
+    assert uc1["perda_sombreamento"] == pytest.approx((1 - uc1["media"] / uc1["media_sem_sombra"]) * 100)
+    assert uc1["perda_sombreamento"] > 1
+    assert df.loc["UC0", "fonte_dados"].startswith("INPE")
+    assert len(df.loc["UC0", "mensal"]) == 12
+
+def test_carteira_retoma_do_checkpoint(tmp_path):
+    import pyarrow.parquet as pq
+    entrada, saida = tmp_path / "carteira.csv", tmp_path / "saida"
+    _carteira(entrada)
+    simular_carteira(str(entrada), str(saida), workers=1, tamanho_parte=3)
+
+    # Simula uma queda antes de a parte 1 ser registrada
+    checkpoint = saida / NOME_CHECKPOINT
+    dados = json.loads(checkpoint.read_text())
+    del dados["partes"]["1"]
+    checkpoint.write_text(json.dumps(dados))
+
+    refeitas = []
+    resumo = simular_carteira(str(entrada), str(saida), workers=1, tamanho_parte=3,
+                              em_progresso=lambda indice, linhas: refeitas.append(indice))
+
+    assert refeitas == [1]
+    assert resumo["linhas"] == 7
+
+    destino = tmp_path / "tudo.parquet"
+    assert consolidar(str(saida), str(destino)) == 7
+    assert pq.read_table(destino).column("id").to_pylist() == [f"UC{i}" for i in range(7)]
+    assert pq.read_table(caminho_parte(str(saida), 2)).num_rows == 1
+
+def test_checkpoint_de_outra_entrada_e_recusado(tmp_path):
+    entrada, saida = tmp_path / "carteira.csv", tmp_path / "saida"
+    _carteira(entrada)
+    simular_carteira(str(entrada), str(saida), workers=1, tamanho_parte=3)
+
+    _carteira(entrada, n=4)
+    with pytest.raises(ValueError):
+        simular_carteira(str(entrada), str(saida), workers=1, tamanho_parte=3)
+
+    resumo = simular_carteira(str(entrada), str(saida), workers=1, tamanho_parte=3, reiniciar=True)
+    assert resumo["linhas"] == 4
+
+    # Checkpoint anterior à versão do formato (perda em fração): as partes não são misturadas
+    checkpoint = saida / NOME_CHECKPOINT
+    dados = json.loads(checkpoint.read_text())
+    del dados["versao_saida"]
+    checkpoint.write_text(json.dumps(dados))
+    with pytest.raises(ValueError):
+        simular_carteira(str(entrada), str(saida), workers=1, tamanho_parte=3)
+    assert not (saida / "parte-000002.parquet").exists()
+
+def test_modo_rb_tabelado_faz_parte_do_checkpoint(tmp_path, monkeypatch):
+    import pandas as pd
+    from core import tabela_rb
+    monkeypatch.setattr(tabela_rb, "HSP_TABELA_RB_DIR", str(tmp_path / "tabelas"))
+    entrada, saida = tmp_path / "carteira.csv", tmp_path / "saida"
+    _carteira(entrada)
+    simular_carteira(str(entrada), str(saida), workers=1, tamanho_parte=3)
+    exato = pd.read_parquet(saida).set_index("id")
+
+    with pytest.raises(ValueError):
+        simular_carteira(str(entrada), str(saida), workers=1, tamanho_parte=3, rb_tabelado=True)
+
+    simular_carteira(str(entrada), str(saida), workers=1, tamanho_parte=3, reiniciar=True, rb_tabelado=True)
+    tabelado = pd.read_parquet(saida).set_index("id")
+    assert tabelado["media"].drop("UC3").to_numpy() == pytest.approx(exato["media"].drop("UC3").to_numpy(), rel=1e-6)
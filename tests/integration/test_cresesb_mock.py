@@ -38,4 +38,34 @@ def test_repository_com_dados_sundata(mock_cresesb_data):
     # 5. Validação: O valor de Janeiro em Natal deve ser 6.02
     assert resultado["hsp_global"][0] == 6.02
     assert len(resultado["hsp_global"]) == 12
-    print(f"\n[DADOS REAIS] Natal validado com sucesso: {resultado['hsp_global'][0]} HSP")
\ No newline at end of file
+    print(f"\n[DADOS REAIS] Natal validado com sucesso: {resultado['hsp_global'][0]} HSP")
+
+def test_auditoria_cresesb_uma_consulta_por_cidade(mock_cresesb_data):
+    """
+    A validação CRESESB busca o clima uma única vez por cidade (em paralelo) e
+    reproduz o fator de transposição do cálculo ponto a ponto.
+    """
+    from core.app import SolarEngine
+    from benchmarks.auditor import SolarAuditor, indexar_localidades
+
+    dados = {
+        "hsp_global": [5.0, 5.2, 5.5, 4.8, 4.2, 3.9, 4.1, 4.7, 5.3, 5.8, 5.6, 5.1],
+        "hsp_diffuse": [1.2, 1.3, 1.4, 1.1, 1.0, 0.9, 1.0, 1.2, 1.3, 1.5, 1.4, 1.2]
+    }
+    repo = MagicMock()
+    repo.get_standardized_data.return_value = dados
+    engine = SolarEngine(repository=repo)
+
+    resultados = SolarAuditor(engine, max_workers_clima=3).validar_transposicao_cresesb()
+
+    assert repo.get_standardized_data.call_count == len(mock_cresesb_data)
+    assert len(resultados) == sum(len(incs) - 1 for incs in mock_cresesb_data.values())
+
+    natal = next(r for r in resultados if r["Cidade"] == "Natal" and r["Angulo"] == 16)
+    with open("data/localidades.json", "r", encoding="utf-8") as f:
+        coords = indexar_localidades(json.load(f))["natal"]
+    lat, lon = coords["latitude"], coords["longitude"]
+    sim_0 = engine.calcular_projeto_solar(lat, lon, inclinacao=0, azimute=0, is_bifacial=False, dados_pre_carregados=dados)["media"]
+    sim_16 = engine.calcular_projeto_solar(lat, lon, inclinacao=16, azimute=0, is_bifacial=False, dados_pre_carregados=dados)["media"]
+    esperado = mock_cresesb_data["Natal"]["0"]["Anual"] * sim_16 / sim_0
+    assert natal["HSP_Estimado"] == pytest.approx(esperado, abs=1e-3)
@@ -0,0 +1,79 @@
+import pytest
+import numpy as np
+import pandas as pd
+from unittest import mock
+from core.app import SolarEngine
+from core.solar_geometry import posicao_solar_utc
+from services.solar_repository import SolarRepository
+from services.providers import InpeLabrenProvider, PvgisProvider
+
+LAT, LON = -5.8, -35.2
+
+def _tmy_ceu_claro(latitude, longitude, **kwargs):
+    """TMY sintético no formato de `iotools.get_pvgis_tmy(map_variables=True)`: céu claro, 25% de difusa"""
+    indice = pd.date_range("2010-01-01", periods=8760, freq="h", tz="UTC")
+    altitudes, _ = posicao_solar_utc(latitude, longitude, np.minimum(indice.dayofyear, 365), indice.hour)
+    ghi = 750 * np.maximum(np.sin(np.radians(altitudes)), 0)
+    return pd.DataFrame({"ghi": ghi, "dhi": 0.25 * ghi, "temp_air": 25.0, "wind_speed": 2.0}, index=indice), {}
+
+@pytest.fixture
+def pvgis_sintetico():
+    from pvlib import iotools
+    PvgisProvider._get_cached_data.cache_clear()
+    PvgisProvider._get_cached_hourly.cache_clear()
+    with mock.patch.object(iotools, "get_pvgis_tmy", _tmy_ceu_claro):
+        yield PvgisProvider()
+    PvgisProvider._get_cached_data.cache_clear()
+    PvgisProvider._get_cached_hourly.cache_clear()
+
+def test_serie_horaria_compacta_e_memorizada(pvgis_sintetico):
+    serie = pvgis_sintetico.get_hourly_data(LAT, LON)
+    assert serie["irradiancia_global"].dtype == np.float32
+    assert serie["irradiancia_global"].shape == (8760,)
+    assert not serie["irradiancia_difusa"].flags.writeable
+    assert pvgis_sintetico.get_hourly_data(LAT, LON) is serie
+
+    # A série horária reproduz as médias mensais do contrato padronizado
+    mensal = pvgis_sintetico.get_solar_data(LAT, LON)
+    hsp = np.bincount(serie["mes"], weights=serie["irradiancia_global"]) / np.bincount(serie["mes"]) * 0.024
+    assert np.allclose(hsp, mensal["hsp_global"], rtol=1e-5)
+
+def test_dia_do_ano_de_meses_bissextos_no_ano_de_referencia(pvgis_sintetico):
+    # TMY com fevereiro (29 dias) e março vindos de 2012: o dia do ano não pode avançar um dia
+    meses = [pd.date_range(f"{ano}-{mes:02d}-01", periods=pd.Period(f"{ano}-{mes:02d}").days_in_month * 24,
+                           freq="h", tz="UTC") for ano, mes in [(2010, 1), (2012, 2), (2012, 3)]]
+    indice = meses[0].append(meses[1]).append(meses[2])
+    tmy = pd.DataFrame({"ghi": 0.0, "dhi": 0.0}, index=indice)
+    with mock.patch.object(PvgisProvider, "_get_cached_data", lambda lat, lon: tmy):
+        serie = PvgisProvider._get_cached_hourly(LAT, LON)
+    dias = pd.Series(serie["dia_ano"], index=indice)
+    assert dias["2012-02-28"].iloc[0] == dias["2012-02-29"].iloc[0] == 59
+    assert dias["2012-03-01"].iloc[0] == 60
+    assert dias["2012-03-31"].iloc[0] == 90
+
+def test_repositorio_pula_provedores_sem_serie_horaria(pvgis_sintetico):
+    repo = SolarRepository(providers=[InpeLabrenProvider(), pvgis_sintetico])
+    assert repo.get_hourly_data(LAT, LON) is pvgis_sintetico.get_hourly_data(LAT, LON)
+
+    with pytest.raises(Exception, match="série horária"):
+        SolarRepository(providers=[InpeLabrenProvider()]).get_hourly_data(LAT, LON)
+
+    # Quem declara a capacidade e falha (mesmo com NotImplementedError) conta como falha, não é pulado
+    class Incompleto(InpeLabrenProvider):
+        fornece_serie_horaria = True
+    with pytest.raises(Exception, match="get_hourly_data"):
+        SolarRepository(providers=[Incompleto()]).get_hourly_data(LAT, LON)
+
+def test_simulacao_horaria_equivale_a_mensal(pvgis_sintetico):
+    engine = SolarEngine(SolarRepository(providers=[pvgis_sintetico]))
+    parametros = dict(lat=LAT, lon=LON, inclinacao=15, azimute=0, altura_instalacao=0.5)
+
+    mensal = engine.calcular_projeto_solar(**parametros)
+    horario = engine.calcular_projeto_solar(**parametros, resolucao="horaria")
+    assert len(horario["mensal"]) == 12
+    assert horario["media"] == pytest.approx(mensal["media"], rel=0.02)
+
+    # Com a incidência de cada hora, um plano a leste num dia simétrico fica próximo do horizontal
+    leste = engine.calcular_projeto_solar(**dict(parametros, azimute=90), resolucao="horaria")
+    plano = engine.calcular_projeto_solar(**dict(parametros, inclinacao=0), resolucao="horaria")
+    assert leste["media"] == pytest.approx(plano["media"], rel=0.02)
@@ -0,0 +1,54 @@
+import pytest
+import numpy as np
+from core.perez_engine import PerezEngine
+from core.batch_engine import PerezEngineLote, normalizar_colunas
+from core.modelo_perez import MODELOS_DIFUSA
+
+DADOS = {
+    "hsp_global": [5.0, 5.2, 5.5, 4.8, 4.2, 3.9, 4.1, 4.7, 5.3, 5.8, 5.6, 5.1],
+    "hsp_diffuse": [1.2, 1.3, 1.4, 1.1, 1.0, 0.9, 1.0, 1.2, 1.3, 1.5, 1.4, 1.2]
+}
+
+OBSTACULOS = [
+    None,
+    {"altura_obstaculo": 3.0, "distancia_obstaculo": 2.0, "referencia_azimutal_obstaculo": 0.0, "largura_obstaculo": 4.0},
+    {"altura_obstaculo": 5.0, "distancia_obstaculo": 1.5, "referencia_azimutal_obstaculo": 90.0, "largura_obstaculo": 10.0},
+]
+
+@pytest.mark.parametrize("modelo_difusa", MODELOS_DIFUSA)
+@pytest.mark.parametrize("lat", [-23.5, -5.8, 40.0])
+def test_motor_vetorizado_reproduz_motor_escalar(lat, modelo_difusa):
+    """O caminho colunar deve reproduzir o PerezEngine placa a placa (diferença apenas de arredondamento)."""
+    casos = [(inc, azi, obs, bif) for inc in (0, 15, 90) for azi in (0, 135, 270)
+             for obs in OBSTACULOS for bif in (True, False)]
+    colunas = normalizar_colunas({
+        "inclinacao_graus": [c[0] for c in casos],
+        "azimute_graus": [c[1] for c in casos],
+        "is_bifacial": [c[3] for c in casos],
+        "distancia_centro_modulo_chao": 0.5,
+        "tecnologia_celula": "TOPCON",
+        "altura_obstaculo": [c[2]["altura_obstaculo"] if c[2] else None for c in casos],
+        "distancia_obstaculo": [c[2]["distancia_obstaculo"] if c[2] else None for c in casos],
+        "referencia_azimutal_obstaculo": [c[2]["referencia_azimutal_obstaculo"] if c[2] else None for c in casos],
+        "largura_obstaculo": [c[2]["largura_obstaculo"] if c[2] else None for c in casos],
+    })
+    res = PerezEngineLote(lat, modelo_difusa=modelo_difusa).calcular(DADOS, colunas)
+
+    for i, (inc, azi, obs, bif) in enumerate(casos):
+        esperado = PerezEngine(lat, is_bifacial=bif, fator_bifacial=0.80, altura_instalacao=0.5,
+                               modelo_difusa=modelo_difusa) \
+            .calcular_hsp_corrigido_inc_azi(DADOS, inc, azi, config_obstaculo=obs)
+        assert res["media"][i] == pytest.approx(esperado["media"], abs=1e-3)
+        np.testing.assert_allclose(res["mensal"][i], esperado["mensal"], atol=1e-3)
+        np.testing.assert_allclose(res["mensal_sem_sombra"][i], esperado["mensal_sem_sombra"], atol=1e-3)
+        assert round(res["perda_sombreamento"][i], 1) == float(esperado["perda_sombreamento_estimada"].rstrip("%"))
+
+def test_normalizar_colunas_rejeita_comprimentos_divergentes():
+    with pytest.raises(ValueError, match="albedo_solo"):
+        normalizar_colunas({"inclinacao_graus": [10, 20], "azimute_graus": [0, 0], "albedo_solo": [0.2]})
+
+def test_normalizar_colunas_replica_escalares():
+    colunas = normalizar_colunas({"inclinacao_graus": [10, 20, 30], "azimute_graus": 0})
+    assert colunas["azimute_graus"].tolist() == [0.0, 0.0, 0.0]
+    assert colunas["id_placa"].tolist() == ["Placa_01", "Placa_02", "Placa_03"]
+    assert np.isnan(colunas["altura_obstaculo"]).all()
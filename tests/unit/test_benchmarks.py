@@ -0,0 +1,86 @@
+import pytest
+from benchmarks.performance import comparar_com_baseline, medir
+
+def test_regressao_detectada_acima_do_limiar():
+    baseline = {"rapido": {"mediana_s": 0.010}, "estavel": {"mediana_s": 0.010}, "novo": None}
+    resultados = {"rapido": {"mediana_s": 0.014}, "estavel": {"mediana_s": 0.012}, "novo": {"mediana_s": 1.0}}
+
+    regressoes = comparar_com_baseline(resultados, baseline, limiar=0.25)
+
+    assert [r["nome"] for r in regressoes] == ["rapido"]
+    assert round(regressoes[0]["variacao"], 2) == 0.40
+
+def test_ruido_de_microssegundos_nao_e_regressao():
+    """Benchmarks muito rápidos variam proporcionalmente muito sem significar regressão"""
+    assert comparar_com_baseline({"micro": {"mediana_s": 20e-6}}, {"micro": {"mediana_s": 10e-6}}) == []
+
+def test_medir_executa_aquecimento_e_repeticoes():
+    chamadas = []
+    estatisticas = medir(lambda: chamadas.append(1), repeticoes=5, aquecimento=2)
+    assert len(chamadas) == 7
+    assert estatisticas["repeticoes"] == 5
+    assert estatisticas["minimo_s"] <= estatisticas["mediana_s"]
+
+def test_gerador_de_carga_respeita_mix_e_monta_payloads_validos():
+    import random
+    from benchmarks.carga import montar_gerador_payloads
+    from schemas.schemas import ProjetoSolarRequest, ProjetoArranjoRequest
+
+    sortear = montar_gerador_payloads(random.Random(1), {"calcular": 1, "arranjo": 1}, itens_arranjo=5)
+    sorteios = [sortear() for _ in range(200)]
+
+    assert {chave for chave, _ in sorteios} == {"calcular", "arranjo"}
+    for chave, payload in sorteios:
+        modelo = ProjetoSolarRequest if chave == "calcular" else ProjetoArranjoRequest
+        modelo.model_validate(payload)
+
+def test_resumo_de_carga_calcula_percentis_e_erros():
+    from benchmarks.carga import resumir
+    amostras = [("calcular", i / 1000, True) for i in range(1, 100)] + [("arranjo", 0.5, False)]
+
+    resumo = resumir(amostras, duracao=10.0)
+
+    assert resumo["total"]["requisicoes"] == 100
+    assert resumo["total"]["vazao_rps"] == 10.0
+    assert resumo["arranjo"]["taxa_erro"] == 1.0
+    assert resumo["calcular"]["p50_ms"] == 50.0
+
+def test_medir_memoria_desconta_o_que_ja_estava_alocado():
+    from benchmarks.memoria import medir_memoria
+    ja_alocado = bytearray(4 * 2**20)
+
+    medicao = medir_memoria(lambda: [bytearray(2**20) for _ in range(3)])
+
+    assert 3 * 2**20 <= medicao["retido_bytes"] < 4 * 2**20
+    assert medicao["pico_bytes"] >= medicao["retido_bytes"]
+    assert ja_alocado
+
+def test_regressao_de_memoria_ignora_ruido_do_alocador():
+    from benchmarks.memoria import RUIDO_MINIMO_BYTES
+    baseline = {"cache": {"pico_bytes": 1000}, "lote": {"pico_bytes": 10 * 2**20}}
+    resultados = {"cache": {"pico_bytes": 3000}, "lote": {"pico_bytes": 12 * 2**20}}
+
+    regressoes = comparar_com_baseline(resultados, baseline, limiar=0.1, chave="pico_bytes",
+                                       ruido_minimo=RUIDO_MINIMO_BYTES)
+
+    assert [(r["nome"], r["chave"]) for r in regressoes] == [("lote", "pico_bytes")]
+
+def test_cenario_de_memoria_roda_isolado_e_atribui_o_cache_ao_provedor():
+    from benchmarks.memoria import executar_benchmarks_memoria
+    resultados = executar_benchmarks_memoria(filtro="nasa_cache_cheio")
+
+    medicao = resultados["provedores.nasa_cache_cheio"]
+    assert medicao["retido_bytes"] > 0
+    assert next(iter(medicao["componentes"])) == "services/providers/nasa_power_provider.py"
+
+def test_ranking_de_importacao_agrega_por_pacote():
+    from benchmarks.inicializacao import pacotes_mais_pesados
+    saida = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       500 |        500 |     pandas._libs\n"
+        "import time:       300 |        800 |   pandas\n"
+        "import time:      1000 |       1000 | fastapi\n"
+    )
+    ranking = pacotes_mais_pesados(saida)
+    assert [pacote for pacote, _ in ranking] == ["fastapi", "pandas"]
+    assert ranking[1][1] == pytest.approx(0.0008)
@@ -0,0 +1,108 @@
+import pytest
+import numpy as np
+from core import cena, estagios
+from core.shadow_engine import ShadowEngine
+from core.batch_engine import PerezEngineLote, normalizar_colunas
+
+DADOS = {"hsp_global": [5.0] * 12, "hsp_diffuse": [1.2] * 12}
+PAREDE = {"tipo": "parede", "inicio": (-2.0, 2.0), "fim": (2.0, 2.0), "altura": 3.0}
+
+def _modulos(x, y, altura=0.5):
+    n = len(x)
+    return {"x": np.asarray(x, dtype=float), "y": np.asarray(y, dtype=float), "altura_instalacao": np.full(n, altura),
+            "dimensao": np.full(n, 2.278), "largura": np.full(n, 1.134)}
+
+def test_sombras_sobrepostas_nao_somam():
+    modulos = _modulos([0.0], [0.0])
+    uma = cena.perdas_cena(-23.5, modulos, [PAREDE])
+    assert uma.max() > 0.1
+    np.testing.assert_array_equal(cena.perdas_cena(-23.5, modulos, [PAREDE, PAREDE]), uma)
+
+    # Duas metades da mesma parede: a união reproduz a parede inteira
+    metades = [dict(PAREDE, fim=(0.0, 2.0)), dict(PAREDE, inicio=(0.0, 2.0))]
+    np.testing.assert_allclose(cena.perdas_cena(-23.5, modulos, metades), uma)
+
+def test_caixa_equivale_as_quatro_faces():
+    caixa = {"tipo": "caixa", "centro": (1.0, 3.0), "largura": 2.0, "profundidade": 1.0, "rotacao": 30.0, "altura": 4.0}
+    segmentos, _ = cena.decompor_obstaculos([caixa])
+    faces = [{"tipo": "parede", "inicio": tuple(s[:2]), "fim": tuple(s[2:4]), "altura": 4.0} for s in segmentos]
+    modulos = _modulos([0.0, 3.0], [0.0, 0.5])
+    np.testing.assert_allclose(cena.perdas_cena(-23.5, modulos, [caixa]), cena.perdas_cena(-23.5, modulos, faces))
+    assert cena.perdas_cena(-23.5, modulos, [caixa]).max() > 0
+
+def test_poste_cobre_apenas_a_faixa_do_diametro():
+    poste = {"tipo": "poste", "centro": (0.0, 3.0), "diametro": 0.3, "altura": 8.0}
+    largo = dict(poste, diametro=1.134 * 2)
+    modulos = _modulos([0.0], [0.0])
+    estreito, cheio = cena.perdas_cena(-23.5, modulos, [poste]), cena.perdas_cena(-23.5, modulos, [largo])
+    assert 0 < estreito.max() < cheio.max() * 0.3
+
+def test_teste_geometrico_so_descarta_pares_sem_sombra(monkeypatch):
+    rng = np.random.default_rng(49)
+    modulos = _modulos(rng.uniform(-10, 10, 40), rng.uniform(-10, 10, 40), altura=0.3)
+    obstaculos = [{"tipo": "parede", "inicio": tuple(p), "fim": tuple(p + rng.uniform(-3, 3, 2)), "altura": h}
+                  for p, h in zip(rng.uniform(-15, 15, (15, 2)), rng.uniform(0.2, 4, 15))]
+    obstaculos += [{"tipo": "poste", "centro": tuple(p), "diametro": 0.3, "altura": 6.0} for p in rng.uniform(-15, 15, (5, 2))]
+
+    com_teste = cena.perdas_cena(-23.5, modulos, obstaculos)
+    segmentos, circulos = cena.decompor_obstaculos(obstaculos)
+    mantidos, _ = cena.pares_candidatos(-23.5, modulos, segmentos, circulos)
+    assert 0 < len(mantidos) < len(modulos["x"]) * (len(segmentos) + len(circulos))
+
+    monkeypatch.setattr(cena, "_altitude_minima", lambda envelope, inicio, largura: np.full(np.shape(inicio), -np.inf))
+    np.testing.assert_array_equal(cena.perdas_cena(-23.5, modulos, obstaculos), com_teste)
+
+def test_indice_espacial_descarta_obstaculos_distantes_sem_mudar_o_resultado():
+    # Dois grupos de módulos a 500 m: cada obstáculo só forma pares com os módulos do próprio grupo
+    rng = np.random.default_rng(50)
+    x = np.concatenate([rng.uniform(0, 20, 30), rng.uniform(500, 520, 30)])
+    modulos = _modulos(x, rng.uniform(0, 20, 60), altura=0.3)
+    obstaculos = [{"tipo": "parede", "inicio": (cx, 25.0), "fim": (cx + 20, 25.0), "altura": 3.0} for cx in (0.0, 500.0)]
+    obstaculos.append({"tipo": "poste", "centro": (510.0, 22.0), "diametro": 0.3, "altura": 8.0})
+
+    segmentos, circulos = cena.decompor_obstaculos(obstaculos)
+    modulo, primitiva = cena.pares_proximos(-23.5, modulos, segmentos, circulos)
+    assert set(primitiva[modulo < 30]) == {0}
+    assert set(primitiva[modulo >= 30]) == {1, 2}
+
+    np.testing.assert_array_equal(cena.perdas_cena(-23.5, modulos, obstaculos),
+                                  cena.perdas_cena(-23.5, modulos, obstaculos, tamanho_celula=None))
+    assert cena.perdas_cena(-23.5, modulos, obstaculos).max() > 0
+
+def test_obstaculo_que_nunca_recebe_o_sol_e_descartado():
+    # A 30°S o sol nunca passa ao sul abaixo de ~83° de altitude: um muro ao sul não sombreia
+    modulos = _modulos([0.0], [0.0])
+    segmentos, circulos = cena.decompor_obstaculos([{"inicio": (-1.0, -3.0), "fim": (1.0, -3.0), "altura": 2.0}])
+    assert len(cena.pares_candidatos(-30.0, modulos, segmentos, circulos)[0]) == 0
+
+def test_parede_unica_difere_do_modelo_relativo_pela_distancia_ao_longo_do_raio():
+    # O ShadowEngine compara a sombra com a distância perpendicular d e conta a noite como perda total;
+    # a cena usa d / cos(delta az) e ignora o sol abaixo de ALTITUDE_MINIMA_SOMBRA
+    _, _, altitudes, azimutes = estagios.geometria(-23.5)
+    delta = np.abs(azimutes)
+    delta = np.where(delta > 180, 360 - delta, delta)
+    with np.errstate(divide="ignore"):
+        distancia_raio = np.where(delta < 90, 2.0 / np.cos(np.radians(delta)), np.inf)
+    # Largura escalada com a distância: mantém a abertura angular atan(2 / 2) da parede de 4 m
+    pelo_raio = ShadowEngine().estimar_perda_sombreamento_vetorizado(
+        altitudes, azimutes, 0.5, 2.278, 3.0, distancia_raio, 0.0, 2.0 * distancia_raio)
+    pelo_raio = np.where(altitudes > cena.ALTITUDE_MINIMA_SOMBRA, pelo_raio, 0.0).mean(axis=1)
+
+    parede = cena.perdas_cena(-23.5, _modulos([0.0], [0.0]), [PAREDE])[0]
+    relativo = np.asarray(estagios.perdas_sombreamento(-23.5, 0.5, 2.278, 3.0, 2.0, 0.0, 4.0))
+    np.testing.assert_allclose(parede, pelo_raio, atol=1e-12)
+    assert (parede <= relativo).all()
+    assert parede[5] == pytest.approx(0.241, abs=1e-3) and relativo[5] == pytest.approx(0.302, abs=1e-3)
+
+def test_cena_no_motor_em_lote():
+    colunas = normalizar_colunas({"inclinacao_graus": [15, 15, 15], "azimute_graus": 0,
+                                  "posicao_x": [0.0, 0.0, 0.0], "posicao_y": [0.0, -2.5, -5.0]})
+    res = PerezEngineLote(-23.5).calcular(DADOS, colunas, obstaculos=[dict(PAREDE, altura=6.0)])
+    # Fileiras mais distantes da parede perdem menos
+    assert res["perda_sombreamento"][0] > res["perda_sombreamento"][1] > res["perda_sombreamento"][2] >= 0
+    assert (res["media"] <= res["media_sem_sombra"]).all()
+
+    with pytest.raises(ValueError):
+        PerezEngineLote(-23.5).calcular(DADOS, dict(colunas, altura_obstaculo=np.full(3, 2.0)), obstaculos=[PAREDE])
+    with pytest.raises(ValueError):
+        cena.decompor_obstaculos([{"tipo": "arvore", "altura": 5.0}])
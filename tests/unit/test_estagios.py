@@ -0,0 +1,49 @@
+import pytest
+from core import estagios
+from core.perez_engine import PerezEngine
+
+DADOS = {"hsp_global": [5.0] * 12, "hsp_diffuse": [1.2] * 12}
+MURO = {"altura_obstaculo": 3.0, "distancia_obstaculo": 2.0, "referencia_azimutal_obstaculo": 0.0, "largura_obstaculo": 4.0}
+
+def _misses():
+    return {nome: estagio.cache_info().misses for nome, estagio in (
+        ("geometria", estagios.geometria),
+        ("orientacao", estagios.fatores_orientacao),
+        ("sombreamento", estagios.perdas_sombreamento),
+    )}
+
+@pytest.fixture(autouse=True)
+def caches_limpos():
+    estagios.limpar_caches()
+    yield
+    estagios.limpar_caches()
+
+@pytest.mark.parametrize("resolucao", ["mensal", "diaria"])
+def test_troca_de_parametro_refaz_so_os_estagios_dependentes(resolucao):
+    def calcular(albedo=0.2, is_bifacial=True, inclinacao=15, obstaculo=MURO):
+        engine = PerezEngine(-5.8, is_bifacial=is_bifacial, albedo=albedo, altura_instalacao=0.5, resolucao=resolucao)
+        return engine.calcular_hsp_corrigido_inc_azi(DADOS, inclinacao, 0, obstaculo)
+
+    base = calcular()
+    inicial = _misses()
+    assert inicial == {"geometria": 1, "orientacao": 1, "sombreamento": 1}
+
+    # Albedo e modo bifacial: só a combinação
+    assert calcular(albedo=0.5)["media"] > base["media"]
+    calcular(is_bifacial=False)
+    assert _misses() == inicial
+
+    # Inclinação: refaz o rb; a sombra não depende dela
+    calcular(inclinacao=30)
+    assert _misses() == dict(inicial, orientacao=2)
+
+    # Obstáculo: refaz só a sombra
+    calcular(obstaculo=dict(MURO, altura_obstaculo=4.0))
+    assert _misses() == dict(inicial, orientacao=2, sombreamento=2)
+
+def test_estagios_devolvem_arrays_somente_leitura():
+    rb = estagios.fatores_orientacao(-5.8, 15.0, 0.0)
+    perdas = estagios.perdas_sombreamento(-5.8, 0.5, 2.278, *estagios.chave_obstaculo(MURO))
+    assert rb.shape == perdas.shape == (12,)
+    assert not rb.flags.writeable and not perdas.flags.writeable
+    assert estagios.perdas_sombreamento(-5.8, 0.5, 2.278, *estagios.chave_obstaculo(MURO), "diaria").shape == (365,)
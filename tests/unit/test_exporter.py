@@ -0,0 +1,73 @@
+import pytest
+from utils.exporter import SolarExporter
+
+LINHAS = [
+    {"cidade": "Natal", "hsp": 5.25, "inclinacao": 15, "perda": None},
+    {"cidade": "S.Paulo", "hsp": 4.5, "inclinacao": 20, "perda": 0.125},
+]
+
+def _gerador(n):
+    for i in range(n):
+        yield {"id": f"P{i}", "hsp": 5.0 + i / 1000, "mensal": [float(i)] * 12}
+
+def test_csv_excel_br_com_virgula_decimal_e_bom(tmp_path):
+    caminho = tmp_path / "saida.csv"
+    assert SolarExporter.exportar(str(caminho), iter(LINHAS), tamanho_chunk=1) == 2
+
+    assert caminho.read_bytes() == (
+        "﻿cidade;hsp;inclinacao;perda\r\n"
+        "Natal;5,25;15;\r\n"
+        "S.Paulo;4,5;20;0,125\r\n"
+    ).encode("utf-8")
+
+def test_csv_mantem_inteiros_com_nulos_e_colunas_mistas(tmp_path):
+    # Mesmo texto do writer original (str(v) com vírgula): inteiros com None não viram "15,0"
+    caminho = tmp_path / "saida.csv"
+    linhas = [{"a": 15, "b": None, "c": 15}, {"a": None, "b": 2.5, "c": 2.5}, {"a": 3, "b": 1.0, "c": None}]
+    SolarExporter.exportar(str(caminho), linhas, formato="csv")
+    assert caminho.read_text(encoding="utf-8-sig").splitlines() == ["a;b;c", "15;;15", ";2,5;2,5", "3;1,0;"]
+
+def test_csv_colunas_heterogeneas_formatam_cada_numero(tmp_path):
+    # Floats junto de texto ou bools, NaN explícito e inteiros além do int64: mesmo texto do writer original
+    caminho = tmp_path / "saida.csv"
+    linhas = [{"a": 5.0, "b": True, "c": float("nan"), "d": 2**70},
+              {"a": "texto", "b": 123456789.123, "c": 1.5, "d": None}]
+    SolarExporter.exportar(str(caminho), linhas, formato="csv")
+    assert caminho.read_text(encoding="utf-8-sig").splitlines() == [
+        "a;b;c;d", f"5,0;True;nan;{2**70}", "texto;123456789,123;1,5;"
+    ]
+
+def test_csv_en_us_mantem_ponto_decimal(tmp_path):
+    caminho = tmp_path / "saida.csv"
+    SolarExporter.exportar(str(caminho), LINHAS, locale="en_US", colunas=["cidade", "hsp"])
+    assert caminho.read_text(encoding="utf-8").splitlines() == ["cidade,hsp", "Natal,5.25", "S.Paulo,4.5"]
+
+@pytest.mark.parametrize("formato", ["parquet", "arrow"])
+def test_formatos_binarios_em_chunks_preservam_linhas_e_listas(tmp_path, formato):
+    pa = pytest.importorskip("pyarrow")
+    caminho = tmp_path / f"saida.{formato}"
+
+    assert SolarExporter.exportar(str(caminho), _gerador(1_001), tamanho_chunk=100) == 1_001
+
+    if formato == "parquet":
+        import pyarrow.parquet as pq
+        tabela = pq.read_table(caminho)
+    else:
+        tabela = pa.ipc.open_file(str(caminho)).read_all()
+    assert tabela.num_rows == 1_001
+    assert tabela.column("mensal")[1_000].as_py() == [1000.0] * 12
+
+def test_erros_de_exportacao_nao_sao_mais_silenciados(tmp_path):
+    with pytest.raises(ValueError):
+        SolarExporter.exportar(str(tmp_path / "saida.xlsx"), LINHAS)
+    with pytest.raises(ValueError):
+        SolarExporter.exportar(str(tmp_path / "saida.csv"), LINHAS, locale="fr_FR")
+    bloqueio = tmp_path / "arquivo_comum"
+    bloqueio.write_text("")
+    with pytest.raises(OSError):
+        SolarExporter.exportar(str(bloqueio / "x.csv"), LINHAS)
+
+def test_iteravel_vazio_nao_gera_arquivo(tmp_path):
+    caminho = tmp_path / "vazio.csv"
+    assert SolarExporter.exportar(str(caminho), iter([])) == 0
+    assert not caminho.exists()
@@ -0,0 +1,32 @@
+import sys
+import json
+import subprocess
+
+def _modulos_carregados(codigo):
+    """Executa `codigo` num interpretador novo e devolve os módulos carregados."""
+    script = codigo + "\nimport sys, json; print('@@' + json.dumps(sorted(sys.modules)))"
+    saida = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    return set(json.loads(next(l for l in saida.splitlines() if l.startswith("@@"))[2:]))
+
+def test_api_sobe_sem_pvlib_pandas_e_requests():
+    carregados = _modulos_carregados("import api")
+    assert not carregados & {"pvlib", "scipy", "pandas", "requests", "pyarrow"}
+
+def test_dashboard_sobe_sem_bibliotecas_de_grafico():
+    # O streamlit registra o tema do plotly (módulos preguiçosos, leves); as figuras ficam para o primeiro gráfico
+    carregados = _modulos_carregados("import dashboard.visualizations")
+    assert not carregados & {"plotly.graph_objs._figure", "altair", "pandas", "pvlib", "scipy"}
+
+def test_provedor_carrega_dependencias_no_primeiro_uso():
+    carregados = _modulos_carregados(
+        "from services.providers import InpeLabrenProvider\n"
+        "provider = InpeLabrenProvider()\n"
+        "import sys; assert 'pandas' not in sys.modules\n"
+        "provider.get_solar_data(-5.79, -35.21)"
+    )
+    assert "pandas" in carregados
+    assert "pvlib" not in carregados
+
+def test_atlas_compartilhado_entre_instancias():
+    from services.providers import InpeLabrenProvider
+    assert InpeLabrenProvider().df is InpeLabrenProvider().df
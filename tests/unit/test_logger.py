@@ -0,0 +1,53 @@
+import sys
+import json
+import queue
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from utils.logger import FiltroAmostragem, FiltroContexto, FormatadorJSON, HandlerFila, ID_REQUISICAO, get_logger
+
+def _registro(nivel=logging.INFO, amostrado=True):
+    registro = logging.makeLogRecord({"levelno": nivel, "msg": "teste"})
+    registro.amostrado = amostrado
+    return registro
+
+def _registrar_no_worker(mensagem):
+    get_logger("teste_pool").warning(mensagem)
+
+def test_amostragem_zero_descarta_linhas_ruidosas():
+    filtro = FiltroAmostragem(0.0)
+    assert filtro.filter(_registro()) is False
+    assert filtro.filter(_registro(amostrado=False)) is True
+
+def test_amostragem_nunca_descarta_avisos():
+    filtro = FiltroAmostragem(0.0)
+    assert filtro.filter(_registro(nivel=logging.WARNING)) is True
+
+def test_contexto_injeta_id_da_requisicao():
+    token = ID_REQUISICAO.set("req-42")
+    try:
+        registro = _registro()
+        FiltroContexto().filter(registro)
+        assert registro.request_id == "req-42"
+    finally:
+        ID_REQUISICAO.reset(token)
+
+def test_logs_de_workers_do_pool_chegam_a_saida(capfd):
+    # Workers criados por fork herdam o QueueHandler, mas não a thread que esvazia a fila
+    get_logger("teste_pool")
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("fork")) as pool:
+        for i in range(3):
+            pool.submit(_registrar_no_worker, f"aviso do worker {i}").result()
+    saida = capfd.readouterr().out
+    assert all(f"aviso do worker {i}" in saida for i in range(3))
+
+def test_traceback_vai_para_o_campo_exc():
+    try:
+        raise ValueError("falhou")
+    except ValueError:
+        registro = logging.getLogger("hsp.teste").makeRecord("hsp.teste", logging.ERROR, __file__, 1, "erro %s", ("x",),
+                                                             sys.exc_info())
+    preparado = HandlerFila(queue.SimpleQueue()).prepare(registro)
+    evento = json.loads(FormatadorJSON().format(preparado))
+    assert evento["msg"] == "erro x"
+    assert "ValueError: falhou" in evento["exc"]
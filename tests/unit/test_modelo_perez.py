@@ -0,0 +1,51 @@
+import pytest
+import numpy as np
+from core.perez_engine import PerezEngine
+from core.modelo_perez import (coeficientes_perez, coeficientes_simplificados, massa_de_ar,
+                               irradiancia_extraterrestre, COEFICIENTES_PEREZ_1990)
+
+def test_difusa_inclinada_reproduz_pvlib():
+    """Mesma difusa de céu no plano que `pvlib.irradiance.perez` (tabela allsitescomposite1990, arredondada)"""
+    from pvlib import irradiance
+    rng = np.random.default_rng(7)
+    zenite = rng.uniform(5, 84, 2000)
+    azimute_sol = rng.uniform(0, 360, 2000)
+    difusa = rng.uniform(20, 400, 2000)
+    direta_normal = rng.uniform(0, 1000, 2000)
+    dia_ano = rng.integers(1, 366, 2000)
+
+    f1, f2 = coeficientes_perez(difusa, direta_normal, zenite, dia_ano)
+    a = np.maximum(irradiance.aoi_projection(30, 0, zenite, azimute_sol), 0)
+    b = np.maximum(np.cos(np.radians(zenite)), np.cos(np.radians(85)))
+    nossa = difusa * ((1 - f1) * (1 + np.cos(np.radians(30))) / 2 + f1 * a / b + f2 * np.sin(np.radians(30)))
+
+    referencia = irradiance.perez(30, 0, difusa, direta_normal, irradiancia_extraterrestre(dia_ano),
+                                  zenite, azimute_sol, massa_de_ar(zenite), model="allsitescomposite1990")
+    np.testing.assert_allclose(nossa, referencia, rtol=0.01, atol=0.5)
+
+def test_classificacao_do_ceu_por_faixa():
+    """Céu encoberto (sem direta) cai na faixa 1; céu limpo ao meio-dia, na faixa 8"""
+    f1_encoberto, f2_encoberto = coeficientes_perez(100.0, 0.0, 0.0, 172)
+    brilho = 100.0 * massa_de_ar(0.0) / irradiancia_extraterrestre(172)
+    f = COEFICIENTES_PEREZ_1990[0]
+    assert f1_encoberto == pytest.approx(max(0, f[0] + f[1] * brilho))
+    assert f2_encoberto == pytest.approx(f[3] + f[4] * brilho)
+
+    f1_limpo, _ = coeficientes_perez(60.0, 900.0, 0.0, 172)
+    brilho = 60.0 * massa_de_ar(0.0) / irradiancia_extraterrestre(172)
+    f = COEFICIENTES_PEREZ_1990[7]
+    assert f1_limpo == pytest.approx(max(0, f[0] + f[1] * brilho))
+
+def test_sem_difusa_ou_sol_abaixo_do_horizonte_e_isotropico():
+    f1, f2 = coeficientes_perez(np.array([0.0, 80.0]), np.array([500.0, 0.0]), np.array([30.0, 95.0]), 1)
+    assert f1.tolist() == [0.0, 0.0] and f2.tolist() == [0.0, 0.0]
+
+def test_modelo_padrao_continua_simplificado():
+    dados = {"hsp_global": [5.0] * 12, "hsp_diffuse": [1.5] * 12}
+    padrao = PerezEngine(-7.0).calcular_hsp_corrigido_inc_azi(dados, 20, 0)
+    assert PerezEngine(-7.0, modelo_difusa="simplificado").calcular_hsp_corrigido_inc_azi(dados, 20, 0) == padrao
+    assert PerezEngine(-7.0, modelo_difusa="perez1990").calcular_hsp_corrigido_inc_azi(dados, 20, 0) != padrao
+    assert coeficientes_simplificados(5.0, 1.5) == (pytest.approx(0.28 * 0.7), 0.02)
+
+    with pytest.raises(ValueError):
+        PerezEngine(-7.0, modelo_difusa="hay_davies")
@@ -54,4 +54,69 @@ def test_perez_com_inclinacao_zero(base_params):
     )
     
     # Com inclinação 0 e bifacial ativo, a média deve ser no mínimo o valor horizontal
-    assert res["media"] >= hsp_referencia
\ No newline at end of file
+    assert res["media"] >= hsp_referencia
+
+def test_modo_diario_sem_sombra_proximo_do_mensal(base_params):
+    """Sem obstáculo, espalhar a climatologia pelos 365 dias não muda o HSP além do efeito do dia representativo"""
+    dados = {"hsp_global": [6.0, 6.1, 5.8, 5.2, 4.8, 4.4, 4.6, 5.3, 5.9, 6.3, 6.5, 6.2], "hsp_diffuse": [1.8] * 12}
+    mensal = PerezEngine(**base_params).calcular_hsp_corrigido_inc_azi(dados, 15, 0)
+    diario = PerezEngine(**base_params, resolucao="diaria").calcular_hsp_corrigido_inc_azi(dados, 15, 0)
+
+    assert set(diario) == set(mensal)
+    assert len(diario["mensal"]) == 12
+    assert np.allclose(diario["mensal"], mensal["mensal"], rtol=0.02)
+
+def test_modo_diario_capta_sombra_ausente_no_dia_representativo(base_params):
+    """Poste estreito a leste: no dia 198 o sol nasce fora dele, mas em parte de julho nasce atrás dele"""
+    dados = {"hsp_global": [5.0] * 12, "hsp_diffuse": [1.0] * 12}
+    params = dict(base_params, lat=-5.8, altura_instalacao=0.5)
+    poste = {"altura_obstaculo": 3.0, "distancia_obstaculo": 3.0, "referencia_azimutal_obstaculo": 72.0,
+             "largura_obstaculo": 0.3}
+    # Obstáculo da altura do módulo: não projeta sombra, isola a perda do poste
+    rente = dict(poste, altura_obstaculo=0.5)
+
+    def perda_julho(resolucao):
+        engine = PerezEngine(**params, resolucao=resolucao)
+        return (engine.calcular_hsp_corrigido_inc_azi(dados, 15, 0, rente)["mensal"][6]
+                - engine.calcular_hsp_corrigido_inc_azi(dados, 15, 0, poste)["mensal"][6])
+
+    assert perda_julho("mensal") == pytest.approx(0.0, abs=1e-3)
+    assert perda_julho("diaria") > 0.05
+
+def test_resolucao_invalida(base_params):
+    with pytest.raises(ValueError):
+        PerezEngine(**base_params, resolucao="semanal")
+
+def _serie_horaria_ceu_claro(lat, lon=-35.2):
+    from core.solar_geometry import posicao_solar_utc
+    dia_ano = np.repeat(np.arange(1, 366), 24)
+    hora_utc = np.tile(np.arange(24, dtype=float), 365)
+    altitudes, _ = posicao_solar_utc(lat, lon, dia_ano, hora_utc)
+    ghi = 750 * np.maximum(np.sin(np.radians(altitudes)), 0)
+    return {"irradiancia_global": ghi.astype(np.float32), "irradiancia_difusa": (0.25 * ghi).astype(np.float32),
+            "mes": np.repeat(np.arange(12), np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]) * 24),
+            "dia_ano": dia_ano, "hora_utc": hora_utc, "longitude": lon}
+
+def test_modo_horario_plano_horizontal_reproduz_global(base_params):
+    """Plano horizontal monofacial: a irradiância no plano é a própria global horária"""
+    serie = _serie_horaria_ceu_claro(base_params["lat"])
+    engine = PerezEngine(**dict(base_params, is_bifacial=False), resolucao="horaria")
+    res = engine.calcular_hsp_corrigido_inc_azi(serie, 0, 0)
+
+    esperado = np.bincount(serie["mes"], weights=serie["irradiancia_global"]) / np.bincount(serie["mes"]) * 0.024
+    assert np.allclose(res["mensal"], esperado, rtol=0.01)
+
+def test_modo_horario_perda_ponderada_pela_irradiancia(base_params):
+    serie = _serie_horaria_ceu_claro(base_params["lat"])
+    engine = PerezEngine(**base_params, resolucao="horaria")
+    muro_leste = {"altura_obstaculo": 4.0, "distancia_obstaculo": 2.0, "referencia_azimutal_obstaculo": 90.0,
+                  "largura_obstaculo": 6.0}
+    res = engine.calcular_hsp_corrigido_inc_azi(serie, 15, 0, muro_leste)
+
+    assert res["media"] < res["media_sem_sombra"]
+    # O muro encobre a manhã baixa, de pouca irradiância: a perda de energia é menor que a fração de horas
+    from core.solar_geometry import posicao_solar_utc
+    altitudes, azimutes = posicao_solar_utc(base_params["lat"], serie["longitude"], serie["dia_ano"], serie["hora_utc"])
+    perda_por_tempo = engine._perdas_sombra_vetorizado(altitudes, azimutes, muro_leste)[altitudes > 0].mean() * 100
+    perda = float(res["perda_sombreamento_estimada"].rstrip("%"))
+    assert 0 < perda < perda_por_tempo
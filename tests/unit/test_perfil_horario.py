@@ -0,0 +1,44 @@
+import numpy as np
+from core.perez_engine import PerezEngine
+from core.perfil_horario import gerar_perfil_horario, razoes_mensais, razao_global_collares_pereira_rabl
+
+DADOS = {"hsp_global": [6.0, 6.1, 5.8, 5.2, 4.8, 4.4, 4.6, 5.3, 5.9, 6.3, 6.5, 6.2], "hsp_diffuse": [1.8] * 12}
+
+def _hsp_mensal(serie, chave):
+    return np.bincount(serie["mes"], weights=serie[chave]) / np.bincount(serie["mes"]) * 0.024
+
+def test_perfil_preserva_medias_mensais():
+    for passo, todos_os_dias in ((1.0, False), (0.25, False), (1.0, True)):
+        serie = gerar_perfil_horario(-5.8, -35.2, DADOS, passo, todos_os_dias)
+        assert np.allclose(_hsp_mensal(serie, "irradiancia_global"), DADOS["hsp_global"], rtol=1e-5)
+        assert np.allclose(_hsp_mensal(serie, "irradiancia_difusa"), DADOS["hsp_diffuse"], rtol=1e-5)
+        assert np.all(serie["irradiancia_difusa"] <= serie["irradiancia_global"])
+
+def test_collares_pereira_rabl_pico_ao_meio_dia_e_zero_a_noite():
+    ws = np.radians(90)
+    omega = np.radians(np.array([-120, -45, 0, 45, 120]))
+    razoes = razao_global_collares_pereira_rabl(omega, ws)
+    assert razoes[0] == razoes[-1] == 0.0
+    assert np.isclose(razoes[1], razoes[3])
+    assert razoes[2] == razoes.max()
+
+def test_razoes_memorizadas_por_local_e_mes():
+    assert razoes_mensais(-5.8, -35.2, 6) is razoes_mensais(-5.8, -35.2, 6)
+    assert not razoes_mensais(-5.8, -35.2, 6)[2].flags.writeable
+
+def test_perfil_sintetico_horizontal_reproduz_hsp():
+    serie = gerar_perfil_horario(-7.0, -35.2, DADOS)
+    engine = PerezEngine(-7.0, is_bifacial=False, resolucao="horaria")
+    assert np.allclose(engine.calcular_hsp_corrigido_inc_azi(serie, 0, 0)["mensal"], DADOS["hsp_global"], rtol=0.01)
+
+def test_perda_ponderada_pela_irradiancia_menor_que_por_tempo():
+    """Sombra no início da manhã: pouca irradiância, então a perda horária sintética fica abaixo da mensal (por tempo)"""
+    muro_leste = {"altura_obstaculo": 3.0, "distancia_obstaculo": 2.0, "referencia_azimutal_obstaculo": 90.0,
+                  "largura_obstaculo": 3.0}
+    mensal = PerezEngine(-5.8, altura_instalacao=0.5).calcular_hsp_corrigido_inc_azi(DADOS, 15, 0, muro_leste)
+    horario = PerezEngine(-5.8, altura_instalacao=0.5, resolucao="horaria").calcular_hsp_corrigido_inc_azi(
+        gerar_perfil_horario(-5.8, -35.2, DADOS), 15, 0, muro_leste)
+
+    perda_mensal = float(mensal["perda_sombreamento_estimada"].rstrip("%"))
+    perda_horaria = float(horario["perda_sombreamento_estimada"].rstrip("%"))
+    assert 0 < perda_horaria < perda_mensal
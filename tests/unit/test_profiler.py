@@ -0,0 +1,42 @@
+import time
+import pstats
+from utils import profiler
+from utils.profiler import Perfil, perfilado, perfilar
+
+def _trabalho():
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < 0.05:
+        sum(range(1000))
+
+def test_perfil_por_amostragem_gera_pilhas_folded(tmp_path):
+    with Perfil("teste", modo="amostragem", diretorio=str(tmp_path), intervalo_ms=1) as perfil:
+        _trabalho()
+
+    linhas = open(perfil.sessao.caminho, encoding="utf-8").read().splitlines()
+    assert perfil.sessao.caminho.endswith(".folded") and perfil.id in perfil.sessao.caminho
+    assert any("test_profiler.py:_trabalho" in linha for linha in linhas)
+    # Formato folded: "raiz;...;folha <contagem>"
+    pilha, contagem = linhas[0].rsplit(" ", 1)
+    assert ";" in pilha and int(contagem) > 0
+
+def test_perfil_deterministico_gera_cprofile(tmp_path):
+    with Perfil("teste", modo="deterministico", diretorio=str(tmp_path)) as perfil:
+        _trabalho()
+
+    estatisticas = pstats.Stats(perfil.sessao.caminho)
+    assert any(funcao[2] == "_trabalho" for funcao in estatisticas.stats)
+
+def test_perfis_desabilitados_e_aninhados(tmp_path, monkeypatch):
+    """Sem HSP_PROFILING nada é gravado; com perfis aninhados vale apenas o mais externo"""
+    monkeypatch.setattr(profiler, "HSP_PROFILING_DIR", str(tmp_path))
+    funcao = perfilado("interno")(_trabalho)
+
+    with perfilar("externo"):
+        funcao()
+    assert list(tmp_path.iterdir()) == []
+
+    monkeypatch.setattr(profiler, "HSP_PROFILING", True)
+    with perfilar("externo"):
+        funcao()
+    arquivos = [p.name for p in tmp_path.iterdir()]
+    assert len(arquivos) == 1 and "externo" in arquivos[0]
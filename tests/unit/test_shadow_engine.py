@@ -1,5 +1,8 @@
 import pytest
+import numpy as np
+from core.app import SolarEngine
 from core.shadow_engine import ShadowEngine
+from core.solar_geometry import posicao_solar_horaria, DIAS_REPRESENTATIVOS
 
 @pytest.fixture
 def engine():
@@ -54,4 +57,30 @@ def test_obstaculo_mais_baixo_que_o_painel(engine):
         altura_instalacao_modulo=2.0, # Painel alto
         config_obstaculo={'altura_obstaculo': 1.0} # Muro baixo
     )
-    assert perda == 0.0
\ No newline at end of file
+    assert perda == 0.0
+
+def test_matriz_perda_reproduz_calculo_pontual(engine):
+    """A matriz mês × hora deve coincidir com a estimativa escalar em cada célula diurna (e ficar em cache)"""
+    config = {'altura_obstaculo': 4.0, 'distancia_obstaculo': 2.0, 'referencia_azimutal_obstaculo': 0.0, 'largura_obstaculo': 4.0}
+
+    horas, altitudes, perdas = engine.calcular_matriz_perda(-23.5, config, altura_instalacao_modulo=0.5)
+    assert perdas.shape == (12, len(horas))
+
+    for mes in (0, 5):
+        for j, hora in enumerate(horas):
+            alt, az = posicao_solar_horaria(-23.5, DIAS_REPRESENTATIVOS[mes], hora)
+            if alt <= 0:
+                assert perdas[mes, j] != perdas[mes, j]  # NaN: sol abaixo do horizonte
+                continue
+            esperado = engine.estimar_perda_sombreamento(alt, az, altura_instalacao_modulo=0.5, config_obstaculo=config)
+            assert perdas[mes, j] == pytest.approx(esperado)
+
+    assert engine.calcular_matriz_perda(-23.5, dict(config), altura_instalacao_modulo=0.5)[2] is perdas
+
+@pytest.mark.filterwarnings("error")
+def test_matriz_em_latitude_polar_sem_aviso():
+    """A 75°N o sol não nasce em dezembro e janeiro: a média do mês fica NaN, sem 'Mean of empty slice'"""
+    config = {'altura_obstaculo': 3.0, 'distancia_obstaculo': 2.0, 'referencia_azimutal_obstaculo': 180.0}
+    res = SolarEngine(repository=None).calcular_matriz_sombreamento(75.0, config)  # não consulta o clima
+    assert np.isnan(res["perda_media_mensal"][[0, 11]]).all()
+    assert np.isfinite(res["perda_media_mensal"][3:9]).all()
@@ -0,0 +1,30 @@
+import numpy as np
+from core.solar_geometry import (posicao_solar_horaria, trajetoria_solar_dia, trajetoria_solar_anual,
+                                 geometria_diaria, declinacao_solar)
+
+def test_trajetoria_diaria_bate_com_calculo_pontual():
+    """A trajetória vetorizada deve coincidir ponto a ponto com o cálculo escalar"""
+    horas, altitudes, azimutes = trajetoria_solar_dia(-5.8, 172)
+    for i in (0, 17, 30, 59):
+        alt, az = posicao_solar_horaria(-5.8, 172, horas[i])
+        assert np.isclose(altitudes[i], alt) and np.isclose(azimutes[i], az)
+
+def test_trajetoria_diaria_memorizada_e_somente_leitura():
+    assert trajetoria_solar_dia(-23.5, 21) is trajetoria_solar_dia(-23.5, 21)
+    assert not trajetoria_solar_dia(-23.5, 21)[1].flags.writeable
+
+def test_trajetoria_anual_mes_por_hora():
+    horas, altitudes, azimutes = trajetoria_solar_anual(-23.5)
+    assert altitudes.shape == azimutes.shape == (12, len(horas))
+    # Meio-dia solar: sol ao norte (0°) no inverno austral (junho) em São Paulo
+    meio_dia = int(np.argmin(np.abs(horas - 12.0)))
+    assert altitudes[5, meio_dia] == altitudes[5].max()
+    assert np.isclose(azimutes[5, meio_dia], 0.0) or np.isclose(azimutes[5, meio_dia], 360.0)
+
+def test_geometria_diaria_365_dias():
+    delta, ws, altitudes, azimutes = geometria_diaria(-5.8)
+    assert delta.shape == ws.shape == (365,)
+    assert altitudes.shape == azimutes.shape == (365, 100)
+    assert np.isclose(delta[171], declinacao_solar(172))
+    assert geometria_diaria(-5.8) is geometria_diaria(-5.8)
+    assert not altitudes.flags.writeable
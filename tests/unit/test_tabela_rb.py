@@ -0,0 +1,68 @@
+import os
+import pytest
+import numpy as np
+from core import tabela_rb
+from core.perez_engine import PerezEngine
+from core.batch_engine import PerezEngineLote
+from core.solar_geometry import DIAS_REPRESENTATIVOS, declinacao_solar, angulo_por_do_sol, fator_rb
+
+DADOS = {"hsp_global": [5.0] * 12, "hsp_diffuse": [1.2] * 12}
+
+def _rb_exato(lat, inclinacao, azimute):
+    lat_rad = np.radians(lat)[:, None]
+    delta = declinacao_solar(DIAS_REPRESENTATIVOS)
+    return fator_rb(lat_rad, delta, angulo_por_do_sol(lat_rad, delta),
+                    np.radians(inclinacao)[:, None], np.radians(azimute)[:, None])
+
+@pytest.fixture(autouse=True)
+def tabela_temporaria(tmp_path, monkeypatch):
+    monkeypatch.setattr(tabela_rb, "HSP_TABELA_RB_DIR", str(tmp_path))
+    tabela_rb.carregar_tabela.cache_clear()
+    yield tmp_path
+    tabela_rb.carregar_tabela.cache_clear()
+
+def test_erro_da_tabela_dentro_do_limite_documentado():
+    rng = np.random.default_rng(48)
+    # Pontos aleatórios nas 4 dimensões + o meio de cada célula perto do limite (pior caso da interpolação)
+    meios = tabela_rb.LATITUDES[-600:-1] + tabela_rb.PASSO_LATITUDE / 2
+    lat = np.concatenate([rng.uniform(-65, 65, 50_000), meios, -meios])
+    inclinacao = np.concatenate([rng.uniform(0, 90, 50_000), np.full(2 * len(meios), 90.0)])
+    azimute = np.concatenate([rng.uniform(0, 360, 50_000), np.zeros(len(meios)), np.full(len(meios), 180.0)])
+
+    erro = np.abs(tabela_rb.rb_tabelado(lat, inclinacao, azimute) - _rb_exato(lat, inclinacao, azimute))
+    assert erro.max() <= tabela_rb.ERRO_MAXIMO_RB
+    assert erro[np.abs(lat) <= 35].max() < 1e-7
+
+def test_tabela_persistida_e_reaberta_do_disco(tabela_temporaria):
+    tabela = tabela_rb.carregar_tabela()
+    assert os.path.exists(tabela_rb.caminho_tabela())
+    assert not tabela.flags.writeable
+
+    tabela_rb.carregar_tabela.cache_clear()
+    reaberta = tabela_rb.carregar_tabela()
+    assert isinstance(reaberta, np.memmap)
+    np.testing.assert_array_equal(reaberta, tabela)
+
+@pytest.mark.filterwarnings("error")
+def test_latitude_fora_da_tabela_usa_formula_exata():
+    lat, inclinacao, azimute = np.array([70.0, -68.0]), np.array([30.0, 45.0]), np.array([180.0, 0.0])
+    rb = tabela_rb.rb_tabelado(lat, inclinacao, azimute)
+    np.testing.assert_allclose(rb, _rb_exato(lat, inclinacao, azimute), rtol=1e-12, equal_nan=True)
+
+    # Noite polar (sol não nasce no dia representativo): NaN sem aviso, e só nesses meses
+    noite_polar = angulo_por_do_sol(np.radians(lat)[:, None], declinacao_solar(DIAS_REPRESENTATIVOS)) == 0
+    assert np.flatnonzero(noite_polar[0]).tolist() == [0, 11] and np.flatnonzero(noite_polar[1]).tolist() == [5]
+    np.testing.assert_array_equal(np.isnan(rb), noite_polar)
+
+def test_modo_tabelado_nos_motores():
+    obstaculo = {"altura_obstaculo": 3.0, "distancia_obstaculo": 2.0, "largura_obstaculo": 4.0}
+    exato = PerezEngine(-23.5, is_bifacial=True).calcular_hsp_corrigido_inc_azi(DADOS, 25, 300, obstaculo)
+    rapido = PerezEngine(-23.5, is_bifacial=True, rb_tabelado=True).calcular_hsp_corrigido_inc_azi(DADOS, 25, 300, obstaculo)
+    np.testing.assert_allclose(rapido["mensal"], exato["mensal"], rtol=1e-6)
+
+    inclinacoes, azimutes = np.array([0.0, 15.0, 90.0]), np.array([0.0, 135.0, 270.0])
+    np.testing.assert_allclose(PerezEngineLote(-23.5, rb_tabelado=True).calcular_rb(inclinacoes, azimutes),
+                               PerezEngineLote(-23.5).calcular_rb(inclinacoes, azimutes), atol=1e-7)
+
+    with pytest.raises(ValueError):
+        PerezEngine(-23.5, resolucao="diaria", rb_tabelado=True)
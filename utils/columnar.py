@@ -0,0 +1,68 @@
+import io
+import numpy as np
+
+MIME_NPZ = "application/x-npz"
+MIME_ARROW = "application/vnd.apache.arrow.stream"
+FORMATOS_BINARIOS = (MIME_NPZ, MIME_ARROW)
+
+
+def importar_pyarrow():
+    """Import tardio do pyarrow (dependência opcional), com ValueError amigável se não estiver instalado."""
+    try:
+        import pyarrow as pa
+        return pa
+    except ImportError:
+        raise ValueError("Formato Arrow indisponível: instale o pacote 'pyarrow'.")
+
+
+def ler_colunas(corpo: bytes, formato: str) -> dict:
+    """
+    Decodifica um payload colunar binário em dict campo -> np.ndarray.
+
+    :param formato: MIME_NPZ (numpy.savez) ou MIME_ARROW (Arrow IPC stream, uma tabela).
+    :raises ValueError: Formato não suportado ou payload inválido.
+    """
+    try:
+        if formato == MIME_NPZ:
+            # allow_pickle=False: o payload vem do cliente e não pode executar código
+            with np.load(io.BytesIO(corpo), allow_pickle=False) as arquivo:
+                return {campo: arquivo[campo] for campo in arquivo.files}
+
+        if formato == MIME_ARROW:
+            pa = importar_pyarrow()
+            tabela = pa.ipc.open_stream(corpo).read_all()
+            return {campo: tabela.column(campo).to_numpy(zero_copy_only=False) for campo in tabela.column_names}
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Payload colunar inválido: {e}")
+
+    raise ValueError(f"Formato colunar não suportado: {formato}")
+
+
+def escrever_colunas(resultado: dict, formato: str) -> bytes:
+    """
+    Codifica o resultado colunar (dict campo -> np.ndarray) no mesmo formato binário da requisição.
+    Séries mensais (N, 12) viram arrays 2-D no NPZ e listas de tamanho fixo no Arrow.
+    """
+    if formato == MIME_NPZ:
+        buffer = io.BytesIO()
+        np.savez(buffer, **{campo: np.asarray(valor) for campo, valor in resultado.items()})
+        return buffer.getvalue()
+
+    if formato == MIME_ARROW:
+        pa = importar_pyarrow()
+        colunas = {}
+        for campo, valor in resultado.items():
+            valor = np.asarray(valor)
+            if valor.ndim == 2:
+                colunas[campo] = pa.FixedSizeListArray.from_arrays(pa.array(valor.ravel()), valor.shape[1])
+            else:
+                colunas[campo] = pa.array(valor)
+        tabela = pa.table(colunas)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, tabela.schema) as writer:
+            writer.write_table(tabela)
+        return sink.getvalue().to_pybytes()
+
+    raise ValueError(f"Formato colunar não suportado: {formato}")
@@ -1,5 +1,37 @@
-import csv
 import os
+from itertools import chain, islice
+from utils.logger import get_logger
+from utils.columnar import importar_pyarrow
+
+logger = get_logger("exporter")
+
+# Convenções de planilha por locale: separador decimal e delimitador de campos.
+# "pt_BR" é o dialeto Excel-BR (vírgula decimal, ';' entre campos, BOM UTF-8 para o Excel detectar a codificação).
+LOCALES_CSV = {
+    "pt_BR": {"decimal": ",", "separador": ";", "encoding": "utf-8-sig"},
+    "en_US": {"decimal": ".", "separador": ",", "encoding": "utf-8"},
+}
+TAMANHO_CHUNK_PADRAO = 50_000
+FORMATOS = ("csv", "parquet", "arrow")
+
+
+def _em_chunks(linhas, tamanho):
+    """Agrupa um iterável de linhas em listas de até `tamanho` itens, sem materializá-lo inteiro."""
+    iterador = iter(linhas)
+    while True:
+        chunk = list(islice(iterador, tamanho))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _caminho_em_data(filename, extensao):
+    """Caminho dentro da pasta 'data' na raiz do projeto (um nível acima de utils/), com a extensão garantida."""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if not filename.endswith(extensao):
+        filename += extensao
+    return os.path.join(base_dir, "data", filename)
+
 
 class SolarExporter:
     @staticmethod
@@ -9,43 +41,133 @@ class SolarExporter:
         dentro da pasta 'data' do projeto.
         """
         if not results:
-            print("[AVISO] Nenhum dado para exportar.")
+            logger.warning("Nenhum dado para exportar", extra={"arquivo": filename})
             return
-        
-        # 1. Define o caminho da pasta 'data' (um nível acima de utils/)
-        # Isso garante que a pasta seja criada na raiz do projeto
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        data_folder = os.path.join(base_dir, "data")
-
-        # 2. Cria a pasta 'data' se ela não existir
-        if not os.path.exists(data_folder):
-            os.makedirs(data_folder)
-
-        # 3. Garante a extensão .csv e define o caminho completo
-        if not filename.endswith('.csv'):
-            filename += '.csv'
-        
-        full_path = os.path.join(data_folder, filename)
+
+        return SolarExporter.exportar(_caminho_em_data(filename, ".csv"), results, formato="csv")
+
+    @staticmethod
+    def exportar(caminho, linhas, formato=None, locale="pt_BR", tamanho_chunk=TAMANHO_CHUNK_PADRAO, colunas=None,
+                 esquema=None):
+        """
+        Exporta um iterável de linhas (dicts) em chunks, com memória limitada ao tamanho do chunk:
+        geradores de varreduras e carteiras com milhões de linhas nunca são materializados.
+
+        :param formato: "csv", "parquet" ou "arrow" (Arrow IPC em arquivo). Padrão: extensão de `caminho`.
+        :param locale: convenção numérica do CSV (LOCALES_CSV); ignorado nos formatos binários.
+        :param colunas: ordem/seleção das colunas. Padrão: chaves da primeira linha (ou campos de `esquema`).
+        :param esquema: pyarrow.Schema dos formatos binários. Padrão: inferido do primeiro chunk, o que
+            falha se uma coluna só tiver nulos nele e valores nos seguintes.
+        :return: número de linhas gravadas.
+        :raises ValueError: formato ou locale não suportado.
+        :raises OSError: falha de escrita (ex: arquivo aberto no Excel), após registrar no log.
+        """
+        formato = formato or os.path.splitext(caminho)[1].lstrip(".").lower()
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de exportação não suportado: {formato!r} (use {', '.join(FORMATOS)}).")
+        if formato == "csv" and locale not in LOCALES_CSV:
+            raise ValueError(f"Locale não suportado: {locale!r} (use {', '.join(LOCALES_CSV)}).")
+
+        chunks = _em_chunks(linhas, tamanho_chunk)
+        primeiro = next(chunks, None)
+        if primeiro is None:
+            logger.warning("Nenhum dado para exportar", extra={"arquivo": caminho})
+            return 0
+        colunas = list(colunas or (esquema.names if esquema is not None else primeiro[0].keys()))
+        chunks = chain([primeiro], chunks)
 
         try:
-            keys = results[0].keys()
-            with open(full_path, 'w', newline='', encoding='utf-8-sig') as output_file:
-                # Delimiter ';' para Excel BR
-                dict_writer = csv.DictWriter(output_file, fieldnames=keys, delimiter=';')
-                
-                dict_writer.writeheader()
-                
-                for row in results:
-                    # Converte ponto em vírgula para compatibilidade com Excel BR
-                    formatted_row = {
-                        k: str(v).replace('.', ',') if isinstance(v, (float, int)) else v 
-                        for k, v in row.items()
-                    }
-                    dict_writer.writerow(formatted_row)
-                    
-            print(f"\n[SUCESSO] Dados exportados para: {full_path}")
-            
+            pasta = os.path.dirname(caminho)
+            if pasta:
+                os.makedirs(pasta, exist_ok=True)
+            if formato == "csv":
+                total = _escrever_csv(caminho, chunks, colunas, locale)
+            else:
+                total = _escrever_arrow(caminho, chunks, colunas, formato, esquema)
         except PermissionError:
-            print(f"\n[ERRO] O arquivo '{filename}' está aberto no Excel. Feche-o e tente novamente.")
-        except Exception as e:
-            print(f"\n[ERRO] Falha ao exportar: {e}")
\ No newline at end of file
+            logger.error("Arquivo aberto em outro programa (Excel?). Feche-o e tente novamente.", extra={"arquivo": caminho})
+            raise
+        except Exception:
+            logger.exception("Falha ao exportar", extra={"arquivo": caminho})
+            raise
+
+        logger.info("Dados exportados", extra={"arquivo": caminho, "linhas": total, "formato": formato})
+        return total
+
+
+def _escrever_csv(caminho, chunks, colunas, locale):
+    import pandas as pd
+
+    convencao = LOCALES_CSV[locale]
+
+    total = 0
+    with open(caminho, "w", newline="", encoding=convencao["encoding"]) as arquivo:
+        for chunk in chunks:
+            # A formatação numérica (separador decimal) é feita pelo writer do pandas, coluna a coluna
+            _tipar_colunas(pd.DataFrame(chunk, columns=colunas, dtype=object), convencao["decimal"]).to_csv(
+                arquivo, sep=convencao["separador"], decimal=convencao["decimal"],
+                header=total == 0, index=False, lineterminator="\r\n",
+            )
+            total += len(chunk)
+    return total
+
+
+def _tipar_colunas(tabela, decimal):
+    """
+    Tipos das colunas a partir dos valores Python, como no writer original (str(v) com o separador trocado):
+    colunas só de inteiros viram Int64 (nulos não as tornam float) e colunas só de floats, float64 — as duas
+    formatadas pelo pandas. Nas demais (números misturados com texto, bools ou entre si, ou com NaN) e nos
+    inteiros fora do Int64, cada número é formatado individualmente.
+    """
+    import pandas as pd
+
+    def formatar(valor):
+        return str(valor).replace(".", decimal) if isinstance(valor, (float, int)) else valor
+
+    for coluna in tabela.columns:
+        # NaN explícito saía como "nan" (só None vira célula vazia); v != v só é verdadeiro para NaN
+        valores = tabela[coluna].to_numpy()
+        nans = valores != valores
+        if nans.any():
+            tabela.loc[nans, coluna] = "nan"
+        tipo = pd.api.types.infer_dtype(tabela[coluna], skipna=True)
+        if tipo in ("string", "empty", "boolean"):
+            continue
+        try:
+            if tipo == "integer":
+                tabela[coluna] = tabela[coluna].astype("Int64")
+                continue
+            if tipo == "floating":
+                tabela[coluna] = tabela[coluna].astype(float)
+                continue
+        except (OverflowError, TypeError, ValueError):
+            pass
+        tabela[coluna] = tabela[coluna].map(formatar)
+    return tabela
+
+
+def _escrever_arrow(caminho, chunks, colunas, formato, esquema=None):
+    pa = importar_pyarrow()
+
+    total = 0
+    escritor = None
+    try:
+        for chunk in chunks:
+            registros = [{coluna: linha.get(coluna) for coluna in colunas} for linha in chunk]
+            if escritor is None:
+                # Sem esquema explícito, o do primeiro chunk é imposto aos seguintes
+                tabela = pa.Table.from_pylist(registros, schema=esquema)
+                esquema = tabela.schema
+                if formato == "parquet":
+                    import pyarrow.parquet as pq
+                    escritor = pq.ParquetWriter(caminho, esquema)
+                else:
+                    escritor = pa.ipc.new_file(caminho, esquema)
+            else:
+                tabela = pa.Table.from_pylist(registros, schema=esquema)
+            escritor.write_table(tabela)
+            total += len(chunk)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return total
@@ -0,0 +1,156 @@
+import os
+import sys
+import copy
+import json
+import queue
+import atexit
+import random
+import logging
+import threading
+import contextvars
+from logging.handlers import QueueHandler, QueueListener
+
+# Configuração via ambiente
+HSP_LOG_LEVEL = os.getenv("HSP_LOG_LEVEL", "INFO").upper()
+HSP_LOG_FORMATO = os.getenv("HSP_LOG_FORMATO", "json")  # "json" ou "texto"
+# Fração das linhas ruidosas (por requisição) que é mantida. Em produção use 0.0 a 0.05.
+HSP_LOG_AMOSTRAGEM = float(os.getenv("HSP_LOG_AMOSTRAGEM", "1.0"))
+
+# Id de correlação da requisição corrente (propagado para threads do FastAPI via contextvars)
+ID_REQUISICAO = contextvars.ContextVar("id_requisicao", default="-")
+
+# Atributos padrão do LogRecord: tudo que não estiver aqui é tratado como campo estruturado extra
+_ATRIBUTOS_PADRAO = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "amostrado"}
+
+_listener = None
+_lock = threading.Lock()
+# (nível, formato, taxa de amostragem) da configuração ativa; None antes de configurar_logging
+_configuracao = None
+
+
+class FiltroContexto(logging.Filter):
+    """Injeta o id de correlação da requisição em cada registro."""
+
+    def filter(self, record):
+        record.request_id = ID_REQUISICAO.get()
+        return True
+
+
+class FiltroAmostragem(logging.Filter):
+    """
+    Descarta parte das linhas marcadas como ruidosas (`extra={"amostrado": True}`).
+    Avisos e erros nunca são amostrados.
+    """
+
+    def __init__(self, taxa):
+        super().__init__()
+        self.taxa = max(0.0, min(1.0, taxa))
+
+    def filter(self, record):
+        if not getattr(record, "amostrado", False) or record.levelno >= logging.WARNING:
+            return True
+        return self.taxa >= 1.0 or random.random() < self.taxa
+
+
+class HandlerFila(QueueHandler):
+    """
+    QueueHandler que preserva o traceback em `exc_text` (o `prepare` padrão o concatena em `msg`),
+    para que o FormatadorJSON o emita no campo `exc`.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por registro, com os campos extras passados via `extra=`."""
+
+    def format(self, record):
+        evento = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO:
+                evento[chave] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            evento["exc"] = record.exc_text
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+
+def _handler_saida(formato):
+    handler = logging.StreamHandler(sys.stdout)
+    if formato == "json":
+        handler.setFormatter(FormatadorJSON())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] [%(request_id)s] %(message)s"))
+    return handler
+
+
+def _filtros(handler, taxa_amostragem):
+    handler.addFilter(FiltroContexto())
+    handler.addFilter(FiltroAmostragem(taxa_amostragem))
+    return handler
+
+
+def configurar_logging(nivel=HSP_LOG_LEVEL, formato=HSP_LOG_FORMATO, taxa_amostragem=HSP_LOG_AMOSTRAGEM):
+    """
+    Configura o logger raiz 'hsp' com um QueueHandler não bloqueante.
+    A escrita em stdout acontece numa thread dedicada (QueueListener), fora do caminho da requisição.
+    Chamadas repetidas são ignoradas.
+    """
+    global _listener, _configuracao
+    with _lock:
+        if _configuracao is not None:
+            return
+
+        fila = queue.SimpleQueue()
+        raiz = logging.getLogger("hsp")
+        raiz.setLevel(nivel)
+        raiz.addHandler(_filtros(HandlerFila(fila), taxa_amostragem))
+        raiz.propagate = False
+
+        _listener = QueueListener(fila, _handler_saida(formato), respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        _configuracao = (nivel, formato, taxa_amostragem)
+
+
+def _reconfigurar_apos_fork():
+    """
+    Processo filho de um fork (workers do pool de core/parallel.py): o filho herda o QueueHandler, mas
+    não a thread do QueueListener, e os registros ficariam presos na fila. No filho a escrita passa a
+    ser direta em stdout — os workers saem com os._exit, sem atexit, e uma thread nova perderia o final da fila.
+    """
+    global _listener, _lock
+    _lock = threading.Lock()
+    _listener = None
+    if _configuracao is None:
+        return
+    _, formato, taxa_amostragem = _configuracao
+    raiz = logging.getLogger("hsp")
+    for handler in list(raiz.handlers):
+        if isinstance(handler, QueueHandler):
+            raiz.removeHandler(handler)
+    raiz.addHandler(_filtros(_handler_saida(formato), taxa_amostragem))
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reconfigurar_apos_fork)
+
+
+def get_logger(nome):
+    """Retorna um logger filho de 'hsp' (ex: get_logger("repository") -> 'hsp.repository')."""
+    configurar_logging()
+    return logging.getLogger(f"hsp.{nome}")
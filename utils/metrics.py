@@ -0,0 +1,180 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Buckets padrão (segundos) cobrindo desde estágios sub-milissegundo até lotes de vários segundos
+BUCKETS_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BUCKETS_LOTE = (1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatar_rotulos(nomes, valores, extra=None):
+    pares = list(zip(nomes, valores))
+    if extra:
+        pares.append(extra)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+def _formatar_valor(valor):
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor))
+
+
+class Counter:
+    """Contador monotônico com rótulos, no formato Prometheus."""
+
+    tipo = "counter"
+
+    def __init__(self, nome, descricao, rotulos=()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def inc(self, valor=1.0, **rotulos):
+        chave = tuple(str(rotulos.get(r, "")) for r in self.rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0.0) + valor
+
+    def valor(self, **rotulos):
+        chave = tuple(str(rotulos.get(r, "")) for r in self.rotulos)
+        return self._valores.get(chave, 0.0)
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+        with self._lock:
+            for chave, valor in sorted(self._valores.items()):
+                linhas.append(f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_formatar_valor(valor)}")
+        return linhas
+
+
+class Histogram:
+    """Histograma cumulativo com rótulos, no formato Prometheus."""
+
+    tipo = "histogram"
+
+    def __init__(self, nome, descricao, rotulos=(), buckets=BUCKETS_LATENCIA):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, valor, **rotulos):
+        chave = tuple(str(rotulos.get(r, "")) for r in self.rotulos)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = {"contagens": [0] * len(self.buckets), "soma": 0.0, "total": 0}
+                self._series[chave] = serie
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie["contagens"][i] += 1
+                    break
+            serie["soma"] += valor
+            serie["total"] += 1
+
+    @contextmanager
+    def time(self, **rotulos):
+        """Context manager que observa o tempo decorrido (s) do bloco."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - inicio, **rotulos)
+
+    def total(self, **rotulos):
+        chave = tuple(str(rotulos.get(r, "")) for r in self.rotulos)
+        serie = self._series.get(chave)
+        return serie["total"] if serie else 0
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+        with self._lock:
+            for chave, serie in sorted(self._series.items()):
+                acumulado = 0
+                for limite, contagem in zip(self.buckets, serie["contagens"]):
+                    acumulado += contagem
+                    rotulos = _formatar_rotulos(self.rotulos, chave, ("le", _formatar_valor(limite)))
+                    linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+                rotulos = _formatar_rotulos(self.rotulos, chave)
+                linhas.append(f"{self.nome}_sum{rotulos} {_formatar_valor(serie['soma'])}")
+                linhas.append(f"{self.nome}_count{rotulos} {serie['total']}")
+        return linhas
+
+
+class RegistroMetricas:
+    """
+    Registro em memória das métricas do processo.
+    Com `uvicorn --workers N`, cada worker mantém o seu próprio registro.
+    """
+
+    def __init__(self):
+        self._metricas = []
+        self._caches = {}
+
+    def counter(self, nome, descricao, rotulos=()):
+        metrica = Counter(nome, descricao, rotulos)
+        self._metricas.append(metrica)
+        return metrica
+
+    def histogram(self, nome, descricao, rotulos=(), buckets=BUCKETS_LATENCIA):
+        metrica = Histogram(nome, descricao, rotulos, buckets)
+        self._metricas.append(metrica)
+        return metrica
+
+    def registrar_cache(self, nome, funcao_cacheada):
+        """Expõe os contadores de hit/miss de uma função decorada com functools.lru_cache."""
+        self._caches[nome] = funcao_cacheada
+
+    def _exportar_caches(self):
+        linhas = [
+            "# HELP hsp_cache_consultas_total Consultas aos caches internos por resultado (hit/miss)",
+            "# TYPE hsp_cache_consultas_total counter",
+        ]
+        for nome, funcao in sorted(self._caches.items()):
+            info = funcao.cache_info()
+            linhas.append(f'hsp_cache_consultas_total{{cache="{nome}",resultado="hit"}} {info.hits}')
+            linhas.append(f'hsp_cache_consultas_total{{cache="{nome}",resultado="miss"}} {info.misses}')
+        return linhas
+
+    def exportar(self):
+        """Gera o texto no formato de exposição do Prometheus (text/plain; version=0.0.4)."""
+        linhas = []
+        for metrica in self._metricas:
+            linhas.extend(metrica.exportar())
+        linhas.extend(self._exportar_caches())
+        return "\n".join(linhas) + "\n"
+
+
+REGISTRO = RegistroMetricas()
+
+HTTP_LATENCIA = REGISTRO.histogram(
+    "hsp_http_request_duration_seconds", "Latência das requisições HTTP por rota", ("metodo", "rota", "status")
+)
+PROVEDOR_LATENCIA = REGISTRO.histogram(
+    "hsp_provider_fetch_duration_seconds", "Latência da consulta aos provedores climatológicos", ("provedor",)
+)
+PROVEDOR_ERROS = REGISTRO.counter(
+    "hsp_provider_errors_total", "Falhas na consulta aos provedores climatológicos", ("provedor",)
+)
+ESTAGIO_LATENCIA = REGISTRO.histogram(
+    "hsp_engine_stage_duration_seconds",
+    "Tempo gasto por estágio do motor (geometria, sombreamento, transposicao, serializacao)",
+    ("estagio",)
+)
+LOTE_TAMANHO = REGISTRO.histogram(
+    "hsp_batch_size", "Quantidade de itens por lote processado", ("operacao",), buckets=BUCKETS_LOTE
+)
+CENA_PARES = REGISTRO.counter(
+    "hsp_scene_pairs_total", "Pares módulo × obstáculo das cenas: avaliados, descartados pelo teste geométrico ou fora do alcance do índice espacial",
+    ("resultado",)
+)
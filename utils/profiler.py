@@ -0,0 +1,175 @@
+import os
+import sys
+import hmac
+import time
+import uuid
+import cProfile
+import functools
+import threading
+import contextvars
+from collections import Counter
+from contextlib import nullcontext
+from utils.logger import get_logger
+
+# Configuração via ambiente
+HSP_PROFILING = os.getenv("HSP_PROFILING", "0") == "1"  # perfila toda requisição / execução instrumentada
+HSP_PROFILING_MODO = os.getenv("HSP_PROFILING_MODO", "amostragem")  # "amostragem" ou "deterministico"
+HSP_PROFILING_DIR = os.getenv("HSP_PROFILING_DIR", "data/perfis")
+HSP_PROFILING_INTERVALO_MS = float(os.getenv("HSP_PROFILING_INTERVALO_MS", "1"))
+# Token exigido no header HEADER_PERFIL para perfilar uma requisição sob demanda (vazio = desabilitado)
+HSP_PROFILING_TOKEN = os.getenv("HSP_PROFILING_TOKEN", "")
+
+HEADER_PERFIL = "X-HSP-Profile"
+HEADER_PERFIL_ID = "X-Profile-ID"
+
+# Sessão de perfil da requisição corrente (criada pelo middleware, preenchida pelo endpoint)
+PERFIL_REQUISICAO = contextvars.ContextVar("perfil_requisicao", default=None)
+# Evita perfis aninhados (ex: CLI perfilada chamando um método @perfilado): vale o mais externo
+_PERFIL_EM_CURSO = contextvars.ContextVar("perfil_em_curso", default=False)
+
+logger = get_logger("profiler")
+
+
+class SessaoPerfil:
+    """Identifica um perfil pedido pelo middleware; `caminho` é preenchido quando o arquivo é gravado."""
+
+    def __init__(self, perfil_id=None):
+        self.id = perfil_id or f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.caminho = None
+
+
+def requisicao_autorizada(valor_header):
+    """Perfil sob demanda apenas com o token de administrador configurado (comparação em tempo constante)."""
+    return bool(HSP_PROFILING_TOKEN) and hmac.compare_digest(valor_header.encode(), HSP_PROFILING_TOKEN.encode())
+
+
+def _rotulo(frame):
+    codigo = frame.f_code
+    return f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}"
+
+
+class AmostradorPilhas(threading.Thread):
+    """
+    Profiler por amostragem de uma única thread: a cada `intervalo_s` lê a pilha da thread alvo
+    (sys._current_frames) e conta as pilhas no formato "folded" (raiz;...;folha), aceito pelo
+    flamegraph.pl, speedscope e inferno.
+    """
+
+    def __init__(self, thread_id, intervalo_s):
+        super().__init__(daemon=True, name="hsp-amostrador")
+        self.thread_id = thread_id
+        self.intervalo_s = intervalo_s
+        self.pilhas = Counter()
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo_s):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            pilha = []
+            while frame is not None:
+                pilha.append(_rotulo(frame))
+                frame = frame.f_back
+            self.pilhas[";".join(reversed(pilha))] += 1
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+    def gravar(self, caminho):
+        with open(caminho, "w", encoding="utf-8") as f:
+            for pilha, contagem in self.pilhas.most_common():
+                f.write(f"{pilha} {contagem}\n")
+
+
+class Perfil:
+    """
+    Context manager que perfila o bloco na thread corrente e grava o resultado em `diretorio`:
+    - modo "amostragem": pilhas "folded" (.folded), prontas para flamegraph;
+    - modo "deterministico": cProfile (.prof), para snakeviz/pstats.
+    """
+
+    def __init__(self, nome, modo=None, diretorio=None, sessao=None, intervalo_ms=None):
+        self.nome = nome
+        self.modo = modo or HSP_PROFILING_MODO
+        self.diretorio = diretorio or HSP_PROFILING_DIR
+        self.sessao = sessao or SessaoPerfil()
+        self.intervalo_s = (intervalo_ms or HSP_PROFILING_INTERVALO_MS) / 1000
+        self._coletor = None
+
+    @property
+    def id(self):
+        return self.sessao.id
+
+    def __enter__(self):
+        self._aninhado = _PERFIL_EM_CURSO.get()
+        if self._aninhado:
+            return self
+        self._token = _PERFIL_EM_CURSO.set(True)
+
+        if self.modo == "deterministico":
+            self._coletor = cProfile.Profile()
+            self._coletor.enable()
+        else:
+            self._coletor = AmostradorPilhas(threading.get_ident(), self.intervalo_s)
+            self._coletor.start()
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._aninhado:
+            return False
+        _PERFIL_EM_CURSO.reset(self._token)
+
+        duracao = time.perf_counter() - self._inicio
+        os.makedirs(self.diretorio, exist_ok=True)
+        nome_arquivo = f"{self.sessao.id}_{self.nome.replace('/', '_').strip('_')}"
+
+        if self.modo == "deterministico":
+            self._coletor.disable()
+            caminho = os.path.join(self.diretorio, nome_arquivo + ".prof")
+            self._coletor.dump_stats(caminho)
+        else:
+            self._coletor.parar()
+            caminho = os.path.join(self.diretorio, nome_arquivo + ".folded")
+            self._coletor.gravar(caminho)
+
+        self.sessao.caminho = caminho
+        logger.info("Perfil gravado", extra={"perfil_id": self.sessao.id, "arquivo": caminho,
+                                             "alvo": self.nome, "duracao_s": round(duracao, 4)})
+        return False
+
+
+def perfilar(nome, ativo=None, **kwargs):
+    """
+    Hook para CLIs e auditorias: `with perfilar("auditoria.cresesb"):`.
+    Sem HSP_PROFILING=1 (ou `ativo=True`) devolve um contexto nulo, sem custo.
+    """
+    if HSP_PROFILING if ativo is None else ativo:
+        return Perfil(nome, **kwargs)
+    return nullcontext()
+
+
+def perfilado(nome=None):
+    """
+    Decorador para endpoints síncronos e métodos instrumentados. Perfila a chamada quando:
+    - há uma sessão de perfil na requisição corrente (aberta pelo middleware), ou
+    - HSP_PROFILING=1 fora de uma requisição (auditorias, CLIs).
+    O endpoint roda na thread do threadpool: é por isso que o perfil começa aqui, e não no middleware.
+    Desabilitado, o custo é a leitura de uma ContextVar.
+    """
+    def decorar(funcao):
+        alvo = nome or funcao.__qualname__
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            sessao = PERFIL_REQUISICAO.get()
+            if sessao is None:
+                if not HSP_PROFILING:
+                    return funcao(*args, **kwargs)
+                sessao = SessaoPerfil()
+            with Perfil(alvo, sessao=sessao):
+                return funcao(*args, **kwargs)
+        return envoltorio
+    return decorar